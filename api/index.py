@@ -121,79 +121,8 @@ def static_files(filename):
     except:
         return f'文件未找到: {filename}', 404
 
-# 直接在此處定義語音服務類
-class VercelSpeechService:
-    """適用於 Vercel 的語音識別服務"""
-    
-    def __init__(self):
-        self.azure_key = os.environ.get('AZURE_SPEECH_KEY')
-        self.azure_region = os.environ.get('AZURE_SPEECH_REGION', 'eastasia')
-        self.base_url = f"https://{self.azure_region}.stt.speech.microsoft.com"
-        
-    def validate_config(self):
-        """驗證配置"""
-        return bool(self.azure_key and self.azure_region)
-    
-    def transcribe_audio(self, audio_data, content_type="audio/wav"):
-        """語音識別"""
-        if not self.validate_config():
-            return {
-                'success': False,
-                'error': 'Azure Speech Services 未配置'
-            }
-        
-        try:
-            import requests
-            
-            headers = {
-                'Ocp-Apim-Subscription-Key': self.azure_key,
-                'Content-Type': content_type,
-                'Accept': 'application/json'
-            }
-            
-            url = f"{self.base_url}/speech/recognition/conversation/cognitiveservices/v1"
-            params = {
-                'language': 'zh-HK',
-                'format': 'detailed'
-            }
-            
-            response = requests.post(
-                url,
-                headers=headers,
-                params=params,
-                data=audio_data,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                
-                if result.get('RecognitionStatus') == 'Success':
-                    display_text = result.get('DisplayText', '')
-                    confidence = result.get('NBest', [{}])[0].get('Confidence', 0)
-                    
-                    return {
-                        'success': True,
-                        'text': display_text,
-                        'confidence': confidence,
-                        'language': 'zh-HK'
-                    }
-                else:
-                    return {
-                        'success': False,
-                        'error': f"識別失敗: {result.get('RecognitionStatus')}"
-                    }
-            else:
-                return {
-                    'success': False,
-                    'error': f"API 請求失敗: {response.status_code} - {response.text}"
-                }
-                
-        except Exception as e:
-            return {
-                'success': False,
-                'error': f'語音識別錯誤: {str(e)}'
-            }
+# 語音服務（與 api/speech_api.py 共用 REST 客戶端）
+from api.speech_api import VercelSpeechService
 
 # 添加語音識別 API 端點（用於 Vercel 環境）
 @app.route('/api/speech/transcribe', methods=['POST'])
@@ -251,6 +180,11 @@ def test_speech_service():
         return {'success': False, 'error': f'測試失敗: {str(e)}'}, 500
 
 # 添加 OpenRouter API 端點
+from services.prompt_builder import PromptBuilder
+
+# 系統提示詞只構建一次，跨請求逐字節相同（便於前綴緩存）
+vercel_prompt_builder = PromptBuilder(include_upselling=True)
+
 @app.route('/api/order/parse', methods=['POST'])
 def parse_order():
     """訂單解析端點"""
@@ -276,168 +210,10 @@ def parse_order():
             'Content-Type': 'application/json'
         }
         
-        # 構建詳細的系統提示
-        system_prompt = """你是一個專業的港式茶餐廳點餐助手，精通港式粵語和茶餐廳文化。請解析顧客的粵語點餐內容，並按以下格式返回JSON：
-
-{
-  "success": true,
-  "order": {
-    "items": [
-      {
-        "name": "菜品名稱",
-        "quantity": 數量,
-        "unit_price": 預估價格,
-        "customizations": {
-          "甜度": "少甜/正常/甜/無糖/走糖/半糖",
-          "冰塊": "走冰/少冰/正常冰/多冰/室溫",
-          "溫度": "凍/熱/室溫",
-          "加料": "加檸檬/加蜂蜜/加奶/走奶等",
-          "份量": "大杯/中杯/小杯/加大"
-        },
-        "special_requirements": ["具體特殊要求"],
-        "category": "主食/飲品/小食/甜品"
-      }
-    ],
-    "total_price": 總價格,
-    "special_requests": ["整體特殊要求"],
-    "confidence": 0.0-1.0,
-    "clarification_needed": false
-  },
-  "upselling": {
-    "suggestions": [
-      {
-        "item": "推薦商品名稱",
-        "reason": "推薦原因（這會成為顯示消息）", 
-        "price": 價格
-      }
-    ]
-  },
-  "original_text": "原始語音文本"
-}
-
-## 專業茶餐廳知識庫
-
-### 常見定制選項：
-- **甜度：** 少甜、正常、甜、無糖、走糖、半糖
-- **冰塊：** 走冰、少冰、正常冰、多冰、室溫  
-- **溫度：** 凍、熱、室溫、溫
-- **加料：** 加檸檬、加蜂蜜、加薄荷、加奶、走奶
-- **份量：** 大杯、中杯、小杯、加大、正常
-
-### 港式茶餐廳菜品價格參考：
-**主食類：**
-- 炸豬扒飯：$48-55
-- 叉燒飯：$42-48
-- 咖喱雞飯：$45-52
-- 豉汁排骨飯：$46-53
-- 蒸蛋飯：$35-42
-- 白切雞飯：$45-52
-
-**飲品類：**
-- 港式奶茶：$22-28
-- 凍檸茶：$18-25
-- 凍檸水：$16-22
-- 凍華田：$20-26
-- 熱咖啡：$18-25
-- 凍可樂：$15-22
-
-**小食類：**
-- 西多士：$25-35
-- 菠蘿包：$12-18
-- 雞翼：$25-35
-
-### 解析要求：
-1. 精確識別所有定制要求（少甜、少冰、走冰等）
-2. 正確提取數量和項目名稱
-3. 根據定制調整價格（特殊要求可能+$2-5）
-4. 生成合理的追加銷售建議
-5. 如果有不清楚的地方，設置 clarification_needed: true
-
-### 智能推薦加購策略：
-**配餐建議**：
-- 只點飲品 → 推薦：薯條($18)、牛油多士($18)、雞蛋三明治($25)
-- 只點主食 → 推薦：凍檸茶($18)、奶茶($22)、例湯($12)
-- 點了炸類食物 → 推薦：清爽飲品消膩
-- 點了麵條/河粉 → 推薦：熱湯或例湯
-
-**時段建議**：
-- 早餐時段 → 推薦：咖啡、厚多士、煎蛋
-- 下午茶 → 推薦：西多士、菠蘿包、奶茶
-- 晚餐 → 推薦：例湯、飲品組合
-
-**價位建議**：
-- 消費$30-50 → 推薦加飲品($15-25)
-- 消費$50+ → 推薦升級套餐或甜品
-- 消費少於$30 → 推薦小食補足($12-18)
-
-**健康搭配**：
-- 油膩食物 → 推薦無糖/少糖飲品
-- 乾糧食物 → 推薦湯品或多汁飲品
-- 單一類型 → 推薦營養均衡的配菜
-
-### 例子：
-**輸入：** "唔該我要個炸豬扒飯加杯凍奶茶少甜走冰"
-**輸出：**
-```json
-{
-  "success": true,
-  "order": {
-    "items": [
-      {
-        "name": "炸豬扒飯",
-        "quantity": 1,
-        "unit_price": 48.0,
-        "customizations": {},
-        "special_requirements": [],
-        "category": "主食"
-      },
-      {
-        "name": "凍奶茶",
-        "quantity": 1,
-        "unit_price": 22.0,
-        "customizations": {
-          "甜度": "少甜",
-          "冰塊": "走冰"
-        },
-        "special_requirements": ["少甜", "走冰"],
-        "category": "飲品"
-      }
-    ],
-    "total_price": 70.0,
-    "special_requests": ["少甜走冰"],
-    "confidence": 0.95,
-    "clarification_needed": false
-  },
-  "upselling": {
-    "suggestions": [
-      {
-        "item": "薯條",
-        "reason": "炸豬扒飯配薯條很受歡迎，金黃香脆！",
-        "price": 18.0
-      },
-      {
-        "item": "例湯",
-        "reason": "今日例湯暖胃開胃，完美搭配！",
-        "price": 12.0
-      }
-    ]
-  },
-  "original_text": "唔該我要個炸豬扒飯加杯凍奶茶少甜走冰"
-}
-```"""
-
         payload = {
             'model': 'x-ai/grok-4-fast:free',
-            'messages': [
-                {
-                    'role': 'system',
-                    'content': system_prompt
-                },
-                {
-                    'role': 'user',
-                    'content': f'請解析這個港式茶餐廳點餐內容：{text}'
-                }
-            ],
+            # 固定系統前綴 + 緊湊菜單（見 services/prompt_builder.py）
+            'messages': vercel_prompt_builder.build_messages(text),
             'max_tokens': 1000,
             'temperature': 0.3
         }
@@ -3,6 +3,7 @@
 """
 from flask import Flask
 from flask_cors import CORS
+from flask_socketio import SocketIO
 import os
 from dotenv import load_dotenv
 from config import config
@@ -14,6 +15,9 @@ load_dotenv()
 # 設置日誌
 logger = get_app_logger()
 
+# WebSocket（串流語音識別）
+socketio = SocketIO()
+
 def create_app(config_name=None):
     """創建 Flask 應用程序實例"""
     # 明確指定靜態文件夾和 URL 路徑
@@ -47,6 +51,24 @@ def create_app(config_name=None):
     app.register_blueprint(speech_bp, url_prefix='/api/speech')
     app.register_blueprint(order_bp, url_prefix='/api/order')
     
+    # 啟動時創建訂單服務（打開數據庫並載入活躍訂單），避免並發的第一批請求各自創建
+    from routes.order_routes import init_order_service
+    init_order_service(app.config)
+    
+    # 啟動時創建語音服務，識別器池在後台預先建立連接，第一個請求不用等待
+    if app.config.get('SPEECH_POOL_SIZE', 0) > 0 and app.config.get('AZURE_SPEECH_KEY') and app.config.get('AZURE_SPEECH_REGION'):
+        from routes.speech_routes import init_speech_service
+        try:
+            init_speech_service(app.config)
+        except Exception as e:
+            logger.error(f"語音服務預熱失敗，將在第一個請求時重試: {e}")
+    
+    # 註冊 WebSocket 事件（在 init_app 前登記到全局 socketio，每次 init_app 都會套用）
+    if not socketio.handlers:
+        from routes.speech_socket import register_speech_socket
+        register_speech_socket(socketio)
+    socketio.init_app(app, cors_allowed_origins='*', async_mode=app.config.get('SOCKETIO_ASYNC_MODE', 'threading'))
+    
     logger.info("Flask 應用程序創建完成")
     return app
 
@@ -63,7 +85,11 @@ if __name__ == '__main__':
         logger.info(f"啟動零差錯 AI 語音點餐系統 - {config_name} 模式")
         logger.info(f"服務器地址: {host}:{port}")
         
-        app.run(debug=app.config['DEBUG'], host=host, port=port)
+        # Werkzeug 開發服務器只用於 DEBUG；生產環境使用 gunicorn wsgi:app（見 gunicorn.conf.py）
+        if not app.config['DEBUG']:
+            logger.warning("python app.py 只適用於開發環境，生產環境請使用: gunicorn wsgi:app")
+        socketio.run(app, debug=app.config['DEBUG'], host=host, port=port,
+                     allow_unsafe_werkzeug=app.config['DEBUG'])
     except Exception as e:
         logger.error(f"應用程序啟動失敗: {e}")
         raise
\ No newline at end of file
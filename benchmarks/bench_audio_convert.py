@@ -0,0 +1,114 @@
+"""
+音頻轉換基準測試 - 比較舊版逐個格式試解碼、文件頭識別後直接解碼及進程內 WAV 轉換
+
+需要 pydub 及 ffmpeg。
+用法: python benchmarks/bench_audio_convert.py [--seconds 3] [--rounds 5]
+"""
+import argparse
+import io
+import math
+import os
+import struct
+import sys
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydub import AudioSegment
+
+from utils.audio_format import sniff_audio_format
+from utils.pcm import convert_wav
+
+LEGACY_FORMATS = ["webm", "mp3", "ogg", "wav", "m4a"]
+
+# 測試格式 → pydub 導出參數
+EXPORT_FORMATS = {
+    'webm': {'format': 'webm', 'codec': 'libopus'},
+    'ogg': {'format': 'ogg', 'codec': 'libvorbis'},
+    'mp3': {'format': 'mp3'},
+    'm4a': {'format': 'ipod', 'codec': 'aac'},
+    'wav': {'format': 'wav'},
+}
+
+
+def _finish(segment: AudioSegment) -> bytes:
+    """轉換為 16kHz 16-bit 單聲道 WAV（與 SpeechService 相同）"""
+    segment = segment.set_frame_rate(16000).set_channels(1).set_sample_width(2)
+    output = io.BytesIO()
+    segment.export(output, format="wav", parameters=["-acodec", "pcm_s16le"])
+    return output.getvalue()
+
+
+def legacy_convert(audio_data: bytes):
+    """舊版：按固定順序逐個格式嘗試，每次失敗都啟動一次 ffmpeg"""
+    attempts = 0
+    for format_name in LEGACY_FORMATS:
+        attempts += 1
+        try:
+            segment = AudioSegment.from_file(io.BytesIO(audio_data), format=format_name)
+            return _finish(segment), attempts
+        except Exception:
+            continue
+    attempts += 1
+    return _finish(AudioSegment.from_file(io.BytesIO(audio_data))), attempts
+
+
+def sniffed_convert(audio_data: bytes):
+    """新版：根據文件頭選擇解碼器，只嘗試一次"""
+    audio_format = sniff_audio_format(audio_data)
+    segment = AudioSegment.from_file(io.BytesIO(audio_data), format=audio_format)
+    return _finish(segment), 1
+
+
+def make_samples(seconds: float):
+    """生成 44.1kHz 立體聲測試音並導出為各種格式"""
+    sample_rate = 44100
+    frames = bytearray()
+    for index in range(int(seconds * sample_rate)):
+        value = int(8000 * math.sin(2 * math.pi * 440 * index / sample_rate))
+        frames += struct.pack('<hh', value, value)
+    raw = io.BytesIO()
+    with wave.open(raw, 'wb') as writer:
+        writer.setnchannels(2)
+        writer.setsampwidth(2)
+        writer.setframerate(sample_rate)
+        writer.writeframes(bytes(frames))
+    source = AudioSegment.from_file(io.BytesIO(raw.getvalue()), format='wav')
+
+    samples = {}
+    for label, options in EXPORT_FORMATS.items():
+        output = io.BytesIO()
+        source.export(output, **options)
+        samples[label] = output.getvalue()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seconds', type=float, default=3.0, help='測試音長度（秒）')
+    parser.add_argument('--rounds', type=int, default=5, help='每個格式的轉換次數')
+    args = parser.parse_args()
+
+    samples = make_samples(args.seconds)
+    print(f"{'格式':<6}{'識別':<6}{'舊版嘗試':>8}{'舊版(ms)':>12}{'新版(ms)':>12}{'進程內(ms)':>12}")
+    for label, data in samples.items():
+        timings = {}
+        attempts = {}
+        for name, func in (('legacy', legacy_convert), ('sniffed', sniffed_convert)):
+            started = time.perf_counter()
+            for _ in range(args.rounds):
+                _, attempts[name] = func(data)
+            timings[name] = (time.perf_counter() - started) * 1000 / args.rounds
+        in_process = '-'
+        if label == 'wav':
+            started = time.perf_counter()
+            for _ in range(args.rounds):
+                convert_wav(data)
+            in_process = f"{(time.perf_counter() - started) * 1000 / args.rounds:.1f}"
+        print(f"{label:<6}{str(sniff_audio_format(data)):<6}{attempts['legacy']:>8}"
+              f"{timings['legacy']:>12.1f}{timings['sniffed']:>12.1f}{in_process:>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+菜單價格查找基準測試 - 比較舊版線性掃描與預編譯索引
+
+用法: python benchmarks/bench_menu_lookup.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.menu_catalog import PRICE_ITEMS, CATEGORY_FALLBACK, DEFAULT_PRICE, lookup_price
+
+
+def legacy_lookup(item_name: str) -> float:
+    """舊版 `_get_default_price`：每次重建價格表，線性子串掃描"""
+    item_name_lower = item_name.lower()
+    price_map = dict(PRICE_ITEMS)
+    if item_name_lower in price_map:
+        return price_map[item_name_lower]
+    for key, price in price_map.items():
+        if key in item_name_lower:
+            return price
+    for keywords, price in CATEGORY_FALLBACK:
+        if any(keyword in item_name_lower for keyword in keywords):
+            return price
+    return DEFAULT_PRICE
+
+
+SAMPLE_NAMES = [
+    '凍檸茶', '港式奶茶走冰', '熱鴛鴦少甜', '乾炒牛河', '雙蛋火腿三明治',
+    '豬扒飯', '星洲炒米', '菠蘿油', '凍華田', '餐肉煎蛋麵', 'Coffee', '蜜糖青檸梳打',
+]
+
+
+def main():
+    corpus = SAMPLE_NAMES + [name for name, _ in PRICE_ITEMS] + [f'大杯{name}走冰' for name, _ in PRICE_ITEMS]
+    mismatches = [name for name in corpus if legacy_lookup(name) != lookup_price(name)]
+    print(f"一致性檢查: {len(corpus)} 個名稱, 不一致 {len(mismatches)} 個 {mismatches}")
+
+    rounds = 200
+    for label, func in (('舊版線性掃描', legacy_lookup), ('預編譯索引', lookup_price)):
+        elapsed = timeit.timeit(lambda: [func(name) for name in SAMPLE_NAMES], number=rounds)
+        per_second = rounds * len(SAMPLE_NAMES) / elapsed
+        print(f"{label}: {per_second:,.0f} 次查找/秒")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+活躍訂單輪詢基準測試 - 比較舊版每次重新序列化、ETag 304 及緩存的 JSON
+
+模擬多個廚房/櫃檯畫面輪詢 /api/order/active：訂單沒有變化時帶 If-None-Match
+的請求返回 304；沒有帶 ETag 的請求返回緩存的 JSON。
+用法: python benchmarks/bench_order_etag.py [--active 200] [--rounds 500]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify
+
+from routes import order_routes
+from routes.order_routes import order_bp
+
+ORDER_DATA = {
+    'items': [{'name': '凍檸茶', 'quantity': 1, 'unit_price': 18.0, 'customizations': {'甜度': '少甜'}}],
+    'special_requests': ['少甜'],
+    'transcription': '一杯凍檸茶少甜',
+    'confidence_score': 0.92
+}
+
+
+def legacy_active_orders():
+    """舊版 /api/order/active：每次序列化全部活躍訂單"""
+    orders = order_routes.order_service.get_active_orders()
+    return jsonify({
+        'success': True,
+        'orders': [order.to_dict() for order in orders]
+    })
+
+
+def timed(client, path: str, rounds: int, headers=None):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        response = client.get(path, headers=headers)
+    return (time.perf_counter() - started) / rounds * 1000, response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--active', type=int, default=200, help='活躍訂單數')
+    parser.add_argument('--rounds', type=int, default=500, help='每種方式的請求數')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    app = Flask(__name__)
+    app.config['DATABASE_URL'] = 'sqlite:///:memory:'
+    app.register_blueprint(order_bp, url_prefix='/api/order')
+    app.add_url_rule('/legacy/active', view_func=legacy_active_orders)
+    client = app.test_client()
+
+    for _ in range(args.active):
+        client.post('/api/order/create', json=ORDER_DATA)
+
+    legacy_time, legacy = timed(client, '/legacy/active', args.rounds)
+    first = client.get('/api/order/active')
+    assert first.get_json() == legacy.get_json(), "結果不一致"
+    etag = first.headers['ETag']
+
+    cached_time, cached = timed(client, '/api/order/active', args.rounds)
+    not_modified_time, not_modified = timed(client, '/api/order/active', args.rounds, {'If-None-Match': etag})
+    assert cached.get_json() == legacy.get_json() and not_modified.status_code == 304
+
+    # 修改後 ETag 失效
+    order_id = first.get_json()['orders'][0]['id']
+    client.put(f'/api/order/{order_id}/status', json={'status': 'confirmed'})
+    changed = client.get('/api/order/active', headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.headers['ETag'] != etag, "修改後仍返回 304"
+
+    print(f"活躍訂單 {args.active} 筆，響應 {len(legacy.data) / 1024:.1f} KB，結果一致")
+    print(f"舊版重新序列化: {legacy_time:.3f} ms/次")
+    print(f"緩存的 JSON:    {cached_time:.3f} ms/次 ({legacy_time / cached_time:.0f}x)")
+    print(f"ETag 304:       {not_modified_time:.3f} ms/次 ({legacy_time / not_modified_time:.0f}x，不發送內容)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+管理面板刷新基準測試 - 比較每次輪詢下載全部活躍訂單與按版本號只下載變更
+
+每輪先產生 --changes 次創建或狀態更新，再模擬一次面板刷新；同時檢查把變更
+套用到上一輪的列表後與全部活躍訂單一致。
+用法: python benchmarks/bench_order_feed.py [--active 200] [--changes 3] [--rounds 200]
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.order import OrderStatus
+from services.order_service import ACTIVE_STATUSES, OrderService
+
+ORDER_DATA = {
+    'items': [{'name': '凍檸茶', 'quantity': 1, 'unit_price': 18.0, 'customizations': {'甜度': '少甜'}}],
+    'special_requests': ['少甜'],
+    'transcription': '一杯凍檸茶少甜',
+    'confidence_score': 0.92
+}
+
+
+def full_poll(service: OrderService) -> bytes:
+    """舊版 /api/order/active：序列化全部活躍訂單"""
+    orders = service.get_active_orders()
+    return json.dumps({'success': True, 'orders': [order.to_dict() for order in orders]},
+                      ensure_ascii=False).encode()
+
+
+def delta_poll(service: OrderService, since: int):
+    """/api/order/changes?since=：只序列化之後的變更"""
+    version, events = service.get_changes_since(since)
+    body = json.dumps({'success': True, 'version': version, 'reset': False,
+                       'events': [event.to_dict() for event in events]}, ensure_ascii=False).encode()
+    return version, events, body
+
+
+def mutate(service: OrderService, rng: random.Random, count: int):
+    """創建新訂單或推進現有活躍訂單的狀態（每筆訂單經四次更新送達，創建佔兩成使活躍訂單數大致不變）"""
+    for _ in range(count):
+        active = service.get_orders_by_status(rng.choice(ACTIVE_STATUSES))
+        if active and rng.random() < 0.8:
+            order = rng.choice(active)
+            position = ACTIVE_STATUSES.index(order.status)
+            status = ACTIVE_STATUSES[position + 1] if position + 1 < len(ACTIVE_STATUSES) else OrderStatus.DELIVERED
+            service.update_order_status(order.id, status)
+        else:
+            service.create_order(ORDER_DATA)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--active', type=int, default=200, help='活躍訂單數')
+    parser.add_argument('--changes', type=int, default=3, help='每次刷新之間的變更數')
+    parser.add_argument('--rounds', type=int, default=200, help='刷新次數')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    rng = random.Random(1)
+    service = OrderService()
+    for _ in range(args.active):
+        service.create_order(ORDER_DATA)
+
+    version, snapshot = service.get_active_snapshot()
+    client = {order.id: order.to_dict() for order in snapshot}
+    full_time = delta_time = 0.0
+    full_bytes = delta_bytes = 0
+    for _ in range(args.rounds):
+        mutate(service, rng, args.changes)
+
+        started = time.perf_counter()
+        body = full_poll(service)
+        full_time += time.perf_counter() - started
+        full_bytes += len(body)
+
+        started = time.perf_counter()
+        version, events, body = delta_poll(service, version)
+        delta_time += time.perf_counter() - started
+        delta_bytes += len(body)
+
+        # 面板套用變更：已完成的訂單移出列表
+        for event in json.loads(body)['events']:
+            order = event['order']
+            if OrderStatus(order['status']) in ACTIVE_STATUSES:
+                client[order['id']] = order
+            else:
+                client.pop(order['id'], None)
+        expected = {order['id']: order for order in json.loads(full_poll(service))['orders']}
+        assert client == expected, "套用變更後與全部活躍訂單不一致"
+
+    print(f"活躍訂單約 {len(client)} 筆，每次刷新前 {args.changes} 次變更，{args.rounds} 次刷新結果一致")
+    print(f"全部活躍訂單: {full_time / args.rounds * 1000:.3f} ms/次  {full_bytes / args.rounds / 1024:.1f} KB/次")
+    print(f"只取變更:     {delta_time / args.rounds * 1000:.3f} ms/次  {delta_bytes / args.rounds / 1024:.1f} KB/次 "
+          f"({full_time / delta_time:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+活躍訂單查詢基準測試 - 比較舊版全表掃描與狀態索引
+
+用法: python benchmarks/bench_order_index.py [--history 100000] [--active 40]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.order import OrderStatus
+from services.order_service import ACTIVE_STATUSES, OrderService
+
+
+def legacy_active_orders(service: OrderService):
+    """舊版 `get_active_orders`：掃描全部訂單"""
+    active_statuses = [
+        OrderStatus.PENDING,
+        OrderStatus.CONFIRMED,
+        OrderStatus.PREPARING,
+        OrderStatus.READY
+    ]
+    return [
+        order for order in service.orders.values()
+        if order.status in active_statuses
+    ]
+
+
+def build_service(history: int, active: int) -> OrderService:
+    """創建含大量已完成歷史訂單及少量活躍訂單的服務"""
+    service = OrderService()
+    order_data = {'items': [{'name': '凍檸茶', 'quantity': 1, 'unit_price': 18.0}]}
+    for index in range(history + active):
+        order = service.create_order(order_data)
+        if index < history:
+            final = OrderStatus.DELIVERED if index % 10 else OrderStatus.CANCELLED
+            service.update_order_status(order.id, final)
+        else:
+            service.update_order_status(order.id, ACTIVE_STATUSES[index % len(ACTIVE_STATUSES)])
+    return service
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--history', type=int, default=100000, help='已送達/已取消的歷史訂單數')
+    parser.add_argument('--active', type=int, default=40, help='活躍訂單數')
+    parser.add_argument('--rounds', type=int, default=200, help='每種方式的查詢次數')
+    args = parser.parse_args()
+
+    # 建立訂單時關閉逐筆日誌
+    logging.disable(logging.INFO)
+
+    started = time.perf_counter()
+    service = build_service(args.history, args.active)
+    print(f"建立 {args.history + args.active} 筆訂單: {time.perf_counter() - started:.2f} 秒")
+
+    legacy = legacy_active_orders(service)
+    indexed = service.get_active_orders()
+    assert {order.id for order in legacy} == {order.id for order in indexed}, "結果不一致"
+    assert [order.id for order in indexed] == [order.id for order in legacy], "順序不一致"
+
+    legacy_time = timeit.timeit(lambda: legacy_active_orders(service), number=args.rounds)
+    indexed_time = timeit.timeit(service.get_active_orders, number=args.rounds)
+    print(f"活躍訂單 {len(indexed)} 筆，結果一致")
+    print(f"舊版全表掃描: {legacy_time / args.rounds * 1000:.3f} ms/次")
+    print(f"狀態索引:     {indexed_time / args.rounds * 1000:.3f} ms/次 ({legacy_time / indexed_time:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
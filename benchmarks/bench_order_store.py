@@ -0,0 +1,131 @@
+"""
+訂單存儲壓力測試 - 比較純內存、每筆訂單同步提交及後台分組提交的每秒訂單數
+
+多個線程同時創建訂單並更新狀態；分組提交的計時包括最後等待全部寫入提交。
+結束後重新打開數據庫，檢查恢復的訂單與內存中的一致。
+用法: python benchmarks/bench_order_store.py [--orders 5000] [--threads 8] [--synchronous FULL]
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.order import OrderStatus
+from services.order_repository import SQLiteOrderRepository
+from services.order_service import OrderService
+
+ORDER_DATA = {
+    'items': [
+        {'name': '凍檸茶', 'quantity': 1, 'unit_price': 18.0, 'customizations': {'甜度': '少甜'}},
+        {'name': '菠蘿包', 'quantity': 2, 'unit_price': 12.0}
+    ],
+    'special_requests': ['少甜'],
+    'transcription': '一杯凍檸茶少甜，兩個菠蘿包',
+    'confidence_score': 0.92
+}
+
+
+class SyncOrderRepository(SQLiteOrderRepository):
+    """對照組：在調用線程中逐筆提交（每個請求都等待磁盤）"""
+
+    def __init__(self, path: str, synchronous: str):
+        super().__init__(path, synchronous=synchronous)
+        self._write_lock = threading.Lock()
+
+    def save(self, order):
+        row = (order.id, order.status.value, order.created_at.isoformat(),
+               order.updated_at.isoformat(), json.dumps(order.to_dict(), ensure_ascii=False))
+        with self._write_lock:
+            self._connection().execute(
+                'INSERT OR REPLACE INTO orders (id, status, created_at, updated_at, data) VALUES (?, ?, ?, ?, ?)',
+                row
+            )
+
+
+def run(label: str, service: OrderService, orders: int, threads: int):
+    """多線程創建訂單並確認，返回每筆請求的耗時（毫秒）"""
+    latencies = []
+    per_thread = orders // threads
+
+    def worker():
+        local = []
+        for _ in range(per_thread):
+            started = time.perf_counter()
+            order = service.create_order(ORDER_DATA)
+            service.update_order_status(order.id, OrderStatus.CONFIRMED)
+            local.append((time.perf_counter() - started) * 1000)
+        latencies.extend(local)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    if service.repository is not None:
+        service.repository.flush()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{label:<16}{len(latencies) / elapsed:>10.0f} 筆/秒{statistics.mean(latencies):>10.3f} ms{p99:>10.3f} ms")
+
+
+def stored_count(path: str) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute('SELECT COUNT(*) FROM orders').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders', type=int, default=5000, help='訂單數')
+    parser.add_argument('--threads', type=int, default=8, help='並發線程數')
+    parser.add_argument('--synchronous', default='FULL', help='SQLite synchronous 設定（FULL 每次提交同步磁盤）')
+    args = parser.parse_args()
+
+    # 建立訂單時關閉逐筆日誌
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as directory:
+        sync_path = os.path.join(directory, 'sync.db')
+        group_path = os.path.join(directory, 'group.db')
+
+        print(f"{'方式':<16}{'吞吐量':>13}{'平均':>12}{'p99':>13}")
+        run('純內存', OrderService(), args.orders, args.threads)
+
+        sync_repository = SyncOrderRepository(sync_path, args.synchronous)
+        run('逐筆同步提交', OrderService(sync_repository), args.orders, args.threads)
+        sync_repository.close()
+
+        repository = SQLiteOrderRepository(group_path, synchronous=args.synchronous)
+        service = OrderService(repository)
+        run('後台分組提交', service, args.orders, args.threads)
+        repository.close()
+        stats = repository.stats()
+        print(f"分組提交: {stats['commits']} 個事務，平均每個 {stats['avg_batch']} 筆，"
+              f"最多 {stats['max_batch']} 筆，合併 {stats['coalesced']} 次寫入")
+
+        # 重啟後恢復
+        total = len(service.orders)
+        assert stored_count(group_path) == stored_count(sync_path) == total, "持久化的訂單數不一致"
+        restored_repository = SQLiteOrderRepository(group_path)
+        restored = OrderService(restored_repository)
+        assert [order.to_dict() for order in restored.get_active_orders()] == \
+               [order.to_dict() for order in service.get_active_orders()], "恢復的訂單不一致"
+        restored_repository.close()
+        print(f"重新打開數據庫後恢復 {total} 筆訂單，與內存一致")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+提示詞 token 回歸基準 - 報告每次請求的提示 token 數，超出預算時返回非零
+
+重構前的提示詞從 git 歷史中取出（新增 services/prompt_builder.py 的提交之前的
+services/openrouter_service.py 及 api/index.py），用同一估算方法計算。
+用法: python benchmarks/bench_prompt_tokens.py [--budget 900] [--baseline <git revision>]
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.prompt_builder import PromptBuilder
+
+SAMPLE_TRANSCRIPTIONS = [
+    '一杯凍檸茶少甜',
+    '我要兩杯凍檸茶，一杯少甜走冰，一杯正常',
+    '唔該我要個炸豬扒飯加杯凍奶茶少甜走冰',
+    '兩個牛油多士，一個乾炒牛河，三杯熱奶茶，一杯可樂走冰',
+]
+
+# 重構前構建提示詞的文件及其中保存提示詞的變量
+LEGACY_SOURCES = (
+    ('訂單解析', 'services/openrouter_service.py'),
+    ('Vercel 解析+加購', 'api/index.py'),
+)
+_PROMPT_NAMES = ('prompt', 'system_prompt')
+
+
+def _git(*args: str) -> str:
+    return subprocess.run(('git', *args), cwd=ROOT, check=True, capture_output=True, text=True).stdout
+
+
+def default_baseline() -> str:
+    """新增 prompt_builder.py 的提交的父提交"""
+    added = _git('log', '--diff-filter=A', '--format=%H', '--', 'services/prompt_builder.py').split()
+    if not added:
+        raise RuntimeError("git 歷史中找不到 services/prompt_builder.py")
+    return f'{added[-1]}^'
+
+
+def _evaluate(node: ast.AST, names: Dict[str, str]) -> str:
+    """計算字符串常量或 f-string 節點"""
+    return eval(compile(ast.Expression(node), '<legacy>', 'eval'), {}, names)
+
+
+def legacy_messages(source: str, text: str) -> List[Dict[str, str]]:
+    """
+    按舊版代碼構建一次請求的消息
+
+    取出舊源碼中 `prompt`/`system_prompt` 的賦值及 'messages' 列表，以 text 代入 f-string。
+    """
+    tree = ast.parse(source)
+    names = {'text': text}
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Assign) and len(node.targets) == 1
+                and isinstance(node.targets[0], ast.Name) and node.targets[0].id in _PROMPT_NAMES
+                and isinstance(node.value, (ast.Constant, ast.JoinedStr))):
+            names[node.targets[0].id] = _evaluate(node.value, names)
+
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Dict):
+            continue
+        for key, value in zip(node.keys, node.values):
+            if isinstance(key, ast.Constant) and key.value == 'messages' and isinstance(value, ast.List):
+                messages = []
+                for message in value.elts:
+                    fields = {k.value: v for k, v in zip(message.keys, message.values)}
+                    messages.append({'role': _evaluate(fields['role'], names),
+                                     'content': _evaluate(fields['content'], names)})
+                return messages
+    raise ValueError("舊版源碼中找不到 messages 列表")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--budget', type=int, default=900, help='每次請求的提示 token 上限')
+    parser.add_argument('--baseline', help='重構前的 git 版本（默認自動查找）')
+    args = parser.parse_args()
+
+    builders = {'訂單解析': PromptBuilder(), 'Vercel 解析+加購': PromptBuilder(include_upselling=True)}
+    legacy_sources: Dict[str, Optional[str]] = {}
+    try:
+        baseline = args.baseline or default_baseline()
+        for label, path in LEGACY_SOURCES:
+            legacy_sources[label] = _git('show', f'{baseline}:{path}')
+        print(f"重構前版本: {_git('rev-parse', '--short', baseline).strip()}")
+    except (OSError, subprocess.CalledProcessError, RuntimeError) as e:
+        print(f"無法從 git 取得重構前的提示詞，只報告當前版本: {e}")
+
+    over_budget = False
+    for label, builder in builders.items():
+        print(f"[{label}] 固定系統前綴: {builder.system_tokens} token, {len(builder.system_prompt.encode('utf-8'))} bytes")
+        legacy = legacy_sources.get(label)
+        for text in SAMPLE_TRANSCRIPTIONS:
+            tokens = builder.count_prompt_tokens(builder.build_messages(text))
+            over_budget = over_budget or tokens > args.budget
+            if legacy is not None:
+                before = builder.count_prompt_tokens(legacy_messages(legacy, text))
+                print(f"  {before:5d} → {tokens:5d} token  {text}")
+            else:
+                print(f"  {tokens:5d} token  {text}")
+
+    print(f"預算 {args.budget} token/請求")
+    if over_budget:
+        print("超出 token 預算")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+REST 語音識別基準測試 - 比較舊版每次請求新建連接、共用長連接客戶端及異步批量識別
+
+在本地啟動模擬的 Azure Speech REST 服務：每個新連接延遲 --handshake-ms（模擬 TCP+TLS 握手），
+每個請求延遲 --latency-ms（模擬識別耗時）；同時檢查三種方式的結果一致。
+用法: python benchmarks/bench_speech_rest.py [--requests 20] [--handshake-ms 60] [--latency-ms 30]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from services.speech_rest_client import RECOGNITION_PATH, SpeechRestClient
+from tests.test_speech_rest_client import StubSpeechHandler, start_stub_server
+
+
+def legacy_transcribe(base_url: str, audio_data: bytes) -> dict:
+    """舊版：每次請求新建連接（與 requests.post 相同）"""
+    response = httpx.post(
+        f"{base_url}{RECOGNITION_PATH}",
+        headers={'Ocp-Apim-Subscription-Key': 'key', 'Content-Type': 'audio/wav', 'Accept': 'application/json'},
+        params={'language': 'zh-HK', 'format': 'detailed'},
+        content=audio_data,
+        timeout=30
+    )
+    result = response.json()
+    return {
+        'success': True,
+        'text': result.get('DisplayText', ''),
+        'confidence': result.get('NBest', [{}])[0].get('Confidence', 0),
+        'language': 'zh-HK'
+    }
+
+
+def run(label: str, func, clips):
+    StubSpeechHandler.connections = 0
+    started = time.perf_counter()
+    results = func(clips)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"{label:<14}{elapsed:>10.1f} ms{elapsed / len(clips):>10.1f} ms/次{StubSpeechHandler.connections:>8} 連接")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=20, help='請求數')
+    parser.add_argument('--handshake-ms', type=float, default=60.0, help='模擬的新連接握手延遲（毫秒）')
+    parser.add_argument('--latency-ms', type=float, default=30.0, help='模擬的識別耗時（毫秒）')
+    args = parser.parse_args()
+
+    StubSpeechHandler.handshake_s = args.handshake_ms / 1000
+    StubSpeechHandler.latency_s = args.latency_ms / 1000
+    server, base_url = start_stub_server()
+
+    clips = [os.urandom(16000 + index) for index in range(args.requests)]
+    client = SpeechRestClient('key', 'local', base_url=base_url)
+
+    print(f"{'方式':<14}{'總耗時':>13}{'平均':>14}{'':>10}")
+    legacy = run('舊版新建連接', lambda items: [legacy_transcribe(base_url, clip) for clip in items], clips)
+    shared = run('共用連接', lambda items: [client.transcribe(clip) for clip in items], clips)
+    batch = run('異步批量', client.transcribe_batch, clips)
+
+    assert legacy == shared == batch, "結果不一致"
+    print(f"結果一致: {len(clips)} 段音頻；客戶端統計: {client.stats()}")
+    client.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
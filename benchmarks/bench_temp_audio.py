@@ -0,0 +1,86 @@
+"""
+識別前音頻準備基準測試 - 比較舊版臨時文件 + sleep + 同步清理、tmpfs 文件 + 後台刪除及內存推送流
+
+只測量把音頻交給識別器之前及之後在請求線程上的固定開銷（不調用 Azure）。
+用法: python benchmarks/bench_temp_audio.py [--seconds 5] [--rounds 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.pcm import wav_header
+from utils.temp_audio import TempFileReaper, default_temp_dir, write_temp_audio
+
+
+def legacy_prepare(audio_data: bytes):
+    """舊版：NamedTemporaryFile 寫入、sleep(0.1)，識別後在請求線程刪除"""
+    temp_file = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
+    try:
+        temp_file.write(audio_data)
+        temp_file.flush()
+    finally:
+        temp_file.close()
+    time.sleep(0.1)
+    with open(temp_file.name, 'rb') as reader:  # 代替 SDK 讀取文件
+        reader.read()
+    os.unlink(temp_file.name)
+
+
+def tmpfs_prepare(audio_data: bytes, reaper: TempFileReaper):
+    """新版文件回退：寫入 tmpfs，無延遲，刪除交給後台線程"""
+    path = write_temp_audio(audio_data)
+    with open(path, 'rb') as reader:
+        reader.read()
+    reaper.discard(path)
+
+
+class _NullPushStream:
+    """代替 PushAudioInputStream：SDK 的 write 會複製數據"""
+
+    def write(self, data: bytes):
+        bytes(data)
+
+
+def stream_prepare(audio_data: bytes):
+    """新版連續識別：整段寫入內存推送流"""
+    _NullPushStream().write(audio_data)
+
+
+def measure(func, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - started) * 1000 / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seconds', type=float, default=5.0, help='音頻長度（秒）')
+    parser.add_argument('--rounds', type=int, default=20, help='每種方式的執行次數')
+    args = parser.parse_args()
+
+    pcm_size = int(args.seconds * 16000) * 2
+    audio_data = wav_header(pcm_size) + os.urandom(pcm_size)
+    reaper = TempFileReaper()
+
+    print(f"音頻: {len(audio_data)} bytes，臨時目錄: {default_temp_dir()}")
+    results = [
+        ('舊版臨時文件', measure(lambda: legacy_prepare(audio_data), args.rounds)),
+        ('tmpfs 文件', measure(lambda: tmpfs_prepare(audio_data, reaper), args.rounds)),
+        ('內存推送流', measure(lambda: stream_prepare(audio_data), args.rounds)),
+    ]
+    for name, elapsed in results:
+        print(f"{name:<10}{elapsed:>10.2f} ms/次")
+
+    deadline = time.monotonic() + 5
+    while reaper.stats()['pending'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    print(f"後台刪除: {reaper.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+"""
+追加銷售建議基準測試 - 比較舊版逐次構建與預編譯規則引擎
+
+用法: python benchmarks/bench_upselling.py
+"""
+import os
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.upselling_engine import UpsellingEngine
+
+
+def legacy_upselling(current_order, hour=None):
+    """舊版 `generate_upselling_sync`：每次重建建議字典並逐項掃描關鍵詞"""
+    suggestions = []
+    items = current_order.get('items', [])
+    total_amount = current_order.get('total', 0)
+
+    # 分析訂單內容
+    has_drinks = False
+    has_food = False
+    has_tea = False
+    has_coffee = False
+    has_cold_drinks = False
+    has_hot_drinks = False
+
+    for item in items:
+        item_name = item.get('name', '').lower()
+        customizations = item.get('customizations', {})
+
+        # 分類分析
+        if any(keyword in item_name for keyword in ['茶', '汁', '可樂', '咖啡', '奶茶']):
+            has_drinks = True
+
+            if '茶' in item_name:
+                has_tea = True
+            if '咖啡' in item_name or '鴛鴦' in item_name:
+                has_coffee = True
+
+            # 溫度分析
+            temp = customizations.get('溫度', '')
+            if temp == '凍' or '凍' in item_name:
+                has_cold_drinks = True
+            elif temp == '熱' or '熱' in item_name:
+                has_hot_drinks = True
+
+        if any(keyword in item_name for keyword in ['河', '麵', '飯', '多士', '三明治']):
+            has_food = True
+
+    # 基於飲品的建議
+    if has_tea:
+        suggestions.extend([
+            {
+                'item': '檸檬蜂蜜',
+                'message': '加檸檬蜂蜜，天然健康更好味！',
+                'price': 5.0,
+                'category': '加料'
+            },
+            {
+                'item': '薄荷葉',
+                'message': '加薄荷葉，清香怡人！',
+                'price': 3.0,
+                'category': '加料'
+            }
+        ])
+
+    if has_coffee:
+        suggestions.extend([
+            {
+                'item': '額外濃縮',
+                'message': '加一份濃縮，更香濃提神！',
+                'price': 8.0,
+                'category': '加料'
+            },
+            {
+                'item': '鮮奶',
+                'message': '轉用鮮奶，口感更順滑！',
+                'price': 5.0,
+                'category': '升級'
+            }
+        ])
+
+    # 基於溫度的建議
+    if has_cold_drinks:
+        suggestions.append({
+            'item': '加冰',
+            'message': '夏日特飲，加冰更爽！',
+            'price': 2.0,
+            'category': '加料'
+        })
+
+    # 配餐建議
+    if has_drinks and not has_food:
+        suggestions.extend([
+            {
+                'item': '牛油多士',
+                'message': '經典茶餐廳配搭，香脆可口！',
+                'price': 18.0,
+                'category': '配餐'
+            },
+            {
+                'item': '雞蛋三明治',
+                'message': '營養豐富，飽肚之選！',
+                'price': 25.0,
+                'category': '配餐'
+            },
+            {
+                'item': '薯條',
+                'message': '金黃香脆，老少咸宜！',
+                'price': 18.0,
+                'category': '小食'
+            }
+        ])
+
+    if has_food and not has_drinks:
+        suggestions.extend([
+            {
+                'item': '凍檸茶',
+                'message': '茶餐廳經典，解膩必備！',
+                'price': 18.0,
+                'category': '飲品'
+            },
+            {
+                'item': '例湯',
+                'message': '今日例湯，暖胃開胃！',
+                'price': 12.0,
+                'category': '湯品'
+            }
+        ])
+
+    # 基於消費金額的建議
+    if total_amount >= 50:
+        suggestions.append({
+            'item': '甜品',
+            'message': '滿$50送甜品優惠，布丁或雪糕任選！',
+            'price': 0.0,
+            'category': '優惠'
+        })
+    elif total_amount >= 30:
+        suggestions.append({
+            'item': '升級套餐',
+            'message': '加$8升級套餐，包飲品+例湯！',
+            'price': 8.0,
+            'category': '套餐'
+        })
+
+    # 時段特色建議
+    current_hour = datetime.now().hour if hour is None else hour
+
+    if 6 <= current_hour <= 11:  # 早餐時段
+        suggestions.extend([
+            {
+                'item': '煎蛋',
+                'message': '早餐必備，營養豐富！',
+                'price': 12.0,
+                'category': '早餐'
+            },
+            {
+                'item': '熱咖啡',
+                'message': '早晨提神，香濃醒腦！',
+                'price': 25.0,
+                'category': '飲品'
+            }
+        ])
+    elif 11 <= current_hour <= 14:  # 午餐時段
+        suggestions.extend([
+            {
+                'item': '今日特餐',
+                'message': '午餐特價，經濟實惠！',
+                'price': 35.0,
+                'category': '特餐'
+            }
+        ])
+    elif 14 <= current_hour <= 17:  # 下午茶時段
+        suggestions.extend([
+            {
+                'item': '下午茶套餐',
+                'message': '下午茶時光，多士+飲品！',
+                'price': 28.0,
+                'category': '套餐'
+            }
+        ])
+
+    # 健康選擇建議
+    suggestions.extend([
+        {
+            'item': '少糖選擇',
+            'message': '關注健康？可選擇少糖或無糖！',
+            'price': 0.0,
+            'category': '健康'
+        },
+        {
+            'item': '鮮榨果汁',
+            'message': '新鮮現榨，維他命豐富！',
+            'price': 28.0,
+            'category': '健康'
+        }
+    ])
+
+    # 去重並限制數量
+    seen = set()
+    unique_suggestions = []
+    for suggestion in suggestions:
+        key = suggestion['item']
+        if key not in seen:
+            seen.add(key)
+            unique_suggestions.append(suggestion)
+
+    # 按類別和價格排序，限制數量
+    unique_suggestions.sort(key=lambda x: (x['category'], x['price']))
+    final_suggestions = unique_suggestions[:4]  # 最多4個建議
+
+    return {
+        'suggestions': final_suggestions,
+        'total_suggestions': len(unique_suggestions),
+        'categories': list(set(s['category'] for s in final_suggestions))
+    }
+
+
+def _order(*items, total=None):
+    """構建測試訂單"""
+    order_items = [
+        {'name': name, 'quantity': 1, 'unit_price': price, 'customizations': customizations}
+        for name, price, customizations in items
+    ]
+    return {'items': order_items, 'total': total if total is not None else sum(p for _, p, _ in items)}
+
+
+SAMPLE_ORDERS = [
+    _order(('凍檸茶', 18.0, {'甜度': '少甜'})),
+    _order(('奶茶', 18.0, {'溫度': '熱'})),
+    _order(('咖啡', 18.0, {}), ('牛油多士', 18.0, {})),
+    _order(('乾炒牛河', 38.0, {})),
+    _order(('鴛鴦', 18.0, {'溫度': '凍'}), ('炒飯', 35.0, {})),
+    _order(('熱檸茶', 18.0, {}), ('三明治', 25.0, {}), ('雲吞麵', 32.0, {})),
+    _order(('可樂', 8.0, {})),
+    _order(),
+]
+
+
+def _comparable(result):
+    """舊版 categories 來自 set，順序不固定，比較時忽略順序"""
+    return result['suggestions'], result['total_suggestions'], sorted(result['categories'])
+
+
+def main():
+    engine = UpsellingEngine()
+    mismatches = [
+        (index, hour)
+        for index, order in enumerate(SAMPLE_ORDERS)
+        for hour in range(24)
+        if _comparable(engine.suggest(order, hour)) != _comparable(legacy_upselling(order, hour))
+    ]
+    print(f"一致性檢查: {len(SAMPLE_ORDERS) * 24} 個訂單/時段組合, 不一致 {len(mismatches)} 個 {mismatches}")
+
+    rounds = 2000
+    for label, func in (('舊版逐次構建', legacy_upselling), ('預編譯規則引擎', engine.suggest)):
+        elapsed = timeit.timeit(lambda: [func(order) for order in SAMPLE_ORDERS], number=rounds)
+        per_second = rounds * len(SAMPLE_ORDERS) / elapsed
+        print(f"{label}: {per_second:,.0f} 次建議/秒")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+訂單服務並發壓力測試 - 多線程同時創建、更新及查詢訂單，檢查不變量並統計吞吐量
+
+對照組為未加鎖的舊版服務（就地修改訂單、遍歷字典篩選），用於顯示並發下的錯誤。
+並發操作及不變量檢查與 tests/test_order_service.py 共用。
+用法: python benchmarks/stress_order_service.py [--threads 16] [--ops 20000] [--db]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+from collections import Counter
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.order import Order, OrderItem
+from services.order_repository import SQLiteOrderRepository
+from services.order_service import ACTIVE_STATUSES, OrderService
+from tests.test_order_service import check_invariants, check_store, hammer
+
+class LegacyOrderService:
+    """舊版服務：沒有任何同步"""
+
+    def __init__(self):
+        self.orders = {}
+
+    def create_order(self, order_data):
+        order = Order(items=[OrderItem(name=item['name'], quantity=item['quantity'], unit_price=item['unit_price'])
+                             for item in order_data['items']])
+        self.orders[order.id] = order
+        return order
+
+    def update_order_status(self, order_id, status):
+        order = self.orders.get(order_id)
+        if order:
+            order.status = status
+            order.updated_at = datetime.now()
+            return True
+        return False
+
+    def get_orders_by_status(self, status):
+        return [order for order in self.orders.values() if order.status == status]
+
+    def get_active_orders(self):
+        return [order for order in self.orders.values() if order.status in ACTIVE_STATUSES]
+
+
+def report(label: str, elapsed: float, ops: int, errors: Counter):
+    print(f"{label}: {ops / elapsed:,.0f} 次操作/秒")
+    for message, count in errors.most_common(5):
+        print(f"  {count:>6} × {message}")
+    if not errors:
+        print("  不變量全部成立")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=16, help='並發線程數')
+    parser.add_argument('--ops', type=int, default=20000, help='總操作數')
+    parser.add_argument('--seed', type=int, default=1, help='隨機種子')
+    parser.add_argument('--db', action='store_true', help='同時寫入 SQLite 存儲並檢查持久化結果')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    # 縮短線程切換間隔，讓交錯更頻繁
+    sys.setswitchinterval(1e-4)
+
+    elapsed, errors, _ = hammer(LegacyOrderService(), args.threads, args.ops, args.seed)
+    report('舊版（無同步）', elapsed, args.ops, errors)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'orders.db')
+        repository = SQLiteOrderRepository(path) if args.db else None
+        service = OrderService(repository)
+        elapsed, errors, created = hammer(service, args.threads, args.ops, args.seed)
+        errors += check_invariants(service, created)
+        if repository is not None:
+            errors += check_store(service, path, created)
+            service.close()
+            repository.close()
+        report('分段鎖服務' + ('（SQLite）' if args.db else ''), elapsed, args.ops, errors)
+        if errors:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -17,17 +17,62 @@ class Config:
     # Azure Speech Services 配置
     AZURE_SPEECH_KEY = os.getenv('AZURE_SPEECH_KEY')
     AZURE_SPEECH_REGION = os.getenv('AZURE_SPEECH_REGION')
+    # 預熱識別器池（0 表示不預熱）
+    SPEECH_POOL_SIZE = int(os.getenv('SPEECH_POOL_SIZE', '2'))
+    SPEECH_POOL_MAX_IDLE = float(os.getenv('SPEECH_POOL_MAX_IDLE', '60'))  # 秒
+    SPEECH_POOL_ACQUIRE_TIMEOUT = float(os.getenv('SPEECH_POOL_ACQUIRE_TIMEOUT', '0.2'))  # 秒
+    # WebSocket 串流識別：斷句靜音長度及停止錄音後等待最終結果的上限
+    SPEECH_STREAM_SEGMENTATION_SILENCE_MS = int(os.getenv('SPEECH_STREAM_SEGMENTATION_SILENCE_MS', '500'))
+    SPEECH_STREAM_FINAL_TIMEOUT = float(os.getenv('SPEECH_STREAM_FINAL_TIMEOUT', '5'))  # 秒
+    # 文件識別回退路徑的臨時目錄，留空則優先使用 /dev/shm
+    SPEECH_TEMP_DIR = os.getenv('SPEECH_TEMP_DIR', '')
+    # 對沖識別：單次識別超過此時間（約 p95 耗時）未返回則並行啟動連續識別；整個請求的總時限
+    SPEECH_HEDGE_DELAY = float(os.getenv('SPEECH_HEDGE_DELAY', '2.5'))  # 秒
+    SPEECH_REQUEST_DEADLINE = float(os.getenv('SPEECH_REQUEST_DEADLINE', '20'))  # 秒
+    SPEECH_RETRY_BACKOFF_BASE = float(os.getenv('SPEECH_RETRY_BACKOFF_BASE', '0.2'))  # 秒
+    SPEECH_RETRY_BACKOFF_CAP = float(os.getenv('SPEECH_RETRY_BACKOFF_CAP', '2'))  # 秒
+    # 執行識別策略的線程數（所有請求共用；用滿時不再對沖，避免重複的識別排隊）
+    SPEECH_STRATEGY_WORKERS = int(os.getenv('SPEECH_STRATEGY_WORKERS', '8'))
+    # 語音活動檢測：識別前裁剪首尾靜音，沒有語音的上傳不調用 Azure
+    SPEECH_VAD_ENABLED = os.getenv('SPEECH_VAD_ENABLED', 'True').lower() == 'true'
+    SPEECH_VAD_PADDING_MS = int(os.getenv('SPEECH_VAD_PADDING_MS', '200'))
+    # Socket.IO 異步模式（SDK 回調在原生線程中觸發，默認使用 threading）
+    SOCKETIO_ASYNC_MODE = os.getenv('SOCKETIO_ASYNC_MODE', 'threading')
     
     # OpenRouter API 配置
     OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY')
     OPENROUTER_MODEL = os.getenv('OPENROUTER_MODEL', 'x-ai/grok-4-fast:free')
+    OPENROUTER_MAX_CONCURRENCY = int(os.getenv('OPENROUTER_MAX_CONCURRENCY', '100'))  # 異步路徑並發上限
+    
+    # 訂單解析緩存配置
+    PARSE_CACHE_SIZE = int(os.getenv('PARSE_CACHE_SIZE', '1000'))
+    PARSE_CACHE_TTL = int(os.getenv('PARSE_CACHE_TTL', '3600'))  # 1小時
+    # 跨 worker 共享緩存（SQLite WAL 文件），留空則不啟用
+    PARSE_CACHE_SHARED_PATH = os.getenv('PARSE_CACHE_SHARED_PATH', '')
+    PARSE_CACHE_SHARED_SIZE = int(os.getenv('PARSE_CACHE_SHARED_SIZE', '10000'))
+    # 本地掃描覆蓋率達到此值時直接使用本地解析（設為大於 1 則總是調用 LLM）
+    PARSE_LOCAL_THRESHOLD = float(os.getenv('PARSE_LOCAL_THRESHOLD', '0.9'))
+    
+    # 追加銷售規則文件（JSON，修改後自動重新載入），留空使用 data/upselling_rules.json
+    UPSELLING_RULES_PATH = os.getenv('UPSELLING_RULES_PATH', '')
     
     # 網站信息
     SITE_URL = os.getenv('SITE_URL', 'http://localhost:5000')
     SITE_NAME = os.getenv('SITE_NAME', '零差錯 AI 語音點餐系統')
     
-    # 數據庫配置
+    # 數據庫配置（sqlite:///相對路徑 或 sqlite:////絕對路徑；留空則訂單只保存在內存）
     DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///voice_ordering.db')
+    # 訂單後台分組提交：每個事務最多寫入的訂單數；synchronous 為 FULL 時每次提交都同步磁盤
+    ORDER_WRITE_BATCH_SIZE = int(os.getenv('ORDER_WRITE_BATCH_SIZE', '256'))
+    ORDER_DB_SYNCHRONOUS = os.getenv('ORDER_DB_SYNCHRONOUS', 'NORMAL')
+    # 讀取其他 worker 提交的訂單修改的間隔（0 表示不讀取，只有一個 worker 時可關閉）
+    ORDER_SYNC_INTERVAL = float(os.getenv('ORDER_SYNC_INTERVAL', '1'))  # 秒
+    # 訂單變更推送：保留的變更記錄數、無變更時的心跳間隔
+    ORDER_EVENT_LOG_SIZE = int(os.getenv('ORDER_EVENT_LOG_SIZE', '10000'))
+    ORDER_STREAM_HEARTBEAT = float(os.getenv('ORDER_STREAM_HEARTBEAT', '15'))  # 秒
+    # 每個推送連接佔用一個 worker 線程：到時由服務端結束，瀏覽器隔 ORDER_STREAM_RETRY 秒後重連（0 表示不限時）
+    ORDER_STREAM_MAX_SECONDS = float(os.getenv('ORDER_STREAM_MAX_SECONDS', '300'))  # 秒
+    ORDER_STREAM_RETRY = float(os.getenv('ORDER_STREAM_RETRY', '1'))  # 秒
     
     # 日誌配置
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -69,12 +114,17 @@ class ProductionConfig(Config):
     """生產環境配置"""
     DEBUG = False
     LOG_LEVEL = 'WARNING'
+    # 不使用相對於工作目錄的默認路徑：需明確指定持久磁盤上的文件（見 DEPLOYMENT_GUIDE.md），
+    # 未設定或無法寫入（例如 Vercel 的只讀文件系統）時訂單只保存在內存
+    DATABASE_URL = os.getenv('DATABASE_URL', '')
 
 class TestingConfig(Config):
     """測試環境配置"""
     TESTING = True
     DEBUG = True
     DATABASE_URL = 'sqlite:///:memory:'
+    PARSE_CACHE_SHARED_PATH = ''
+    SPEECH_POOL_SIZE = 0
 
 # 配置字典
 config = {
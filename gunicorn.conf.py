@@ -0,0 +1,23 @@
+"""
+gunicorn 配置 - Docker、Railway、Render 的生產服務器（gunicorn wsgi:app）
+
+語音服務依賴 Azure SDK 在原生線程中的回調及後台線程，因此使用線程 worker
+（Flask-SocketIO threading 模式 + simple-websocket），不使用 gevent 猴子補丁。
+"""
+import os
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5000')}"
+
+# Socket.IO 沒有配置消息隊列及粘性會話，只能使用一個進程；併發由線程數決定
+# （每個 WebSocket 及訂單推送連接各佔一個線程，推送連接會定期斷開重連）
+workers = 1
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '100'))
+
+# 線程 worker 的心跳不受長連接影響，超時只用於檢測卡死的進程
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = 30
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
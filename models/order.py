@@ -16,6 +16,11 @@ class OrderStatus(Enum):
     DELIVERED = "delivered"      # 已送達
     CANCELLED = "cancelled"      # 已取消
 
+class OrderEventType(Enum):
+    """訂單變更類型"""
+    CREATED = "created"                  # 新訂單
+    STATUS_CHANGED = "status_changed"    # 狀態更新
+
 @dataclass
 class OrderItem:
     """訂單項目模型"""
@@ -71,4 +76,43 @@ class Order:
             'updated_at': self.updated_at.isoformat(),
             'transcription': self.transcription,
             'confidence_score': self.confidence_score
-        }
\ No newline at end of file
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Order':
+        """從 to_dict 的輸出還原訂單"""
+        return cls(
+            id=data['id'],
+            customer_id=data.get('customer_id'),
+            items=[
+                OrderItem(
+                    id=item['id'],
+                    name=item.get('name', ''),
+                    quantity=item.get('quantity', 1),
+                    unit_price=item.get('unit_price', 0.0),
+                    customizations=item.get('customizations', {})
+                )
+                for item in data.get('items', [])
+            ],
+            status=OrderStatus(data['status']),
+            special_requests=data.get('special_requests', []),
+            created_at=datetime.fromisoformat(data['created_at']),
+            updated_at=datetime.fromisoformat(data['updated_at']),
+            transcription=data.get('transcription', ''),
+            confidence_score=data.get('confidence_score', 0.0)
+        )
+
+@dataclass(frozen=True)
+class OrderEvent:
+    """訂單變更記錄（order 為變更後的訂單快照）"""
+    version: int
+    type: OrderEventType
+    order: Order
+    
+    def to_dict(self) -> dict:
+        """轉換為字典格式"""
+        return {
+            'version': self.version,
+            'type': self.type.value,
+            'order': self.order.to_dict()
+        }
@@ -2,6 +2,7 @@
 主要路由 - 靜態頁面和基礎功能
 """
 from flask import Blueprint, render_template, send_from_directory, current_app
+from routes import order_routes
 import os
 
 main_bp = Blueprint('main', __name__)
@@ -44,12 +45,19 @@ def static_files(filename):
 
 @main_bp.route('/health')
 def health_check():
-    """健康檢查端點"""
-    return {
+    """健康檢查端點（訂單存儲無法寫入時返回 503）"""
+    health = {
         'status': 'healthy',
         'service': '零差錯 AI 語音點餐系統',
         'version': '1.0.0'
     }
+    service = order_routes.order_service
+    if service is not None and service.repository is not None:
+        health['order_store'] = service.repository.stats()
+        if health['order_store']['failed']:
+            health['status'] = 'degraded'
+            return health, 503
+    return health
 
 @main_bp.route('/debug/static')
 def debug_static():
@@ -1,18 +1,81 @@
 """
 訂單處理相關路由 - 最終修復版本
 """
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from services.order_service import OrderService
+from services.order_repository import OrderStoreError, SQLiteOrderRepository, sqlite_path_from_url
 from services.openrouter_service import OpenRouterService
-from models.order import OrderStatus
+from models.order import Order, OrderStatus
+from utils.cache import LRUCache
+import json
 import logging
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
 
 order_bp = Blueprint('order', __name__)
 logger = logging.getLogger(__name__)
 
-# 全局服務實例
-order_service = OrderService()
+# 全局服務實例（訂單服務在 create_app 啟動時創建）
+order_service = None
 openrouter_service = None
+_order_service_lock = threading.Lock()
+
+# 已序列化的響應：活躍訂單列表為 (ETag, JSON)，下一次修改後 ETag 改變即失效；
+# 訂單詳情按 ETag（含 updated_at）緩存，訂單狀態更新後舊條目不再命中
+_active_payload: Optional[Tuple[str, str]] = None
+_order_payloads = LRUCache(max_size=1000, ttl=None)
+
+def init_order_service(config) -> OrderService:
+    """
+    按應用配置創建訂單服務（只創建一次；DATABASE_URL 為 SQLite 文件時持久化訂單）
+    
+    數據庫無法打開或寫入時（例如只讀文件系統）記錄錯誤並改為只保存在內存，
+    應用仍可啟動。
+    
+    Args:
+        config: Flask 應用配置
+        
+    Returns:
+        OrderService: 訂單服務實例
+    """
+    global order_service
+    with _order_service_lock:
+        if order_service is None:
+            repository = None
+            path = sqlite_path_from_url(config.get('DATABASE_URL'))
+            if path:
+                try:
+                    repository = SQLiteOrderRepository(
+                        path,
+                        batch_size=config.get('ORDER_WRITE_BATCH_SIZE', 256),
+                        synchronous=config.get('ORDER_DB_SYNCHRONOUS', 'NORMAL')
+                    )
+                except (sqlite3.Error, OSError) as e:
+                    logger.error(f"無法打開訂單數據庫 {path}，訂單只保存在內存（重啟後丟失）: {e}")
+            elif not config.get('DATABASE_URL'):
+                logger.warning("未設定 DATABASE_URL，訂單只保存在內存（重啟後丟失，多個 worker 之間不共享）")
+            order_service = OrderService(
+                repository=repository,
+                event_log_size=config.get('ORDER_EVENT_LOG_SIZE', 10000),
+                sync_interval=config.get('ORDER_SYNC_INTERVAL', 1.0)
+            )
+    return order_service
+
+def get_order_service():
+    """獲取訂單服務實例（啟動時未創建的，按當前應用配置創建）"""
+    if order_service is None:
+        return init_order_service(current_app.config)
+    return order_service
+
+def _store_unavailable(e: OrderStoreError):
+    """存儲無法寫入時的響應（503，客戶端可稍後重試）"""
+    logger.error(f"訂單存儲不可用: {e}")
+    return jsonify({
+        'success': False,
+        'error': '訂單暫時無法保存，請稍後重試'
+    }), 503
 
 def get_openrouter_service():
     """獲取 OpenRouter 服務實例"""
@@ -27,7 +90,14 @@ def get_openrouter_service():
             api_key=api_key,
             model=model,
             site_url=site_url,
-            site_name=site_name
+            site_name=site_name,
+            cache_size=current_app.config.get('PARSE_CACHE_SIZE', 1000),
+            cache_ttl=current_app.config.get('PARSE_CACHE_TTL', 3600),
+            shared_cache_path=current_app.config.get('PARSE_CACHE_SHARED_PATH') or None,
+            shared_cache_size=current_app.config.get('PARSE_CACHE_SHARED_SIZE', 10000),
+            max_concurrency=current_app.config.get('OPENROUTER_MAX_CONCURRENCY', 100),
+            local_confidence_threshold=current_app.config.get('PARSE_LOCAL_THRESHOLD', 0.9),
+            upselling_rules_path=current_app.config.get('UPSELLING_RULES_PATH') or None
         )
     return openrouter_service
 
@@ -61,6 +131,89 @@ def parse_order():
             'error': '訂單解析失敗'
         }), 500
 
+@order_bp.route('/parse/async', methods=['POST'])
+async def parse_order_async():
+    """
+    訂單解析端點 - 異步版本（需要 Flask[async] 或 ASGI 服務器）
+    """
+    try:
+        data = request.get_json()
+        if not data or 'transcription' not in data:
+            return jsonify({
+                'success': False,
+                'error': '缺少轉錄文字'
+            }), 400
+        
+        transcription = data['transcription']
+        logger.info(f"收到異步訂單解析請求: {transcription}")
+        
+        openrouter = get_openrouter_service()
+        order_result = await openrouter.parse_order(transcription)
+        
+        return jsonify(order_result)
+        
+    except Exception as e:
+        logger.error(f"異步訂單解析錯誤: {e}")
+        return jsonify({
+            'success': False,
+            'error': '訂單解析失敗'
+        }), 500
+
+def _format_sse(event: str, data, event_id: Optional[str] = None) -> str:
+    """格式化 Server-Sent Events 消息"""
+    message = f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+    return f"id: {event_id}\n{message}" if event_id else message
+
+@order_bp.route('/parse/stream', methods=['GET', 'POST'])
+def parse_order_stream():
+    """
+    訂單解析端點 - 串流版本（Server-Sent Events）
+    
+    每個訂單項目解析完成即推送 `item` 事件，最後推送 `result` 事件（完整結果）。
+    GET 請求以 ?transcription= 傳入文字，方便 EventSource 使用。
+    """
+    if request.method == 'GET':
+        transcription = request.args.get('transcription')
+    else:
+        data = request.get_json(silent=True) or {}
+        transcription = data.get('transcription')
+    
+    if not transcription:
+        return jsonify({
+            'success': False,
+            'error': '缺少轉錄文字'
+        }), 400
+    
+    logger.info(f"收到串流訂單解析請求: {transcription}")
+    openrouter = get_openrouter_service()
+    
+    def generate():
+        try:
+            for event, payload in openrouter.parse_order_stream(transcription):
+                yield _format_sse(event, payload)
+        except Exception as e:
+            logger.error(f"串流訂單解析錯誤: {e}")
+            yield _format_sse('error', {'success': False, 'error': '訂單解析失敗'})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@order_bp.route('/parse/stats', methods=['GET'])
+def parse_stats():
+    """獲取訂單解析統計（緩存、token 用量、路由分佈、加購規則及請求合併）"""
+    openrouter = get_openrouter_service()
+    return jsonify({
+        'success': True,
+        'cache': openrouter.get_cache_stats(),
+        'tokens': openrouter.token_usage.stats(),
+        'routing': openrouter.router.stats(),
+        'upselling': openrouter.upselling.stats(),
+        'coalescing': openrouter.get_coalesce_stats()
+    })
+
 def parse_order_locally(transcription):
     """本地訂單解析"""
     try:
@@ -159,13 +312,15 @@ def create_order():
                 'error': '缺少訂單數據'
             }), 400
         
-        order = order_service.create_order(data)
+        order = get_order_service().create_order(data)
         
         return jsonify({
             'success': True,
             'order': order.to_dict()
         })
         
+    except OrderStoreError as e:
+        return _store_unavailable(e)
     except Exception as e:
         logger.error(f"創建訂單錯誤: {e}")
         return jsonify({
@@ -173,21 +328,52 @@ def create_order():
             'error': '創建訂單失敗'
         }), 500
 
+def _active_etag(service: OrderService, version: int) -> str:
+    """活躍訂單列表的 ETag（服務進程及修改版本號）"""
+    return f"active-{service.epoch}-{version}"
+
+def _order_etag(order: Order) -> str:
+    """訂單詳情的 ETag（訂單每次修改都會更新 updated_at，重啟後仍然有效）"""
+    return f"{order.id}-{order.updated_at.strftime('%Y%m%d%H%M%S%f')}"
+
+def _cached_json(body: str, etag: str) -> Response:
+    """
+    返回已序列化的 JSON 或 304
+    
+    客戶端的 If-None-Match 與 ETag 相同時返回 304，不發送內容；響應要求
+    客戶端每次重新驗證，保證看到最新訂單。
+    """
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @order_bp.route('/<order_id>', methods=['GET'])
 def get_order(order_id):
-    """獲取訂單詳情"""
+    """獲取訂單詳情（支持 ETag 條件請求）"""
     try:
-        order = order_service.get_order(order_id)
+        order = get_order_service().get_order(order_id)
         if not order:
             return jsonify({
                 'success': False,
                 'error': '訂單不存在'
             }), 404
         
-        return jsonify({
-            'success': True,
-            'order': order.to_dict()
-        })
+        etag = _order_etag(order)
+        if request.if_none_match.contains(etag):
+            return _cached_json('', etag)
+        
+        body = _order_payloads.get(etag)
+        if body is None:
+            body = current_app.json.dumps({
+                'success': True,
+                'order': order.to_dict()
+            })
+            _order_payloads.set(etag, body)
+        return _cached_json(body, etag)
         
     except Exception as e:
         logger.error(f"獲取訂單錯誤: {e}")
@@ -215,7 +401,7 @@ def update_order_status(order_id):
                 'error': '無效的訂單狀態'
             }), 400
         
-        success = order_service.update_order_status(order_id, status)
+        success = get_order_service().update_order_status(order_id, status)
         
         if success:
             return jsonify({
@@ -228,6 +414,8 @@ def update_order_status(order_id):
                 'error': '訂單不存在'
             }), 404
             
+    except OrderStoreError as e:
+        return _store_unavailable(e)
     except Exception as e:
         logger.error(f"更新訂單狀態錯誤: {e}")
         return jsonify({
@@ -237,18 +425,147 @@ def update_order_status(order_id):
 
 @order_bp.route('/active', methods=['GET'])
 def get_active_orders():
-    """獲取活躍訂單列表"""
+    """
+    獲取活躍訂單列表（支持 ETag 條件請求）
+    
+    ETag 由修改版本號生成：沒有修改時直接返回 304 或緩存的 JSON，不讀取訂單。
+    """
+    global _active_payload
     try:
-        orders = order_service.get_active_orders()
+        service = get_order_service()
+        etag = _active_etag(service, service.version)
+        if request.if_none_match.contains(etag):
+            return _cached_json('', etag)
         
+        cached = _active_payload
+        if cached is None or cached[0] != etag:
+            # 以快照的版本號生成 ETag，讀取期間發生的修改不會被錯誤地緩存
+            version, orders = service.get_active_snapshot()
+            cached = (_active_etag(service, version), current_app.json.dumps({
+                'success': True,
+                'orders': [order.to_dict() for order in orders]
+            }))
+            _active_payload = cached
+        return _cached_json(cached[1], cached[0])
+        
+    except Exception as e:
+        logger.error(f"獲取活躍訂單錯誤: {e}")
         return jsonify({
+            'success': False,
+            'error': '獲取訂單列表失敗'
+        }), 500
+
+def _parse_cursor(value: Optional[str]) -> Tuple[Optional[str], Optional[int]]:
+    """
+    解析客戶端游標
+    
+    Args:
+        value: "<epoch>:<version>" 或 "<version>"
+        
+    Returns:
+        Tuple[Optional[str], Optional[int]]: (epoch, 版本號)；無效時版本號為 None
+    """
+    if not value:
+        return None, None
+    epoch, _, version = value.rpartition(':')
+    try:
+        return epoch or None, int(version)
+    except ValueError:
+        return None, None
+
+def _changes_since(service: OrderService, epoch: Optional[str], since: Optional[int]) -> dict:
+    """變更查詢結果：游標有效時只返回之後的變更，否則返回全部活躍訂單"""
+    events = None
+    if since is not None and epoch in (None, service.epoch):
+        version, events = service.get_changes_since(since)
+    if events is None:
+        version, orders = service.get_active_snapshot()
+        return {
             'success': True,
+            'epoch': service.epoch,
+            'version': version,
+            'reset': True,
             'orders': [order.to_dict() for order in orders]
-        })
+        }
+    return {
+        'success': True,
+        'epoch': service.epoch,
+        'version': version,
+        'reset': False,
+        'events': [event.to_dict() for event in events]
+    }
+
+@order_bp.route('/changes', methods=['GET'])
+def get_order_changes():
+    """
+    獲取訂單變更（輪詢用）
+    
+    ?since=<version>&epoch=<epoch> 只返回該版本之後的創建及狀態變更；沒有游標、
+    服務已重啟（epoch 不同）或落後太多時 reset 為 true 並返回全部活躍訂單。
+    """
+    try:
+        service = get_order_service()
+        epoch, since = _parse_cursor(request.args.get('since'))
+        return jsonify(_changes_since(service, request.args.get('epoch') or epoch, since))
         
     except Exception as e:
-        logger.error(f"獲取活躍訂單錯誤: {e}")
+        logger.error(f"獲取訂單變更錯誤: {e}")
         return jsonify({
             'success': False,
-            'error': '獲取訂單列表失敗'
+            'error': '獲取訂單變更失敗'
         }), 500
+
+@order_bp.route('/stream', methods=['GET'])
+def stream_order_changes():
+    """
+    訂單變更推送（Server-Sent Events）
+    
+    先推送 `snapshot` 事件（全部活躍訂單），之後每次創建或狀態更新推送 `change`
+    事件。事件 ID 為 "<epoch>:<version>"，EventSource 斷線重連時通過 Last-Event-ID
+    只補發缺少的變更。
+    
+    每個連接佔用一個 worker 線程，因此連接在 ORDER_STREAM_MAX_SECONDS 秒後由
+    服務端結束，瀏覽器按 `retry` 指定的間隔重連並從上次的事件繼續，不會長期
+    佔滿同步 worker。
+    """
+    service = get_order_service()
+    epoch, since = _parse_cursor(request.headers.get('Last-Event-ID') or request.args.get('since'))
+    heartbeat = current_app.config.get('ORDER_STREAM_HEARTBEAT', 15)
+    max_seconds = current_app.config.get('ORDER_STREAM_MAX_SECONDS', 300)
+    retry_ms = int(current_app.config.get('ORDER_STREAM_RETRY', 1) * 1000)
+    
+    def generate():
+        deadline = time.monotonic() + max_seconds if max_seconds > 0 else None
+        try:
+            yield f"retry: {retry_ms}\n\n"
+            payload = _changes_since(service, epoch, since)
+            version = payload['version']
+            while True:
+                if payload['reset']:
+                    yield _format_sse('snapshot', payload, f"{service.epoch}:{version}")
+                else:
+                    for event in payload['events']:
+                        yield _format_sse('change', event, f"{service.epoch}:{event['version']}")
+                
+                # 沒有變更時定期發送註釋行，保持連接並及早發現客戶端斷開；到時結束連接
+                while True:
+                    timeout = heartbeat
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return
+                        timeout = min(heartbeat, remaining)
+                    if service.wait_for_changes(version, timeout):
+                        break
+                    yield ": keep-alive\n\n"
+                payload = _changes_since(service, service.epoch, version)
+                version = payload['version']
+        except Exception as e:
+            logger.error(f"訂單變更推送錯誤: {e}")
+            yield _format_sse('error', {'success': False, 'error': '訂單變更推送失敗'})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
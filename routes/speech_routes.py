@@ -4,27 +4,58 @@
 from flask import Blueprint, request, jsonify, current_app
 from services.speech_service import SpeechService
 import logging
+import threading
 import time
 
 speech_bp = Blueprint('speech', __name__)
 logger = logging.getLogger(__name__)
 
-# 全局語音服務實例
+# 全局語音服務實例（create_app 啟動時創建，識別器池在第一個請求前開始預熱）
 speech_service = None
+_speech_service_lock = threading.Lock()
 
-def get_speech_service():
-    """獲取語音服務實例"""
+def init_speech_service(config) -> SpeechService:
+    """
+    按應用配置創建語音服務（只創建一次）
+    
+    Args:
+        config: Flask 應用配置
+        
+    Returns:
+        SpeechService: 語音服務實例
+        
+    Raises:
+        ValueError: Azure Speech Services 配置不完整
+    """
     global speech_service
-    if speech_service is None:
-        azure_key = current_app.config.get('AZURE_SPEECH_KEY')
-        azure_region = current_app.config.get('AZURE_SPEECH_REGION')
+    with _speech_service_lock:
+        if speech_service is not None:
+            return speech_service
+        
+        azure_key = config.get('AZURE_SPEECH_KEY')
+        azure_region = config.get('AZURE_SPEECH_REGION')
         
         if not azure_key or not azure_region:
             logger.error("Azure Speech Services 配置不完整")
             raise ValueError("Azure Speech Services 配置不完整")
         
         try:
-            speech_service = SpeechService(azure_key, azure_region)
+            speech_service = SpeechService(
+                azure_key,
+                azure_region,
+                pool_size=config.get('SPEECH_POOL_SIZE', 2),
+                pool_max_idle=config.get('SPEECH_POOL_MAX_IDLE', 60.0),
+                pool_acquire_timeout=config.get('SPEECH_POOL_ACQUIRE_TIMEOUT', 0.2),
+                stream_segmentation_silence_ms=config.get('SPEECH_STREAM_SEGMENTATION_SILENCE_MS', 500),
+                temp_dir=config.get('SPEECH_TEMP_DIR') or None,
+                hedge_delay=config.get('SPEECH_HEDGE_DELAY', 2.5),
+                request_deadline=config.get('SPEECH_REQUEST_DEADLINE', 20.0),
+                retry_backoff_base=config.get('SPEECH_RETRY_BACKOFF_BASE', 0.2),
+                retry_backoff_cap=config.get('SPEECH_RETRY_BACKOFF_CAP', 2.0),
+                strategy_workers=config.get('SPEECH_STRATEGY_WORKERS', 8),
+                vad_enabled=config.get('SPEECH_VAD_ENABLED', True),
+                vad_padding_ms=config.get('SPEECH_VAD_PADDING_MS', 200)
+            )
             logger.info("語音服務初始化成功")
         except Exception as e:
             logger.error(f"語音服務初始化失敗: {e}")
@@ -32,6 +63,12 @@ def get_speech_service():
     
     return speech_service
 
+def get_speech_service():
+    """獲取語音服務實例（啟動時未能創建的，按當前應用配置創建）"""
+    if speech_service is None:
+        return init_speech_service(current_app.config)
+    return speech_service
+
 @speech_bp.route('/transcribe', methods=['POST'])
 def transcribe_audio():
     """
@@ -105,6 +142,22 @@ def transcribe_audio():
             'processing_time': round(processing_time, 2)
         }), 500
 
+@speech_bp.route('/stats', methods=['GET'])
+def speech_stats():
+    """獲取語音識別統計（各階段耗時）"""
+    try:
+        service = get_speech_service()
+        return jsonify({
+            'success': True,
+            **service.get_stats()
+        })
+    except Exception as e:
+        logger.error(f"獲取語音統計失敗: {e}")
+        return jsonify({
+            'success': False,
+            'error': f'獲取語音統計失敗: {str(e)}'
+        }), 500
+
 @speech_bp.route('/test', methods=['GET'])
 def test_speech_service():
     """測試語音服務配置"""
@@ -0,0 +1,102 @@
+"""
+串流語音識別 WebSocket 事件 - 客戶端邊錄音邊送入 PCM 幀
+"""
+import logging
+import threading
+from typing import Dict
+
+from flask import current_app, request
+from flask_socketio import emit
+
+from routes.speech_routes import get_speech_service
+from services.streaming_recognition import StreamingRecognition
+
+logger = logging.getLogger(__name__)
+
+SPEECH_NAMESPACE = '/speech'
+
+# 連接 sid → 識別會話
+_sessions: Dict[str, StreamingRecognition] = {}
+_sessions_lock = threading.Lock()
+
+
+def _pop_session(sid: str):
+    """取出並移除連接的識別會話"""
+    with _sessions_lock:
+        return _sessions.pop(sid, None)
+
+
+def register_speech_socket(socketio):
+    """
+    註冊串流識別事件
+
+    客戶端事件:
+        start {sample_rate}: 開始識別
+        audio <binary>: 16-bit 小端單聲道 PCM 幀
+        stop: 停止錄音，服務器返回 final 事件
+
+    服務器事件:
+        started, recognizing {text}, recognized {text}, final {success, transcription, confidence}, error {error}
+    """
+
+    @socketio.on('start', namespace=SPEECH_NAMESPACE)
+    def handle_start(data=None):
+        sid = request.sid
+        try:
+            sample_rate = int((data or {}).get('sample_rate', 16000))
+            service = get_speech_service()
+
+            def on_event(event, payload):
+                # SDK 回調在原生線程中觸發，需指定接收者
+                socketio.emit(event, payload, to=sid, namespace=SPEECH_NAMESPACE)
+
+            session = service.create_streaming_session(on_event, sample_rate)
+            previous = _pop_session(sid)
+            if previous is not None:
+                previous.close()
+            with _sessions_lock:
+                _sessions[sid] = session
+            session.start()
+
+            logger.info(f"串流識別開始: {sid} ({sample_rate}Hz)")
+            emit('started', {'sample_rate': sample_rate})
+        except Exception as e:
+            logger.error(f"串流識別啟動失敗: {e}")
+            emit('error', {'error': f'串流識別啟動失敗: {str(e)}'})
+
+    @socketio.on('audio', namespace=SPEECH_NAMESPACE)
+    def handle_audio(chunk):
+        with _sessions_lock:
+            session = _sessions.get(request.sid)
+        if session is None or not isinstance(chunk, (bytes, bytearray)):
+            return
+        try:
+            session.write(bytes(chunk))
+        except Exception as e:
+            logger.error(f"寫入串流音頻失敗: {e}")
+            emit('error', {'error': f'寫入音頻失敗: {str(e)}'})
+
+    @socketio.on('stop', namespace=SPEECH_NAMESPACE)
+    def handle_stop(data=None):
+        session = _pop_session(request.sid)
+        if session is None:
+            emit('final', {'success': False, 'error': '沒有進行中的識別'})
+            return
+        try:
+            timeout = current_app.config.get('SPEECH_STREAM_FINAL_TIMEOUT', 5.0)
+            success, text, confidence = get_speech_service().finish_streaming_session(session, timeout)
+
+            logger.info(f"串流識別完成: {request.sid} ({session.duration:.1f}s 音頻) - {text if success else '失敗'}")
+            if success:
+                emit('final', {'success': True, 'transcription': text, 'confidence': confidence})
+            else:
+                emit('final', {'success': False, 'error': text})
+        except Exception as e:
+            logger.error(f"串流識別結束失敗: {e}")
+            emit('final', {'success': False, 'error': f'識別失敗: {str(e)}'})
+
+    @socketio.on('disconnect', namespace=SPEECH_NAMESPACE)
+    def handle_disconnect():
+        session = _pop_session(request.sid)
+        if session is not None:
+            session.close()
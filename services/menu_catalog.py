@@ -0,0 +1,293 @@
+"""
+菜單目錄 - 價格表及關鍵詞索引（模塊載入時編譯一次）
+"""
+from types import MappingProxyType
+from typing import Dict, Iterable, Iterator, List, Mapping, Tuple
+
+# 完整的香港茶餐廳價格表（順序即模糊匹配優先級，與舊版 price_map 一致）
+PRICE_ITEMS: Tuple[Tuple[str, float], ...] = (
+    # 茶類飲品
+    ('檸檬茶', 18.0),
+    ('凍檸茶', 18.0),
+    ('熱檸茶', 18.0),
+    ('檸茶', 18.0),
+    ('奶茶', 22.0),
+    ('凍奶茶', 22.0),
+    ('熱奶茶', 22.0),
+    ('絲襪奶茶', 25.0),
+    ('港式奶茶', 25.0),
+    ('茶餐廳奶茶', 25.0),
+    ('紅茶', 15.0),
+    ('綠茶', 15.0),
+    ('烏龍茶', 18.0),
+    ('茉莉花茶', 16.0),
+    ('普洱茶', 20.0),
+
+    # 咖啡類
+    ('咖啡', 25.0),
+    ('黑咖啡', 22.0),
+    ('白咖啡', 28.0),
+    ('即溶咖啡', 20.0),
+    ('港式咖啡', 25.0),
+    ('鴛鴦', 28.0),  # 咖啡奶茶
+    ('凍鴛鴦', 28.0),
+    ('熱鴛鴦', 28.0),
+
+    # 果汁類
+    ('橙汁', 20.0),
+    ('蘋果汁', 18.0),
+    ('葡萄汁', 20.0),
+    ('檸檬汁', 18.0),
+    ('西瓜汁', 22.0),
+    ('芒果汁', 25.0),
+    ('鮮橙汁', 25.0),
+    ('鮮榨果汁', 28.0),
+
+    # 汽水類
+    ('可樂', 15.0),
+    ('雪碧', 15.0),
+    ('芬達', 15.0),
+    ('汽水', 15.0),
+    ('梳打水', 12.0),
+    ('檸檬梳打', 18.0),
+
+    # 特色飲品
+    ('檸檬蜜', 22.0),
+    ('檸檬蜂蜜', 22.0),
+    ('蜂蜜檸檬', 22.0),
+    ('薄荷茶', 20.0),
+    ('薑茶', 18.0),
+    ('檸檬薑茶', 22.0),
+    ('凍檸賓', 25.0),
+    ('熱檸賓', 25.0),
+
+    # 奶類飲品
+    ('朱古力', 25.0),
+    ('熱朱古力', 25.0),
+    ('凍朱古力', 25.0),
+    ('阿華田', 22.0),
+    ('好立克', 22.0),
+    ('牛奶', 18.0),
+    ('鮮奶', 20.0),
+    ('豆漿', 15.0),
+
+    # 湯類
+    ('例湯', 12.0),
+    ('餐湯', 12.0),
+    ('湯', 12.0),
+    ('羅宋湯', 18.0),
+    ('粟米湯', 15.0),
+    ('蛋花湯', 15.0),
+    ('紫菜蛋花湯', 18.0),
+
+    # 主食類
+    ('炒河', 35.0),
+    ('乾炒牛河', 38.0),
+    ('濕炒牛河', 38.0),
+    ('炒麵', 32.0),
+    ('撈麵', 30.0),
+    ('湯麵', 28.0),
+    ('雲吞麵', 35.0),
+    ('牛腩麵', 42.0),
+    ('叉燒麵', 38.0),
+    ('餐蛋麵', 25.0),
+    ('公仔麵', 22.0),
+
+    # 飯類
+    ('白飯', 8.0),
+    ('炒飯', 32.0),
+    ('揚州炒飯', 35.0),
+    ('叉燒炒飯', 38.0),
+    ('蝦仁炒飯', 42.0),
+    ('牛肉炒飯', 40.0),
+    ('雞絲炒飯', 35.0),
+    ('鹹牛肉炒飯', 38.0),
+
+    # 多士類
+    ('多士', 15.0),
+    ('牛油多士', 18.0),
+    ('花生醬多士', 20.0),
+    ('煉奶多士', 22.0),
+    ('法式多士', 25.0),
+    ('西多士', 28.0),
+    ('厚多士', 32.0),
+
+    # 三明治類
+    ('三明治', 25.0),
+    ('火腿三明治', 28.0),
+    ('雞蛋三明治', 25.0),
+    ('吞拿魚三明治', 30.0),
+    ('牛肉三明治', 35.0),
+    ('芝士三明治', 28.0),
+    ('總匯三明治', 38.0),
+
+    # 蛋類
+    ('煎蛋', 12.0),
+    ('炒蛋', 15.0),
+    ('蒸蛋', 18.0),
+    ('水波蛋', 15.0),
+    ('溏心蛋', 15.0),
+    ('茶葉蛋', 8.0),
+
+    # 小食類
+    ('薯條', 18.0),
+    ('雞翼', 25.0),
+    ('雞塊', 22.0),
+    ('春卷', 20.0),
+    ('燒賣', 15.0),
+    ('魚蛋', 12.0),
+    ('牛丸', 15.0),
+    ('腸粉', 18.0),
+
+    # 甜品類
+    ('布丁', 18.0),
+    ('雪糕', 15.0),
+    ('紅豆冰', 22.0),
+    ('芒果布丁', 25.0),
+    ('椰汁西米露', 20.0),
+    ('楊枝甘露', 28.0),
+)
+
+# 類別回退表：(關鍵詞, 價格)，按順序取第一個命中的類別
+CATEGORY_FALLBACK: Tuple[Tuple[Tuple[str, ...], float], ...] = (
+    (('茶', '奶茶'), 22.0),
+    (('咖啡', '鴛鴦'), 25.0),
+    (('汁', '果汁'), 20.0),
+    (('可樂', '汽水', '雪碧'), 15.0),
+    (('炒河', '炒麵', '麵'), 35.0),
+    (('炒飯', '飯'), 32.0),
+    (('多士', '三明治'), 25.0),
+    (('湯',), 15.0),
+)
+
+DEFAULT_PRICE = 20.0
+
+# 只讀價格表，供精確匹配使用
+MENU_PRICES: Mapping[str, float] = MappingProxyType(dict(PRICE_ITEMS))
+
+
+class KeywordAutomaton:
+    """Aho-Corasick 多模式匹配自動機，一次掃描找出文本中所有關鍵詞"""
+
+    __slots__ = ('_goto', '_fail', '_out', 'patterns')
+
+    def __init__(self, patterns: Iterable[str]):
+        """
+        構建自動機
+
+        Args:
+            patterns: 關鍵詞列表，匹配結果以其在列表中的索引表示
+        """
+        self.patterns: Tuple[str, ...] = tuple(patterns)
+        goto: List[Dict[str, int]] = [{}]
+        out: List[List[int]] = [[]]
+
+        for pattern_id, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    out.append([])
+                state = next_state
+            out[state].append(pattern_id)
+
+        # 廣度優先建立失敗指針，並合併輸出
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                target = goto[fallback].get(char, 0)
+                fail[next_state] = target
+                out[next_state].extend(out[fail[next_state]])
+
+        self._goto = tuple(goto)
+        self._fail = tuple(fail)
+        self._out = tuple(tuple(ids) for ids in out)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        掃描文本並產生所有匹配
+
+        Args:
+            text: 待掃描文本
+
+        Yields:
+            Tuple[int, int]: (匹配起始位置, 關鍵詞索引)
+        """
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self.patterns
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_id in out[state]:
+                yield index - len(patterns[pattern_id]) + 1, pattern_id
+
+
+def _build_price_index() -> Tuple[KeywordAutomaton, Tuple[int, ...], Tuple[int, ...]]:
+    """構建價格索引：自動機、每個關鍵詞的價格優先級和類別優先級"""
+    no_rank = len(PRICE_ITEMS) + len(CATEGORY_FALLBACK)
+    price_rank: Dict[str, int] = {}
+    for rank, (name, _) in enumerate(PRICE_ITEMS):
+        price_rank.setdefault(name, rank)
+
+    category_rank: Dict[str, int] = {}
+    for rank, (keywords, _) in enumerate(CATEGORY_FALLBACK):
+        for keyword in keywords:
+            category_rank.setdefault(keyword, rank)
+
+    patterns = list(dict.fromkeys([*price_rank, *category_rank]))
+    automaton = KeywordAutomaton(patterns)
+    return (
+        automaton,
+        tuple(price_rank.get(p, no_rank) for p in patterns),
+        tuple(category_rank.get(p, no_rank) for p in patterns),
+    )
+
+
+_PRICE_AUTOMATON, _PRICE_RANKS, _CATEGORY_RANKS = _build_price_index()
+_PRICE_VALUES: Tuple[float, ...] = tuple(price for _, price in PRICE_ITEMS)
+_CATEGORY_VALUES: Tuple[float, ...] = tuple(price for _, price in CATEGORY_FALLBACK)
+
+
+def lookup_price(item_name: str) -> float:
+    """
+    根據項目名稱查找默認價格
+
+    匹配規則與舊版 `_get_default_price` 相同：精確匹配優先，其次取價格表中
+    最先出現且包含於名稱中的項目，最後按類別回退。
+
+    Args:
+        item_name: 項目名稱
+
+    Returns:
+        float: 單價（港幣）
+    """
+    name = item_name.lower()
+    price = MENU_PRICES.get(name)
+    if price is not None:
+        return price
+
+    best_price = len(_PRICE_VALUES)
+    best_category = len(_CATEGORY_VALUES)
+    for _, pattern_id in _PRICE_AUTOMATON.iter_matches(name):
+        rank = _PRICE_RANKS[pattern_id]
+        if rank < best_price:
+            best_price = rank
+        rank = _CATEGORY_RANKS[pattern_id]
+        if rank < best_category:
+            best_category = rank
+
+    if best_price < len(_PRICE_VALUES):
+        return _PRICE_VALUES[best_price]
+    if best_category < len(_CATEGORY_VALUES):
+        return _CATEGORY_VALUES[best_category]
+    return DEFAULT_PRICE
+
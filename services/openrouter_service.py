@@ -1,16 +1,49 @@
 """
 OpenRouter API 集成服務 - 語言模型處理
 """
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+import asyncio
+import atexit
+import copy
+import httpx
+import json
 import logging
-from typing import Dict, Any, Optional, List
+import re
+import time
+from typing import Dict, Any, Iterator, Optional, Tuple
+from services.menu_catalog import lookup_price
+from services.order_scanner import ScanResult, default_scanner
+from services.parse_router import (
+    ParseRouter, RouteDecision, ROUTE_CACHE, ROUTE_FALLBACK, ROUTE_LLM, ROUTE_LOCAL
+)
+from services.prompt_builder import PromptBuilder, TokenAccountant
+from services.upselling_engine import DEFAULT_RULES_PATH, UpsellingEngine
+from utils.cache import LRUCache, SQLiteCache, TieredCache, make_cache_key
+from utils.event_loop import EventLoopThread
+from utils.json_stream import IncrementalArrayParser
+from utils.singleflight import AsyncSingleFlight, SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# 提示詞版本：修改 services/prompt_builder.py 時遞增，使舊緩存失效
+PROMPT_VERSION = 2
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+_NORMALIZE_RE = re.compile(r'[\s，。、！？,.!?~～「」"\'：:；;]+')
+
+def normalize_transcription(text: str) -> str:
+    """規範化轉錄文字（去除空白及標點，統一大小寫），用作緩存鍵"""
+    return _NORMALIZE_RE.sub('', text).lower()
+
 class OpenRouterService:
     """OpenRouter API 服務類"""
     
-    def __init__(self, api_key: str, model: str = "x-ai/grok-4-fast:free", site_url: Optional[str] = None, site_name: Optional[str] = None):
+    def __init__(self, api_key: str, model: str = "x-ai/grok-4-fast:free", site_url: Optional[str] = None, site_name: Optional[str] = None,
+                 cache_size: int = 100, cache_ttl: float = 300, shared_cache_path: Optional[str] = None,
+                 shared_cache_size: int = 10000, max_concurrency: int = 100,
+                 local_confidence_threshold: float = 0.9, upselling_rules_path: Optional[str] = None):
         """
         初始化 OpenRouter 服務
         
@@ -19,21 +52,55 @@ class OpenRouterService:
             model: 要使用的模型名稱
             site_url: 網站 URL (可選)
             site_name: 網站名稱 (可選)
+            cache_size: 解析結果緩存條目數
+            cache_ttl: 解析結果緩存時間（秒）
+            shared_cache_path: 跨 worker 共享緩存的 SQLite 文件路徑（可選，None 表示不啟用）
+            shared_cache_size: 共享緩存最大條目數
+            max_concurrency: 異步路徑同時進行的 API 調用上限
+            local_confidence_threshold: 本地解析覆蓋率達到此值時不調用 LLM
+            upselling_rules_path: 追加銷售規則文件路徑（可選，默認 data/upselling_rules.json）
         """
         self.api_key = api_key
         self.site_url = site_url
         self.site_name = site_name
         self.model = model
+        self.max_concurrency = max_concurrency
+        
+        # 提示詞構建（固定系統前綴）及 token 統計
+        self.prompt_builder = PromptBuilder()
+        self.token_usage = TokenAccountant()
+        
+        # 本地優先路由：簡單訂單直接用本地掃描結果
+        self.router = ParseRouter(local_confidence_threshold)
+        
+        # 追加銷售規則引擎（規則文件修改後自動重新載入）
+        self.upselling = UpsellingEngine(upselling_rules_path or DEFAULT_RULES_PATH)
+        
+        # 異步調用在一個長期運行的循環線程中執行：連接池、並發限制及請求合併綁定事件循環，
+        # 而 Flask 異步視圖每個請求使用新的循環，交給同一個循環才能在請求之間共用
+        self._llm_loop = EventLoopThread('openrouter-async')
+        self._async_context: Optional[Tuple[AsyncOpenAI, asyncio.Semaphore]] = None
+        self._llm_loop.on_close(self._close_async_client)
+        atexit.register(self.close)
         
-        # 性能優化：緩存機制
-        self._cache = {}
-        self._cache_max_size = 100
-        self._cache_ttl = 300  # 5分鐘緩存
+        # 性能優化：進程內 LRU 緩存 + 可選的跨 worker 共享緩存
+        shared_cache = None
+        if shared_cache_path:
+            try:
+                shared_cache = SQLiteCache(shared_cache_path, max_size=shared_cache_size, ttl=cache_ttl)
+                logger.info(f"共享解析緩存已啟用: {shared_cache_path}")
+            except Exception as e:
+                logger.warning(f"共享解析緩存初始化失敗，僅使用進程內緩存: {e}")
+        self._cache = TieredCache(LRUCache(max_size=cache_size, ttl=cache_ttl), shared_cache)
+        
+        # 相同轉錄的並發請求共用一次 LLM 調用（緩存只在調用完成後寫入）
+        self._inflight = SingleFlight()
+        self._async_inflight = AsyncSingleFlight()
         
         # 初始化 OpenAI 客戶端連接到 OpenRouter
         try:
             self.client = OpenAI(
-                base_url="https://openrouter.ai/api/v1",
+                base_url=OPENROUTER_BASE_URL,
                 api_key=api_key,
                 timeout=10.0  # 設置超時時間
             )
@@ -44,212 +111,33 @@ class OpenRouterService:
         
         logger.info("OpenRouter 服務初始化完成")
     
+    def _make_cache_key(self, transcribed_text: str) -> str:
+        """生成解析結果的緩存鍵（規範化文字 + 模型 + 提示詞版本）"""
+        return make_cache_key(normalize_transcription(transcribed_text), self.model, PROMPT_VERSION)
+    
     def _get_from_cache(self, key: str) -> Optional[Dict[str, Any]]:
-        """從緩存獲取結果"""
-        import time
-        if key in self._cache:
-            result, timestamp = self._cache[key]
-            if time.time() - timestamp < self._cache_ttl:
-                return result
-            else:
-                del self._cache[key]
-        return None
+        """從緩存獲取結果（返回副本，調用方修改不影響緩存）"""
+        result = self._cache.get(key)
+        return copy.deepcopy(result) if result is not None else None
     
     def _save_to_cache(self, key: str, result: Dict[str, Any]):
-        """保存結果到緩存"""
-        import time
-        if len(self._cache) >= self._cache_max_size:
-            # 清理最舊的緩存項
-            oldest_key = min(self._cache.keys(), key=lambda k: self._cache[k][1])
-            del self._cache[oldest_key]
-        
-        self._cache[key] = (result, time.time())
+        """保存結果到緩存（保存副本，之後修改 result 不影響緩存）"""
+        self._cache.set(key, copy.deepcopy(result))
     
-    def _is_simple_order(self, text: str) -> bool:
-        """判斷是否為簡單訂單，可以使用本地解析"""
-        simple_patterns = [
-            '檸檬茶', '檸茶', '奶茶', '咖啡', '可樂', '雪碧',
-            '炒河', '炒麵', '炒飯', '多士', '三明治'
-        ]
-        text_lower = text.lower()
-        return any(pattern in text_lower for pattern in simple_patterns)
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """獲取解析緩存統計信息"""
+        return self._cache.stats()
     
-    def _get_default_price(self, item_name: str) -> float:
-        """根據項目名稱獲取默認價格"""
-        item_name_lower = item_name.lower()
-        
-        # 完整的香港茶餐廳價格映射
-        price_map = {
-            # 茶類飲品
-            '檸檬茶': 18.0,
-            '凍檸茶': 18.0,
-            '熱檸茶': 18.0,
-            '檸茶': 18.0,
-            '奶茶': 22.0,
-            '凍奶茶': 22.0,
-            '熱奶茶': 22.0,
-            '絲襪奶茶': 25.0,
-            '港式奶茶': 25.0,
-            '茶餐廳奶茶': 25.0,
-            '紅茶': 15.0,
-            '綠茶': 15.0,
-            '烏龍茶': 18.0,
-            '茉莉花茶': 16.0,
-            '普洱茶': 20.0,
-            
-            # 咖啡類
-            '咖啡': 25.0,
-            '黑咖啡': 22.0,
-            '白咖啡': 28.0,
-            '即溶咖啡': 20.0,
-            '港式咖啡': 25.0,
-            '鴛鴦': 28.0,  # 咖啡奶茶
-            '凍鴛鴦': 28.0,
-            '熱鴛鴦': 28.0,
-            
-            # 果汁類
-            '橙汁': 20.0,
-            '蘋果汁': 18.0,
-            '葡萄汁': 20.0,
-            '檸檬汁': 18.0,
-            '西瓜汁': 22.0,
-            '芒果汁': 25.0,
-            '鮮橙汁': 25.0,
-            '鮮榨果汁': 28.0,
-            
-            # 汽水類
-            '可樂': 15.0,
-            '雪碧': 15.0,
-            '芬達': 15.0,
-            '汽水': 15.0,
-            '梳打水': 12.0,
-            '檸檬梳打': 18.0,
-            
-            # 特色飲品
-            '檸檬蜜': 22.0,
-            '檸檬蜂蜜': 22.0,
-            '蜂蜜檸檬': 22.0,
-            '薄荷茶': 20.0,
-            '薑茶': 18.0,
-            '檸檬薑茶': 22.0,
-            '凍檸賓': 25.0,
-            '熱檸賓': 25.0,
-            
-            # 奶類飲品
-            '朱古力': 25.0,
-            '熱朱古力': 25.0,
-            '凍朱古力': 25.0,
-            '阿華田': 22.0,
-            '好立克': 22.0,
-            '牛奶': 18.0,
-            '鮮奶': 20.0,
-            '豆漿': 15.0,
-            
-            # 湯類
-            '例湯': 12.0,
-            '餐湯': 12.0,
-            '湯': 12.0,
-            '羅宋湯': 18.0,
-            '粟米湯': 15.0,
-            '蛋花湯': 15.0,
-            '紫菜蛋花湯': 18.0,
-            
-            # 主食類
-            '炒河': 35.0,
-            '乾炒牛河': 38.0,
-            '濕炒牛河': 38.0,
-            '炒麵': 32.0,
-            '撈麵': 30.0,
-            '湯麵': 28.0,
-            '雲吞麵': 35.0,
-            '牛腩麵': 42.0,
-            '叉燒麵': 38.0,
-            '餐蛋麵': 25.0,
-            '公仔麵': 22.0,
-            
-            # 飯類
-            '白飯': 8.0,
-            '炒飯': 32.0,
-            '揚州炒飯': 35.0,
-            '叉燒炒飯': 38.0,
-            '蝦仁炒飯': 42.0,
-            '牛肉炒飯': 40.0,
-            '雞絲炒飯': 35.0,
-            '鹹牛肉炒飯': 38.0,
-            
-            # 多士類
-            '多士': 15.0,
-            '牛油多士': 18.0,
-            '花生醬多士': 20.0,
-            '煉奶多士': 22.0,
-            '法式多士': 25.0,
-            '西多士': 28.0,
-            '厚多士': 32.0,
-            
-            # 三明治類
-            '三明治': 25.0,
-            '火腿三明治': 28.0,
-            '雞蛋三明治': 25.0,
-            '吞拿魚三明治': 30.0,
-            '牛肉三明治': 35.0,
-            '芝士三明治': 28.0,
-            '總匯三明治': 38.0,
-            
-            # 蛋類
-            '煎蛋': 12.0,
-            '炒蛋': 15.0,
-            '蒸蛋': 18.0,
-            '水波蛋': 15.0,
-            '溏心蛋': 15.0,
-            '茶葉蛋': 8.0,
-            
-            # 小食類
-            '薯條': 18.0,
-            '雞翼': 25.0,
-            '雞塊': 22.0,
-            '春卷': 20.0,
-            '燒賣': 15.0,
-            '魚蛋': 12.0,
-            '牛丸': 15.0,
-            '腸粉': 18.0,
-            
-            # 甜品類
-            '布丁': 18.0,
-            '雪糕': 15.0,
-            '紅豆冰': 22.0,
-            '芒果布丁': 25.0,
-            '椰汁西米露': 20.0,
-            '楊枝甘露': 28.0,
+    def get_coalesce_stats(self) -> Dict[str, Any]:
+        """獲取並發請求合併統計信息"""
+        return {
+            'sync': self._inflight.stats(),
+            'async': self._async_inflight.stats()
         }
-        
-        # 精確匹配優先
-        if item_name_lower in price_map:
-            return price_map[item_name_lower]
-        
-        # 模糊匹配
-        for key, price in price_map.items():
-            if key in item_name_lower:
-                return price
-        
-        # 按類別匹配
-        if any(keyword in item_name_lower for keyword in ['茶', '奶茶']):
-            return 22.0
-        elif any(keyword in item_name_lower for keyword in ['咖啡', '鴛鴦']):
-            return 25.0
-        elif any(keyword in item_name_lower for keyword in ['汁', '果汁']):
-            return 20.0
-        elif any(keyword in item_name_lower for keyword in ['可樂', '汽水', '雪碧']):
-            return 15.0
-        elif any(keyword in item_name_lower for keyword in ['炒河', '炒麵', '麵']):
-            return 35.0
-        elif any(keyword in item_name_lower for keyword in ['炒飯', '飯']):
-            return 32.0
-        elif any(keyword in item_name_lower for keyword in ['多士', '三明治']):
-            return 25.0
-        elif any(keyword in item_name_lower for keyword in ['湯']):
-            return 15.0
-        
-        return 20.0  # 默認價格
+    
+    def _get_default_price(self, item_name: str) -> float:
+        """根據項目名稱獲取默認價格（使用預編譯的菜單索引）"""
+        return lookup_price(item_name)
     
     def _get_extra_headers(self) -> Dict[str, str]:
         """獲取額外的請求頭"""
@@ -262,6 +150,135 @@ class OpenRouterService:
             headers["X-Title"] = safe_title
         return headers
     
+    def _get_cached_result(self, cache_key: str, transcribed_text: str) -> Optional[Dict[str, Any]]:
+        """獲取緩存的解析結果，並把轉錄文字換成本次請求的原文"""
+        cached_result = self._get_from_cache(cache_key)
+        if cached_result:
+            cached_result = self._with_transcription(cached_result, transcribed_text)
+        return cached_result
+    
+    @staticmethod
+    def _with_transcription(result: Dict[str, Any], transcribed_text: str) -> Dict[str, Any]:
+        """共享的解析結果（緩存或合併請求）換上本次請求的原文"""
+        if result['order'].get('transcription') == transcribed_text:
+            return result
+        return {**result, 'order': {**result['order'], 'transcription': transcribed_text}}
+    
+    def _build_completion_kwargs(self, transcribed_text: str) -> Dict[str, Any]:
+        """構建 OpenRouter 聊天補全請求參數（按照官方文檔格式）"""
+        return {
+            'extra_headers': self._get_extra_headers(),
+            'extra_body': {},
+            'model': self.model,
+            'messages': self.prompt_builder.build_messages(transcribed_text),
+            'temperature': 0.1,  # 降低溫度以提高一致性和速度
+            'max_tokens': 800    # 減少token數量
+        }
+    
+    def _record_token_usage(self, completion_kwargs: Dict[str, Any], usage: Any = None):
+        """記錄本次請求的 token 用量"""
+        estimated = self.prompt_builder.count_prompt_tokens(completion_kwargs['messages'])
+        entry = self.token_usage.record(estimated, usage)
+        logger.info(f"Token 用量: 提示 {entry['prompt_tokens'] or estimated}"
+                    f"{'（估算）' if entry['prompt_tokens'] is None else ''}, 完成 {entry['completion_tokens']}")
+    
+    def _build_result_from_content(self, transcribed_text: str, content: str) -> Dict[str, Any]:
+        """
+        將模型回應內容轉換為結構化訂單結果
+        
+        Args:
+            transcribed_text: 語音轉錄文字
+            content: 模型回應文字
+            
+        Returns:
+            Dict: 結構化訂單數據
+        """
+        # 提取 JSON 部分
+        json_match = _JSON_OBJECT_RE.search(content)
+        if json_match:
+            json_str = json_match.group()
+            order_data = json.loads(json_str)
+        else:
+            # 如果沒有找到 JSON，創建基本結構
+            order_data = {
+                "items": [
+                    {
+                        "name": "未識別項目",
+                        "quantity": 1
+                    }
+                ],
+                "special_requests": []
+            }
+        
+        # 處理 API 回應，確保格式一致
+        processed_items = [self._normalize_item(item) for item in order_data.get('items', [])]
+        
+        # 從特殊要求中提取定制信息
+        special_requests = order_data.get('special_requests', [])
+        if processed_items and special_requests:
+            customizations = {}
+            for request in special_requests:
+                if '少甜' in request:
+                    customizations['甜度'] = '少甜'
+                elif '走冰' in request or '無冰' in request:
+                    customizations['冰塊'] = '走冰'
+            
+            if customizations:
+                processed_items[0]['customizations'].update(customizations)
+        
+        # 構建完整的訂單對象
+        order = {
+            'items': processed_items,
+            'special_requests': special_requests,
+            'transcription': transcribed_text,
+            'confidence_score': 0.90
+        }
+        
+        # 生成追加銷售建議
+        upselling = self.generate_upselling_sync(order)
+        
+        return {
+            'success': True,
+            'order': order,
+            'upselling': upselling
+        }
+    
+    def _normalize_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """補全模型返回的訂單項目字段"""
+        return {
+            'name': item.get('name', '未識別項目'),
+            'quantity': item.get('quantity', 1),
+            'unit_price': item.get('unit_price', self._get_default_price(item.get('name', ''))),
+            'customizations': item.get('customizations', {})
+        }
+    
+    def _route_locally(self, transcribed_text: str) -> Tuple[Optional[Dict[str, Any]], RouteDecision]:
+        """
+        本地掃描並決定是否需要調用 LLM
+        
+        Returns:
+            Tuple: (本地解析結果 或 None, 路由決定)
+        """
+        scan = default_scanner.scan(transcribed_text)
+        decision = self.router.decide(scan)
+        if decision.route == ROUTE_LOCAL:
+            return self._parse_order_locally(transcribed_text, scan), decision
+        return None, decision
+    
+    def _with_routing(self, result: Dict[str, Any], route: str, started: float,
+                      decision: Optional[RouteDecision] = None) -> Dict[str, Any]:
+        """記錄路由耗時，並在結果副本上附加路由信息（緩存中的結果不含此字段）"""
+        latency_ms = (time.perf_counter() - started) * 1000
+        self.router.record(route, latency_ms)
+        routed = dict(result)
+        routed['routing'] = {
+            'route': route,
+            'coverage': round(decision.coverage, 3) if decision else None,
+            'reason': decision.reason if decision else None,
+            'latency_ms': round(latency_ms, 3)
+        }
+        return routed
+    
     def parse_order_sync(self, transcribed_text: str) -> Dict[str, Any]:
         """
         解析訂單內容（同步版本，已優化性能）
@@ -272,281 +289,166 @@ class OpenRouterService:
         Returns:
             Dict: 結構化訂單數據
         """
+        started = time.perf_counter()
+        decision = None
         try:
             # 性能優化：檢查緩存
-            cache_key = f"parse_{hash(transcribed_text)}"
-            cached_result = self._get_from_cache(cache_key)
+            cache_key = self._make_cache_key(transcribed_text)
+            cached_result = self._get_cached_result(cache_key, transcribed_text)
             if cached_result:
                 logger.info("使用緩存的解析結果")
-                return cached_result
+                return self._with_routing(cached_result, ROUTE_CACHE, started)
             
             # 檢查客戶端是否可用
             if not self.client:
                 logger.warning("OpenRouter 客戶端不可用，使用本地解析")
-                return self._parse_order_locally(transcribed_text)
+                return self._with_routing(self._parse_order_locally(transcribed_text), ROUTE_FALLBACK, started)
             
             # 檢查是否為測試模式（只有測試模式才使用本地解析）
             if self.api_key.startswith('test-'):
                 logger.info("使用本地解析（測試模式）")
                 result = self._parse_order_locally(transcribed_text)
                 self._save_to_cache(cache_key, result)
-                return result
-            
-            # 對於正常的API key，優先使用AI解析
-            logger.info("使用AI解析（OpenRouter）")
-            
-            prompt = self.create_order_prompt(transcribed_text)
-            
-            # 調用 OpenRouter API（按照官方文檔格式）
-            extra_headers = self._get_extra_headers()
-            
-            response = self.client.chat.completions.create(
-                extra_headers=extra_headers,
-                extra_body={},
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "你是一個專門處理香港茶餐廳訂單的AI助手。請以JSON格式返回結構化的訂單信息。"
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
-                temperature=0.1,  # 降低溫度以提高一致性和速度
-                max_tokens=800    # 減少token數量
+                return self._with_routing(result, ROUTE_LOCAL, started)
+            
+            # 本地優先：掃描覆蓋率足夠時不調用 LLM
+            local_result, decision = self._route_locally(transcribed_text)
+            if local_result is not None:
+                logger.info(f"使用本地解析（覆蓋率 {decision.coverage:.2f}）")
+                return self._with_routing(local_result, ROUTE_LOCAL, started, decision)
+            
+            # 其餘訂單使用AI解析（相同轉錄的並發請求共用一次調用）
+            logger.info(f"使用AI解析（OpenRouter，{decision.reason}）")
+            result, shared = self._inflight.do(
+                cache_key, lambda: self._parse_with_llm(transcribed_text, cache_key)
             )
+            # 合併的請求共用同一結果對象，每個調用方各自取得副本
+            result = copy.deepcopy(result)
+            if shared:
+                logger.info("合併到進行中的相同解析請求")
+                result = self._with_transcription(result, transcribed_text)
+            return self._with_routing(result, ROUTE_LLM, started, decision)
             
-            # 解析回應
-            content = response.choices[0].message.content
-            logger.info("OpenRouter 回應已收到")
-            
-            # 嘗試解析 JSON
-            import json
-            import re
-            
-            # 提取 JSON 部分
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                json_str = json_match.group()
-                order_data = json.loads(json_str)
-            else:
-                # 如果沒有找到 JSON，創建基本結構
-                order_data = {
-                    "items": [
-                        {
-                            "name": "未識別項目",
-                            "quantity": 1
-                        }
-                    ],
-                    "special_requests": []
-                }
-            
-            # 處理 API 回應，確保格式一致
-            processed_items = []
-            for item in order_data.get('items', []):
-                processed_item = {
-                    'name': item.get('name', '未識別項目'),
-                    'quantity': item.get('quantity', 1),
-                    'unit_price': item.get('unit_price', self._get_default_price(item.get('name', ''))),
-                    'customizations': item.get('customizations', {})
-                }
-                processed_items.append(processed_item)
-            
-            # 從特殊要求中提取定制信息
-            special_requests = order_data.get('special_requests', [])
-            if processed_items and special_requests:
-                customizations = {}
-                for request in special_requests:
-                    if '少甜' in request:
-                        customizations['甜度'] = '少甜'
-                    elif '走冰' in request or '無冰' in request:
-                        customizations['冰塊'] = '走冰'
-                
-                if customizations:
-                    processed_items[0]['customizations'].update(customizations)
-            
-            # 構建完整的訂單對象
-            order = {
-                'items': processed_items,
-                'special_requests': special_requests,
-                'transcription': transcribed_text,
-                'confidence_score': 0.90
-            }
+        except Exception as e:
+            logger.error(f"訂單解析錯誤: {e}")
+            # 回退到本地解析
+            logger.info("回退到本地解析")
+            return self._with_routing(self._parse_order_locally(transcribed_text), ROUTE_FALLBACK, started, decision)
+    
+    def _parse_with_llm(self, transcribed_text: str, cache_key: str) -> Dict[str, Any]:
+        """調用 OpenRouter 解析並寫入緩存"""
+        completion_kwargs = self._build_completion_kwargs(transcribed_text)
+        response = self.client.chat.completions.create(**completion_kwargs)
+        
+        # 解析回應
+        content = response.choices[0].message.content
+        logger.info("OpenRouter 回應已收到")
+        self._record_token_usage(completion_kwargs, getattr(response, 'usage', None))
+        
+        result = self._build_result_from_content(transcribed_text, content)
+        self._save_to_cache(cache_key, result)
+        return result
+    
+    def parse_order_stream(self, transcribed_text: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        串流解析訂單內容：每個訂單項目在模型輸出中閉合後立即產生
+        
+        Args:
+            transcribed_text: 語音轉錄文字
             
-            # 生成追加銷售建議
-            upselling = self.generate_upselling_sync(order)
+        Yields:
+            Tuple[str, Dict]: ('item', 訂單項目)，最後為 ('result', 完整結果)；
+            完整結果以最終解析為準，可能修正先前產生的項目
+        """
+        started = time.perf_counter()
+        decision = None
+        cache_key = self._make_cache_key(transcribed_text)
+        result = self._get_cached_result(cache_key, transcribed_text)
+        route = ROUTE_CACHE
+        
+        if result is None and (not self.client or not self.api_key or self.api_key.startswith('test-')):
+            result = self._parse_order_locally(transcribed_text)
+            route = ROUTE_LOCAL
+            if self.api_key:
+                self._save_to_cache(cache_key, result)
+        
+        if result is None:
+            result, decision = self._route_locally(transcribed_text)
+            route = ROUTE_LOCAL
+        
+        if result is not None:
+            for item in result['order']['items']:
+                yield 'item', item
+            yield 'result', self._with_routing(result, route, started, decision)
+            return
+        
+        route = ROUTE_LLM
+        try:
+            logger.info("使用AI串流解析（OpenRouter）")
+            completion_kwargs = self._build_completion_kwargs(transcribed_text)
+            stream = self.client.chat.completions.create(
+                stream=True,
+                stream_options={'include_usage': True},
+                **completion_kwargs
+            )
             
-            return {
-                'success': True,
-                'order': order,
-                'upselling': upselling
-            }
+            parser = IncrementalArrayParser('items')
+            usage = None
+            for chunk in stream:
+                usage = getattr(chunk, 'usage', None) or usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                for item in parser.feed(delta or ''):
+                    if isinstance(item, dict):
+                        yield 'item', self._normalize_item(item)
+            
+            logger.info("OpenRouter 串流回應已完成")
+            self._record_token_usage(completion_kwargs, usage)
+            result = self._build_result_from_content(transcribed_text, parser.text)
+            self._save_to_cache(cache_key, result)
             
         except Exception as e:
-            logger.error(f"訂單解析錯誤: {e}")
-            # 回退到本地解析
+            logger.error(f"串流訂單解析錯誤: {e}")
             logger.info("回退到本地解析")
-            return self._parse_order_locally(transcribed_text)
+            result = self._parse_order_locally(transcribed_text)
+            route = ROUTE_FALLBACK
+        
+        yield 'result', self._with_routing(result, route, started, decision)
     
-    def _parse_order_locally(self, transcribed_text: str) -> Dict[str, Any]:
+    def _parse_order_locally(self, transcribed_text: str, scan: Optional[ScanResult] = None) -> Dict[str, Any]:
         """
         本地訂單解析（不依賴 API）- 增強版
         
         Args:
             transcribed_text: 語音轉錄文字
+            scan: 已有的掃描結果（可選，避免重複掃描）
             
         Returns:
             Dict: 結構化訂單數據
         """
         try:
-            import re
-            
-            items = []
-            special_requests = []
-            text_lower = transcribed_text.lower()
-            
-            # 數量識別
-            def extract_quantity(text, item_keyword):
-                """提取數量"""
-                # 中文數字映射
-                chinese_numbers = {
-                    '一': 1, '二': 2, '三': 3, '四': 4, '五': 5,
-                    '六': 6, '七': 7, '八': 8, '九': 9, '十': 10,
-                    '兩': 2, '半': 0.5
-                }
-                
-                # 查找數量詞
-                patterns = [
-                    rf'([一二三四五六七八九十兩半])[杯份個碗碟客]*{item_keyword}',
-                    rf'(\d+)[杯份個碗碟客]*{item_keyword}',
-                    rf'{item_keyword}.*?([一二三四五六七八九十兩半])[杯份個碗碟客]',
-                    rf'{item_keyword}.*?(\d+)[杯份個碗碟客]'
-                ]
-                
-                for pattern in patterns:
-                    match = re.search(pattern, text)
-                    if match:
-                        qty_str = match.group(1)
-                        if qty_str in chinese_numbers:
-                            return chinese_numbers[qty_str]
-                        elif qty_str.isdigit():
-                            return int(qty_str)
-                
-                return 1  # 默認數量
+            # 單次掃描：項目、數量及定制選項
+            if scan is None:
+                scan = default_scanner.scan(transcribed_text)
             
-            # 定制選項識別
-            def extract_customizations(text):
-                """提取定制選項"""
-                customizations = {}
-                
-                # 甜度
-                if '少甜' in text:
-                    customizations['甜度'] = '少甜'
-                elif '無糖' in text or '走糖' in text:
-                    customizations['甜度'] = '無糖'
-                elif '甜' in text and '少甜' not in text:
-                    customizations['甜度'] = '甜'
-                elif '半糖' in text:
-                    customizations['甜度'] = '半糖'
-                
-                # 冰塊
-                if '走冰' in text or '無冰' in text:
-                    customizations['冰塊'] = '走冰'
-                elif '少冰' in text:
-                    customizations['冰塊'] = '少冰'
-                elif '多冰' in text:
-                    customizations['冰塊'] = '多冰'
-                
-                # 溫度
-                if '熱' in text:
-                    customizations['溫度'] = '熱'
-                elif '凍' in text:
-                    customizations['溫度'] = '凍'
-                elif '室溫' in text:
-                    customizations['溫度'] = '室溫'
-                
-                # 加料
-                add_ons = []
-                if '加檸檬' in text:
-                    add_ons.append('檸檬')
-                if '加蜂蜜' in text:
-                    add_ons.append('蜂蜜')
-                if '加薄荷' in text:
-                    add_ons.append('薄荷')
-                if '加奶' in text:
-                    add_ons.append('奶')
-                if add_ons:
-                    customizations['加料'] = ','.join(add_ons)
+            detected_items = []
+            for span in scan.items:
+                item_name = span.name
                 
-                # 份量
-                if '大杯' in text:
-                    customizations['份量'] = '大杯'
-                elif '小杯' in text:
-                    customizations['份量'] = '小杯'
-                elif '中杯' in text:
-                    customizations['份量'] = '中杯'
+                # 溫度邏輯調整
+                if item_name == '檸檬茶':
+                    if '熱' in scan.modifiers:
+                        item_name = '熱檸茶'
+                    elif '凍' in scan.modifiers:
+                        item_name = '凍檸茶'
                 
-                return customizations
-            
-            # 項目識別和解析
-            detected_items = []
-            
-            # 飲品類識別
-            drink_patterns = {
-                '檸檬茶': ['檸檬茶', '檸茶', '凍檸茶', '熱檸茶'],
-                '奶茶': ['奶茶', '絲襪奶茶', '港式奶茶'],
-                '咖啡': ['咖啡', '黑咖啡', '白咖啡'],
-                '鴛鴦': ['鴛鴦'],
-                '橙汁': ['橙汁', '鮮橙汁'],
-                '可樂': ['可樂', 'cola'],
-                '雪碧': ['雪碧', 'sprite'],
-                '檸檬蜜': ['檸檬蜜', '蜂蜜檸檬'],
-                '阿華田': ['阿華田'],
-                '好立克': ['好立克']
-            }
-            
-            # 主食類識別
-            food_patterns = {
-                '乾炒牛河': ['乾炒牛河', '炒牛河'],
-                '炒河': ['炒河'],
-                '炒麵': ['炒麵'],
-                '雲吞麵': ['雲吞麵'],
-                '牛腩麵': ['牛腩麵'],
-                '叉燒麵': ['叉燒麵'],
-                '揚州炒飯': ['揚州炒飯'],
-                '叉燒炒飯': ['叉燒炒飯'],
-                '炒飯': ['炒飯'],
-                '牛油多士': ['牛油多士'],
-                '法式多士': ['法式多士'],
-                '多士': ['多士'],
-                '三明治': ['三明治', 'sandwich']
-            }
-            
-            all_patterns = {**drink_patterns, **food_patterns}
-            
-            # 檢測所有項目
-            for item_name, keywords in all_patterns.items():
-                for keyword in keywords:
-                    if keyword in transcribed_text:
-                        quantity = extract_quantity(transcribed_text, keyword)
-                        customizations = extract_customizations(transcribed_text)
-                        unit_price = self._get_default_price(item_name)
-                        
-                        # 溫度邏輯調整
-                        if '熱' in transcribed_text and item_name == '檸檬茶':
-                            item_name = '熱檸茶'
-                        elif '凍' in transcribed_text and item_name == '檸檬茶':
-                            item_name = '凍檸茶'
-                        
-                        detected_items.append({
-                            'name': item_name,
-                            'quantity': quantity,
-                            'unit_price': unit_price,
-                            'customizations': customizations
-                        })
-                        break
+                detected_items.append({
+                    'name': item_name,
+                    'quantity': span.quantity,
+                    'unit_price': self._get_default_price(span.name),
+                    'customizations': dict(scan.customizations)
+                })
             
             # 如果沒有檢測到任何項目，添加默認項目
             if not detected_items:
@@ -554,23 +456,11 @@ class OpenRouterService:
                     'name': '凍檸茶',
                     'quantity': 1,
                     'unit_price': 18.0,
-                    'customizations': extract_customizations(transcribed_text)
+                    'customizations': dict(scan.customizations)
                 })
             
             # 提取特殊要求
-            special_requests = []
-            if '少甜' in transcribed_text:
-                special_requests.append('少甜')
-            if '走冰' in transcribed_text or '無冰' in transcribed_text:
-                special_requests.append('走冰')
-            if '加檸檬' in transcribed_text:
-                special_requests.append('加檸檬')
-            if '加蜂蜜' in transcribed_text:
-                special_requests.append('加蜂蜜')
-            if '熱' in transcribed_text:
-                special_requests.append('要熱的')
-            if '大杯' in transcribed_text:
-                special_requests.append('大杯')
+            special_requests = list(scan.special_requests)
             
             # 構建訂單
             order = {
@@ -612,7 +502,7 @@ class OpenRouterService:
     
     def generate_upselling_sync(self, current_order: Dict[str, Any]) -> Dict[str, Any]:
         """
-        生成追加銷售建議（同步版本）- 增強版
+        生成追加銷售建議（同步版本，規則見 data/upselling_rules.json）
         
         Args:
             current_order: 當前訂單數據
@@ -621,210 +511,7 @@ class OpenRouterService:
             Dict: 追加銷售建議
         """
         try:
-            suggestions = []
-            items = current_order.get('items', [])
-            total_amount = current_order.get('total', 0)
-            
-            # 分析訂單內容
-            has_drinks = False
-            has_food = False
-            has_tea = False
-            has_coffee = False
-            has_cold_drinks = False
-            has_hot_drinks = False
-            
-            for item in items:
-                item_name = item.get('name', '').lower()
-                customizations = item.get('customizations', {})
-                
-                # 分類分析
-                if any(keyword in item_name for keyword in ['茶', '汁', '可樂', '咖啡', '奶茶']):
-                    has_drinks = True
-                    
-                    if '茶' in item_name:
-                        has_tea = True
-                    if '咖啡' in item_name or '鴛鴦' in item_name:
-                        has_coffee = True
-                        
-                    # 溫度分析
-                    temp = customizations.get('溫度', '')
-                    if temp == '凍' or '凍' in item_name:
-                        has_cold_drinks = True
-                    elif temp == '熱' or '熱' in item_name:
-                        has_hot_drinks = True
-                
-                if any(keyword in item_name for keyword in ['河', '麵', '飯', '多士', '三明治']):
-                    has_food = True
-            
-            # 基於飲品的建議
-            if has_tea:
-                suggestions.extend([
-                    {
-                        'item': '檸檬蜂蜜',
-                        'message': '加檸檬蜂蜜，天然健康更好味！',
-                        'price': 5.0,
-                        'category': '加料'
-                    },
-                    {
-                        'item': '薄荷葉',
-                        'message': '加薄荷葉，清香怡人！',
-                        'price': 3.0,
-                        'category': '加料'
-                    }
-                ])
-            
-            if has_coffee:
-                suggestions.extend([
-                    {
-                        'item': '額外濃縮',
-                        'message': '加一份濃縮，更香濃提神！',
-                        'price': 8.0,
-                        'category': '加料'
-                    },
-                    {
-                        'item': '鮮奶',
-                        'message': '轉用鮮奶，口感更順滑！',
-                        'price': 5.0,
-                        'category': '升級'
-                    }
-                ])
-            
-            # 基於溫度的建議
-            if has_cold_drinks:
-                suggestions.append({
-                    'item': '加冰',
-                    'message': '夏日特飲，加冰更爽！',
-                    'price': 2.0,
-                    'category': '加料'
-                })
-            
-            # 配餐建議
-            if has_drinks and not has_food:
-                suggestions.extend([
-                    {
-                        'item': '牛油多士',
-                        'message': '經典茶餐廳配搭，香脆可口！',
-                        'price': 18.0,
-                        'category': '配餐'
-                    },
-                    {
-                        'item': '雞蛋三明治',
-                        'message': '營養豐富，飽肚之選！',
-                        'price': 25.0,
-                        'category': '配餐'
-                    },
-                    {
-                        'item': '薯條',
-                        'message': '金黃香脆，老少咸宜！',
-                        'price': 18.0,
-                        'category': '小食'
-                    }
-                ])
-            
-            if has_food and not has_drinks:
-                suggestions.extend([
-                    {
-                        'item': '凍檸茶',
-                        'message': '茶餐廳經典，解膩必備！',
-                        'price': 18.0,
-                        'category': '飲品'
-                    },
-                    {
-                        'item': '例湯',
-                        'message': '今日例湯，暖胃開胃！',
-                        'price': 12.0,
-                        'category': '湯品'
-                    }
-                ])
-            
-            # 基於消費金額的建議
-            if total_amount >= 50:
-                suggestions.append({
-                    'item': '甜品',
-                    'message': '滿$50送甜品優惠，布丁或雪糕任選！',
-                    'price': 0.0,
-                    'category': '優惠'
-                })
-            elif total_amount >= 30:
-                suggestions.append({
-                    'item': '升級套餐',
-                    'message': '加$8升級套餐，包飲品+例湯！',
-                    'price': 8.0,
-                    'category': '套餐'
-                })
-            
-            # 時段特色建議
-            from datetime import datetime
-            current_hour = datetime.now().hour
-            
-            if 6 <= current_hour <= 11:  # 早餐時段
-                suggestions.extend([
-                    {
-                        'item': '煎蛋',
-                        'message': '早餐必備，營養豐富！',
-                        'price': 12.0,
-                        'category': '早餐'
-                    },
-                    {
-                        'item': '熱咖啡',
-                        'message': '早晨提神，香濃醒腦！',
-                        'price': 25.0,
-                        'category': '飲品'
-                    }
-                ])
-            elif 11 <= current_hour <= 14:  # 午餐時段
-                suggestions.extend([
-                    {
-                        'item': '今日特餐',
-                        'message': '午餐特價，經濟實惠！',
-                        'price': 35.0,
-                        'category': '特餐'
-                    }
-                ])
-            elif 14 <= current_hour <= 17:  # 下午茶時段
-                suggestions.extend([
-                    {
-                        'item': '下午茶套餐',
-                        'message': '下午茶時光，多士+飲品！',
-                        'price': 28.0,
-                        'category': '套餐'
-                    }
-                ])
-            
-            # 健康選擇建議
-            suggestions.extend([
-                {
-                    'item': '少糖選擇',
-                    'message': '關注健康？可選擇少糖或無糖！',
-                    'price': 0.0,
-                    'category': '健康'
-                },
-                {
-                    'item': '鮮榨果汁',
-                    'message': '新鮮現榨，維他命豐富！',
-                    'price': 28.0,
-                    'category': '健康'
-                }
-            ])
-            
-            # 去重並限制數量
-            seen = set()
-            unique_suggestions = []
-            for suggestion in suggestions:
-                key = suggestion['item']
-                if key not in seen:
-                    seen.add(key)
-                    unique_suggestions.append(suggestion)
-            
-            # 按類別和價格排序，限制數量
-            unique_suggestions.sort(key=lambda x: (x['category'], x['price']))
-            final_suggestions = unique_suggestions[:4]  # 最多4個建議
-            
-            return {
-                'suggestions': final_suggestions,
-                'total_suggestions': len(unique_suggestions),
-                'categories': list(set(s['category'] for s in final_suggestions))
-            }
+            return self.upselling.suggest(current_order)
             
         except Exception as e:
             logger.error(f"生成追加銷售建議錯誤: {e}")
@@ -841,18 +528,107 @@ class OpenRouterService:
                 'categories': ['加料']
             }
     
+    def _get_async_context(self) -> Tuple[AsyncOpenAI, asyncio.Semaphore]:
+        """
+        獲取異步客戶端及並發限制（只在 _llm_loop 中調用）
+        
+        所有異步請求共用這一個客戶端的連接池，信號量限制整個進程同時進行的 API 調用數。
+        """
+        if self._async_context is None:
+            client = AsyncOpenAI(
+                base_url=OPENROUTER_BASE_URL,
+                api_key=self.api_key,
+                timeout=10.0,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=self.max_concurrency,
+                        max_keepalive_connections=self.max_concurrency
+                    ),
+                    timeout=10.0
+                )
+            )
+            self._async_context = (client, asyncio.Semaphore(self.max_concurrency))
+        return self._async_context
+    
     async def parse_order(self, transcribed_text: str) -> Dict[str, Any]:
         """
         解析訂單內容（異步版本）
         
+        LLM 調用交給長期運行的循環線程，使用共享的 AsyncOpenAI 連接池，並以信號量
+        限制整個進程同時進行的 API 調用數；適用於 Flask 異步視圖或 ASGI 服務器。
+        
         Args:
             transcribed_text: 語音轉錄文字
             
         Returns:
             Dict: 結構化訂單數據
         """
-        # 目前使用同步版本
-        return self.parse_order_sync(transcribed_text)
+        started = time.perf_counter()
+        decision = None
+        try:
+            cache_key = self._make_cache_key(transcribed_text)
+            cached_result = self._get_cached_result(cache_key, transcribed_text)
+            if cached_result:
+                logger.info("使用緩存的解析結果")
+                return self._with_routing(cached_result, ROUTE_CACHE, started)
+            
+            if not self.api_key or self.api_key.startswith('test-'):
+                logger.info("使用本地解析（測試模式）")
+                result = self._parse_order_locally(transcribed_text)
+                if self.api_key:
+                    self._save_to_cache(cache_key, result)
+                return self._with_routing(result, ROUTE_LOCAL, started)
+            
+            local_result, decision = self._route_locally(transcribed_text)
+            if local_result is not None:
+                logger.info(f"使用本地解析（覆蓋率 {decision.coverage:.2f}）")
+                return self._with_routing(local_result, ROUTE_LOCAL, started, decision)
+            
+            logger.info(f"使用AI解析（OpenRouter 異步，{decision.reason}）")
+            result, shared = await self._llm_loop.arun(self._async_inflight.do(
+                cache_key, lambda: self._aparse_with_llm(transcribed_text, cache_key)
+            ))
+            # 合併的請求共用同一結果對象，每個調用方各自取得副本
+            result = copy.deepcopy(result)
+            if shared:
+                logger.info("合併到進行中的相同解析請求")
+                result = self._with_transcription(result, transcribed_text)
+            return self._with_routing(result, ROUTE_LLM, started, decision)
+            
+        except Exception as e:
+            logger.error(f"異步訂單解析錯誤: {e}")
+            logger.info("回退到本地解析")
+            return self._with_routing(self._parse_order_locally(transcribed_text), ROUTE_FALLBACK, started, decision)
+    
+    async def _aparse_with_llm(self, transcribed_text: str, cache_key: str) -> Dict[str, Any]:
+        """異步調用 OpenRouter 解析並寫入緩存"""
+        client, semaphore = self._get_async_context()
+        completion_kwargs = self._build_completion_kwargs(transcribed_text)
+        async with semaphore:
+            response = await client.chat.completions.create(**completion_kwargs)
+        
+        content = response.choices[0].message.content
+        logger.info("OpenRouter 回應已收到")
+        self._record_token_usage(completion_kwargs, getattr(response, 'usage', None))
+        
+        result = self._build_result_from_content(transcribed_text, content)
+        self._save_to_cache(cache_key, result)
+        return result
+    
+    async def _close_async_client(self):
+        """關閉異步客戶端（在 _llm_loop 中執行，之後的調用會重新創建）"""
+        context, self._async_context = self._async_context, None
+        if context is not None:
+            await context[0].close()
+    
+    async def aclose(self):
+        """關閉異步客戶端的連接池"""
+        await self._llm_loop.arun(self._close_async_client())
+    
+    def close(self):
+        """關閉異步客戶端並停止循環線程（進程退出時自動調用）"""
+        atexit.unregister(self.close)
+        self._llm_loop.close()
     
     async def generate_upselling(self, current_order: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -870,138 +646,3 @@ class OpenRouterService:
             "suggestions": [],
             "message": "功能尚未實現"
         }
-    
-    def create_order_prompt(self, text: str) -> str:
-        """
-        創建訂單解析的提示詞
-        
-        Args:
-            text: 語音轉錄文字
-            
-        Returns:
-            str: 格式化的提示詞
-        """
-        prompt = f"""
-你是一個專業的香港茶餐廳點餐系統AI助手。請精確解析以下語音轉錄的點餐內容，並返回結構化的訂單信息。
-
-語音轉錄內容："{text}"
-
-## 解析要求：
-
-### 1. 語言理解能力
-- 由於語音轉文字會不准確，所以如果出現不能理解的字眼你需要猜測在粵語中（同音字）大概的意思
-- 精通港式粵語表達和茶餐廳術語
-- 理解中英混合語言（如"一杯coffee"、"兩個sandwich"）
-- 識別數量詞（一杯、兩份、三個、半打等）
-- 理解溫度表達（凍、熱、室溫、少冰、走冰、正常冰）
-- 識別甜度要求（少甜、正常、甜、無糖、走糖）
-
-### 2. 常見茶餐廳項目識別
-**飲品類：**
-- 茶類：檸檬茶/檸茶/凍檸茶/熱檸茶、奶茶、絲襪奶茶、紅茶、綠茶
-- 咖啡類：咖啡、黑咖啡、白咖啡、鴛鴦（咖啡奶茶）
-- 果汁類：橙汁、蘋果汁、鮮榨果汁、檸檬汁
-- 汽水類：可樂、雪碧、芬達、梳打水
-- 特色飲品：檸檬蜜、薄荷茶、阿華田、好立克
-
-**主食類：**
-- 麵類：炒河、乾炒牛河、炒麵、撈麵、湯麵、雲吞麵、牛腩麵、叉燒麵
-- 飯類：白飯、炒飯、揚州炒飯、叉燒炒飯、牛肉炒飯
-- 多士類：牛油多士、花生醬多士、法式多士、西多士
-- 三明治類：火腿三明治、雞蛋三明治、總匯三明治
-
-**小食類：**
-- 薯條、雞翼、春卷、燒賣、魚蛋、腸粉
-
-### 3. 定制選項識別
-- **甜度：** 少甜、正常、甜、無糖、走糖、半糖
-- **冰塊：** 走冰、少冰、正常冰、多冰、室溫
-- **溫度：** 凍、熱、室溫、溫
-- **加料：** 加檸檬、加蜂蜜、加薄荷、加奶、走奶
-- **份量：** 大杯、中杯、小杯、加大、正常
-
-### 4. 數量識別
-- 中文數字：一、二、三、四、五、六、七、八、九、十
-- 阿拉伯數字：1、2、3、4、5、6、7、8、9、10
-- 量詞：杯、份、個、碗、碟、客、打、半打
-
-### 5. JSON 輸出格式
-請嚴格按照以下格式返回：
-
-```json
-{{
-  "items": [
-    {{
-      "name": "項目名稱",
-      "quantity": 數量,
-      "unit_price": 單價,
-      "customizations": {{
-        "甜度": "少甜/正常/甜/無糖",
-        "冰塊": "走冰/少冰/正常冰/多冰",
-        "溫度": "凍/熱/室溫",
-        "加料": "加檸檬/加蜂蜜等",
-        "份量": "大杯/中杯/小杯"
-      }}
-    }}
-  ],
-  "special_requests": ["特殊要求1", "特殊要求2"],
-  "total": 總價格,
-  "confidence": 0.0-1.0,
-  "clarification_needed": false,
-  "unclear_items": []
-}}
-```
-
-### 6. 價格參考（港幣）
-- 檸檬茶類：$18
-- 奶茶類：$22-25
-- 咖啡類：$22-28
-- 果汁類：$18-25
-- 汽水類：$15
-- 炒河/炒麵：$32-38
-- 炒飯類：$32-40
-- 多士類：$15-32
-- 三明治類：$25-38
-- 湯類：$12-18
-
-### 7. 錯誤處理
-- 如果無法識別某個項目，設置 "clarification_needed": true
-- 將不清楚的項目列在 "unclear_items" 中
-- 對於模糊的數量，默認為 1
-- 對於不確定的定制，不要添加到 customizations 中
-
-### 8. 解析例子
-**輸入：** "我要兩杯凍檸茶，一杯少甜走冰，一杯正常"
-**輸出：**
-```json
-{{
-  "items": [
-    {{
-      "name": "凍檸茶",
-      "quantity": 1,
-      "unit_price": 18.0,
-      "customizations": {{
-        "甜度": "少甜",
-        "冰塊": "走冰"
-      }}
-    }},
-    {{
-      "name": "凍檸茶", 
-      "quantity": 1,
-      "unit_price": 18.0,
-      "customizations": {{
-        "甜度": "正常"
-      }}
-    }}
-  ],
-  "special_requests": ["少甜走冰", "正常"],
-  "total": 36.0,
-  "confidence": 0.95,
-  "clarification_needed": false,
-  "unclear_items": []
-}}
-```
-
-請現在解析上述語音轉錄內容，並嚴格按照JSON格式返回結果。
-"""
-        return prompt
\ No newline at end of file
@@ -0,0 +1,386 @@
+"""
+訂單持久化存儲 - SQLite (WAL 模式)，後台線程分組提交寫入；多個 worker 共用同一數據庫文件
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from models.order import Order, OrderStatus
+
+logger = logging.getLogger(__name__)
+
+# 寫入失敗時的重試間隔（秒）；全部失敗後存儲進入失敗狀態（拒絕新的寫入），
+# 該批寫入保留在隊列頭部按最後一個間隔繼續重試，直到成功或關閉
+_RETRY_DELAYS = (0.05, 0.2, 1.0)
+
+# 隊列中的寫入項：(訂單ID, 狀態, 創建時間, 更新時間, 訂單 JSON)
+_Row = Tuple[str, str, str, str, str]
+
+# 按 updated_at 合併寫入：其他 worker 已提交較新版本時不覆蓋；seq 為提交順序，
+# 在 BEGIN IMMEDIATE 的寫鎖內分配，各 worker 按 seq 讀取彼此的修改
+_UPSERT_SQL = (
+    'INSERT INTO orders (id, status, created_at, updated_at, data, seq)'
+    ' VALUES (?, ?, ?, ?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM orders))'
+    ' ON CONFLICT (id) DO UPDATE SET'
+    ' status = excluded.status, updated_at = excluded.updated_at, data = excluded.data, seq = excluded.seq'
+    ' WHERE excluded.updated_at > orders.updated_at'
+)
+
+
+class OrderStoreError(RuntimeError):
+    """訂單存儲無法寫入（重試後仍然失敗）"""
+
+
+def sqlite_path_from_url(database_url: Optional[str]) -> Optional[str]:
+    """
+    從 DATABASE_URL 取得 SQLite 文件路徑
+
+    Args:
+        database_url: 例如 sqlite:///voice_ordering.db
+
+    Returns:
+        Optional[str]: 文件路徑；內存數據庫或非 SQLite 地址時為 None
+    """
+    prefix = 'sqlite:///'
+    if not database_url or not database_url.startswith(prefix):
+        return None
+    path = database_url[len(prefix):]
+    if not path or path == ':memory:':
+        return None
+    return path
+
+
+class SQLiteOrderRepository:
+    """
+    訂單持久化存儲
+
+    save 只序列化訂單並放入隊列，不等待磁盤；後台寫入線程把隊列中已累積的
+    寫入合併為一個事務提交（分組提交），同一訂單的多次寫入只保留最新一次。
+    讀取使用每線程獨立的連接，WAL 模式下讀寫互不阻塞；尚未提交的寫入會疊加
+    到讀取結果上，調用方總能讀到自己剛保存的訂單。
+    """
+
+    def __init__(self, path: str, batch_size: int = 256, synchronous: str = 'NORMAL',
+                 timeout: float = 5.0):
+        """
+        初始化存儲並啟動寫入線程
+
+        Args:
+            path: 數據庫文件路徑
+            batch_size: 每個事務最多提交的訂單數
+            synchronous: SQLite synchronous 設定（NORMAL 在 WAL 模式下只在檢查點同步磁盤，
+                FULL 則每次提交都同步）
+            timeout: 等待數據庫鎖的時間（秒）
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.synchronous = synchronous.upper()
+        self.timeout = timeout
+        self._local = threading.local()
+        self._queue: 'queue.Queue[Optional[_Row]]' = queue.Queue()
+        self._lock = threading.Lock()
+        self._committed = threading.Condition(self._lock)
+        self._enqueued = 0
+        self._done = 0
+        self._closed = False
+        # 已排隊但未提交的最新寫入（訂單ID → 寫入項）
+        self._pending: Dict[str, _Row] = {}
+        self._error: Optional[Exception] = None
+        self._stats = {'writes': 0, 'commits': 0, 'coalesced': 0, 'errors': 0, 'lost': 0, 'max_batch': 0}
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS orders ('
+            ' id TEXT PRIMARY KEY,'
+            ' status TEXT NOT NULL,'
+            ' created_at TEXT NOT NULL,'
+            ' updated_at TEXT NOT NULL,'
+            ' data TEXT NOT NULL,'
+            ' seq INTEGER NOT NULL DEFAULT 0)'
+        )
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(orders)')}
+        if 'seq' not in columns:
+            # 舊版數據庫沒有提交順序，按插入順序補上
+            conn.execute('ALTER TABLE orders ADD COLUMN seq INTEGER NOT NULL DEFAULT 0')
+            conn.execute('UPDATE orders SET seq = rowid')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_status_created_at ON orders (status, created_at)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders (created_at)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_seq ON orders (seq)')
+
+        self._thread = threading.Thread(target=self._write_loop, name='order-writer', daemon=True)
+        self._thread.start()
+        # 進程退出前寫完隊列中的訂單
+        atexit.register(self.close)
+        logger.info(f"訂單存儲已打開: {path}")
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f'PRAGMA synchronous={self.synchronous}')
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        """獲取當前線程的數據庫連接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+        return conn
+
+    def save(self, order: Order):
+        """
+        保存訂單（異步寫入，不等待提交）
+
+        訂單在調用線程中序列化，之後對訂單對象的修改不影響已排隊的寫入。
+
+        Args:
+            order: 訂單對象
+
+        Raises:
+            OrderStoreError: 存儲處於寫入失敗狀態或已關閉，訂單不會被保存
+        """
+        row = (
+            order.id,
+            order.status.value,
+            order.created_at.isoformat(),
+            order.updated_at.isoformat(),
+            json.dumps(order.to_dict(), ensure_ascii=False)
+        )
+        with self._lock:
+            if self._closed:
+                raise OrderStoreError("訂單存儲已關閉")
+            if self._error is not None:
+                raise OrderStoreError(f"訂單存儲寫入失敗: {self._error}")
+            # 在鎖內入隊，保證關閉標記之後不會再有寫入
+            self._enqueued += 1
+            self._pending[order.id] = row
+            self._queue.put(row)
+
+    def _next_batch(self) -> Optional[List[_Row]]:
+        """阻塞直到有寫入，再取出隊列中已累積的寫入（最多 batch_size 筆）"""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                row = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is None:
+                # 關閉標記留到本批提交之後處理
+                self._queue.put(None)
+                break
+            batch.append(row)
+        return batch
+
+    def _commit(self, conn: sqlite3.Connection, batch: List[_Row]):
+        """
+        在一個事務內寫入一批訂單（同一訂單只寫最新一次）
+
+        失敗時按 _RETRY_DELAYS 重試；重試用盡後進入失敗狀態並繼續重試，
+        寫入成功後恢復。只有關閉時仍無法寫入才放棄並記錄丟失的訂單。
+        """
+        latest: Dict[str, _Row] = {}
+        for row in batch:
+            latest[row[0]] = row
+        attempt = 0
+        while True:
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    conn.executemany(_UPSERT_SQL, latest.values())
+                    conn.execute('COMMIT')
+                except BaseException:
+                    conn.execute('ROLLBACK')
+                    raise
+            except sqlite3.Error as e:
+                attempt += 1
+                logger.warning(f"訂單寫入失敗（第 {attempt} 次）: {e}")
+                with self._lock:
+                    self._stats['errors'] += 1
+                    exhausted = attempt > len(_RETRY_DELAYS)
+                    if exhausted and self._error is None:
+                        self._error = e
+                        logger.error(f"訂單寫入重試 {len(_RETRY_DELAYS)} 次後仍失敗，停止接受新的寫入: {e}")
+                        # 喚醒 flush 的等待者
+                        self._committed.notify_all()
+                    # 關閉時已處於失敗狀態的不再重試
+                    give_up = self._closed and self._error is not None
+                if give_up:
+                    logger.error(f"訂單存儲關閉時仍無法寫入，{len(latest)} 筆訂單未保存: {list(latest)}")
+                    with self._lock:
+                        self._stats['lost'] += len(latest)
+                    return
+                time.sleep(_RETRY_DELAYS[min(attempt, len(_RETRY_DELAYS)) - 1])
+                continue
+
+            with self._lock:
+                if self._error is not None:
+                    logger.info("訂單寫入已恢復")
+                self._error = None
+                for order_id, row in latest.items():
+                    # 之後又排隊的寫入仍需疊加到讀取結果
+                    if self._pending.get(order_id) is row:
+                        del self._pending[order_id]
+                self._stats['writes'] += len(latest)
+                self._stats['commits'] += 1
+                self._stats['coalesced'] += len(batch) - len(latest)
+                self._stats['max_batch'] = max(self._stats['max_batch'], len(latest))
+            return
+
+    def _write_loop(self):
+        """後台寫入線程"""
+        conn = self._open()
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    break
+                self._commit(conn, batch)
+                with self._committed:
+                    self._done += len(batch)
+                    self._committed.notify_all()
+        finally:
+            conn.close()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待此前排隊的寫入全部提交
+
+        Args:
+            timeout: 最長等待時間（秒），None 表示一直等待
+
+        Returns:
+            bool: 是否在時限內完成
+
+        Raises:
+            OrderStoreError: 存儲處於寫入失敗狀態
+        """
+        with self._committed:
+            target = self._enqueued
+            done = self._committed.wait_for(lambda: self._done >= target or self._error is not None, timeout)
+            if self._error is not None:
+                raise OrderStoreError(f"訂單存儲寫入失敗: {self._error}")
+            return done
+
+    @property
+    def failed(self) -> bool:
+        """是否處於寫入失敗狀態"""
+        with self._lock:
+            return self._error is not None
+
+    def get(self, order_id: str) -> Optional[Order]:
+        """
+        讀取訂單（包括尚未提交的寫入）
+
+        Args:
+            order_id: 訂單ID
+
+        Returns:
+            Optional[Order]: 訂單對象或 None
+        """
+        with self._lock:
+            row = self._pending.get(order_id)
+        if row is not None:
+            return Order.from_dict(json.loads(row[4]))
+        row = self._connection().execute('SELECT data FROM orders WHERE id = ?', (order_id,)).fetchone()
+        return Order.from_dict(json.loads(row[0])) if row else None
+
+    def find(self, statuses: Optional[Iterable[OrderStatus]] = None, start: Optional[datetime] = None,
+             end: Optional[datetime] = None) -> List[Order]:
+        """
+        按狀態及創建時間查詢訂單（包括尚未提交的寫入）
+
+        Args:
+            statuses: 狀態列表，None 表示不限
+            start: 創建時間下限（包含），None 表示不限
+            end: 創建時間上限（不包含），None 表示不限
+
+        Returns:
+            List[Order]: 按創建時間排序的訂單列表
+        """
+        values = [status.value for status in statuses] if statuses is not None else None
+        low = start.isoformat() if start is not None else None
+        high = end.isoformat() if end is not None else None
+        clauses, params = [], []
+        if values is not None:
+            clauses.append(f"status IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        if low is not None:
+            clauses.append('created_at >= ?')
+            params.append(low)
+        if high is not None:
+            clauses.append('created_at < ?')
+            params.append(high)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+
+        # 先取未提交的寫入再查詢：期間提交的寫入至少出現在其中一邊
+        with self._lock:
+            pending = list(self._pending.values())
+        rows = {row[0]: row for row in self._connection().execute(
+            f'SELECT id, status, created_at, updated_at, data FROM orders{where}', params
+        )}
+        for row in pending:
+            stored = rows.get(row[0])
+            if stored is None or row[3] >= stored[3]:
+                rows[row[0]] = row
+        matched = sorted(
+            (row for row in rows.values()
+             if (values is None or row[1] in values)
+             and (low is None or row[2] >= low)
+             and (high is None or row[2] < high)),
+            key=lambda row: (row[2], row[0])
+        )
+        return [Order.from_dict(json.loads(row[4])) for row in matched]
+
+    def max_seq(self) -> int:
+        """已提交的最大提交順序號"""
+        return self._connection().execute('SELECT COALESCE(MAX(seq), 0) FROM orders').fetchone()[0]
+
+    def changed_since(self, seq: int, limit: int = 1000) -> List[Tuple[int, Order]]:
+        """
+        讀取提交順序在 seq 之後的訂單（包括其他 worker 提交的修改）
+
+        Args:
+            seq: 已讀取的最大提交順序號
+            limit: 最多返回的訂單數
+
+        Returns:
+            List[Tuple[int, Order]]: 按提交順序排序的 (提交順序號, 訂單)
+        """
+        rows = self._connection().execute(
+            'SELECT seq, data FROM orders WHERE seq > ? ORDER BY seq LIMIT ?', (seq, limit)
+        ).fetchall()
+        return [(row[0], Order.from_dict(json.loads(row[1]))) for row in rows]
+
+    def close(self, timeout: float = 10.0):
+        """寫完隊列中的訂單並停止寫入線程"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.error(f"訂單存儲關閉超時，仍有 {self._queue.qsize()} 筆寫入未提交")
+        atexit.unregister(self.close)
+
+    def stats(self) -> Dict[str, Any]:
+        """獲取寫入統計（failed 為 True 時新的寫入會被拒絕）"""
+        with self._lock:
+            stats = dict(self._stats, pending=self._enqueued - self._done, failed=self._error is not None,
+                         last_error=str(self._error) if self._error is not None else None)
+        stats['avg_batch'] = round(stats['writes'] / stats['commits'], 1) if stats['commits'] else 0.0
+        return stats
@@ -0,0 +1,346 @@
+"""
+本地訂單掃描器 - 單次掃描識別項目、數量及定制選項
+"""
+import re
+from dataclasses import dataclass, field
+from typing import AbstractSet, Dict, FrozenSet, List, Mapping, Optional, Sequence, Tuple
+
+from services.menu_catalog import KeywordAutomaton
+
+# 飲品類識別（項目名稱 → 關鍵詞）
+DRINK_PATTERNS: Dict[str, Tuple[str, ...]] = {
+    '檸檬茶': ('檸檬茶', '檸茶', '凍檸茶', '熱檸茶'),
+    '奶茶': ('奶茶', '絲襪奶茶', '港式奶茶'),
+    '咖啡': ('咖啡', '黑咖啡', '白咖啡'),
+    '鴛鴦': ('鴛鴦',),
+    '橙汁': ('橙汁', '鮮橙汁'),
+    '可樂': ('可樂', 'cola'),
+    '雪碧': ('雪碧', 'sprite'),
+    '檸檬蜜': ('檸檬蜜', '蜂蜜檸檬'),
+    '阿華田': ('阿華田',),
+    '好立克': ('好立克',),
+}
+
+# 主食類識別（項目名稱 → 關鍵詞）
+FOOD_PATTERNS: Dict[str, Tuple[str, ...]] = {
+    '乾炒牛河': ('乾炒牛河', '炒牛河'),
+    '炒河': ('炒河',),
+    '炒麵': ('炒麵',),
+    '雲吞麵': ('雲吞麵',),
+    '牛腩麵': ('牛腩麵',),
+    '叉燒麵': ('叉燒麵',),
+    '揚州炒飯': ('揚州炒飯',),
+    '叉燒炒飯': ('叉燒炒飯',),
+    '炒飯': ('炒飯',),
+    '牛油多士': ('牛油多士',),
+    '法式多士': ('法式多士',),
+    '多士': ('多士',),
+    '三明治': ('三明治', 'sandwich'),
+}
+
+# 定制選項及特殊要求關鍵詞
+MODIFIER_KEYWORDS: Tuple[str, ...] = (
+    '少甜', '無糖', '走糖', '甜', '半糖',
+    '走冰', '無冰', '少冰', '多冰',
+    '熱', '凍', '室溫',
+    '加檸檬', '加蜂蜜', '加薄荷', '加奶',
+    '大杯', '小杯', '中杯',
+)
+
+# 互斥的定制選項：關鍵詞 → (類別, 選項)；同一類別出現兩個不同選項時
+# 本地結果無法判斷各自屬於哪個項目（例如「熱奶茶」同「凍咖啡」）
+MODIFIER_GROUPS: Mapping[str, Tuple[str, str]] = {
+    '少甜': ('甜度', '少甜'), '無糖': ('甜度', '無糖'), '走糖': ('甜度', '無糖'),
+    '甜': ('甜度', '甜'), '半糖': ('甜度', '半糖'),
+    '走冰': ('冰塊', '走冰'), '無冰': ('冰塊', '走冰'), '少冰': ('冰塊', '少冰'), '多冰': ('冰塊', '多冰'),
+    '熱': ('溫度', '熱'), '凍': ('溫度', '凍'), '室溫': ('溫度', '室溫'),
+    '大杯': ('份量', '大杯'), '小杯': ('份量', '小杯'), '中杯': ('份量', '中杯'),
+}
+
+# 點餐常用的禮貌用語及連接詞（不影響訂單內容，計入覆蓋率）。只收多字詞組：
+# 「加」、「再」、「就得」等單字會改變句意，本地掃描不理解，不計入覆蓋率
+FILLER_KEYWORDS: Tuple[str, ...] = (
+    '我要', '我想要', '想要', '我想', '唔該', '麻煩', '麻煩你', '俾我', '畀我', '幫我',
+    '同埋', '仲有', '謝謝', '多謝', '一齊',
+)
+
+# 不計入覆蓋率的字符（空白及標點）
+_IGNORED_CHARS = frozenset(' \t\r\n，。、！？,.!?~～「」"\'：:；;')
+
+CHINESE_NUMBERS: Mapping[str, float] = {
+    '一': 1, '二': 2, '三': 3, '四': 4, '五': 5,
+    '六': 6, '七': 7, '八': 8, '九': 9, '十': 10,
+    '兩': 2, '半': 0.5
+}
+
+QUANTIFIERS = '杯份個碗碟客'
+
+
+@dataclass(frozen=True)
+class ItemSpan:
+    """掃描到的項目"""
+    name: str
+    keyword: str
+    start: int
+    end: int
+    quantity: float = 1
+
+
+@dataclass(frozen=True)
+class ScanResult:
+    """掃描結果"""
+    text: str
+    items: Tuple[ItemSpan, ...] = ()
+    modifiers: FrozenSet[str] = frozenset()
+    modifier_spans: Tuple[Tuple[int, int], ...] = ()
+    quantity_spans: Tuple[Tuple[int, int], ...] = ()
+    # 沒有歸屬任何項目的數量詞（例如重複的項目名稱前的數量）
+    unattached_quantity_spans: Tuple[Tuple[int, int], ...] = ()
+    customizations: Dict[str, str] = field(default_factory=dict)
+    special_requests: Tuple[str, ...] = ()
+    coverage: float = 0.0
+
+
+class OrderScanner:
+    """基於關鍵詞自動機的訂單掃描器，每個目錄只編譯一次"""
+
+    def __init__(self, item_patterns: Mapping[str, Sequence[str]],
+                 modifier_keywords: Sequence[str] = MODIFIER_KEYWORDS,
+                 filler_keywords: Sequence[str] = FILLER_KEYWORDS):
+        """
+        編譯掃描器
+
+        Args:
+            item_patterns: 項目名稱到關鍵詞列表的映射（順序即輸出順序）
+            modifier_keywords: 定制選項關鍵詞
+            filler_keywords: 語氣及連接詞（只用於計算覆蓋率）
+        """
+        self._group_order = {name: index for index, name in enumerate(item_patterns)}
+        keywords: List[str] = []
+        # 每個關鍵詞對應 (項目名稱 或 None, 是否為定制選項)
+        payloads: Dict[str, Tuple[Optional[str], bool]] = {}
+        for name, item_keywords in item_patterns.items():
+            for keyword in item_keywords:
+                if keyword not in payloads:
+                    payloads[keyword] = (name, False)
+                    keywords.append(keyword)
+        for keyword in modifier_keywords:
+            if keyword in payloads:
+                payloads[keyword] = (payloads[keyword][0], True)
+            else:
+                payloads[keyword] = (None, True)
+                keywords.append(keyword)
+
+        for keyword in filler_keywords:
+            if keyword not in payloads:
+                payloads[keyword] = (None, False)
+                keywords.append(keyword)
+
+        self._automaton = KeywordAutomaton(keywords)
+        self._payloads = tuple(payloads[keyword] for keyword in keywords)
+        self._quantity_re = re.compile(rf'([{"".join(CHINESE_NUMBERS)}]|\d+)([{QUANTIFIERS}]*)')
+
+    def scan(self, text: str) -> ScanResult:
+        """
+        單次掃描轉錄文字
+
+        Args:
+            text: 語音轉錄文字
+
+        Returns:
+            ScanResult: 項目、數量及定制選項
+        """
+        text_lower = text.lower()
+        patterns = self._automaton.patterns
+
+        # 1. 自動機掃描：收集項目候選及定制選項，並標記已識別的字符
+        candidates: List[Tuple[int, int, str, str]] = []
+        modifiers = set()
+        modifier_spans = []
+        covered = bytearray(len(text_lower))
+        # 定制選項佔用的字符：數量詞與項目之間隔著定制選項（「三杯凍奶茶」）時仍然相鄰
+        modifier_covered = bytearray(len(text_lower))
+        for start, pattern_id in self._automaton.iter_matches(text_lower):
+            keyword = patterns[pattern_id]
+            end = start + len(keyword)
+            covered[start:end] = b'\x01' * len(keyword)
+            item_name, is_modifier = self._payloads[pattern_id]
+            if item_name is not None:
+                candidates.append((start, -len(keyword), item_name, keyword))
+            if is_modifier:
+                modifiers.add(keyword)
+                modifier_spans.append((start, end))
+                modifier_covered[start:end] = b'\x01' * len(keyword)
+
+        # 2. 最左最長、互不重疊地選取項目
+        candidates.sort()
+        spans: List[Tuple[int, int, str, str]] = []
+        cursor = 0
+        for start, neg_length, item_name, keyword in candidates:
+            if start >= cursor:
+                cursor = start - neg_length
+                spans.append((start, cursor, item_name, keyword))
+
+        # 3. 數量詞（排除落在關鍵詞內的數字，如「三明治」、「半糖」）
+        quantities = []
+        for match in self._quantity_re.finditer(text_lower):
+            if covered[match.start()]:
+                continue
+            quantities.append((match.start(), match.end(), match.group(1), bool(match.group(2))))
+            covered[match.start():match.end()] = b'\x01' * (match.end() - match.start())
+        quantity_by_end = {end: index for index, (_, end, _, _) in enumerate(quantities)}
+        # 項目後的數量必須帶量詞（「奶茶兩杯」）
+        quantity_by_start = {start: index for index, (start, _, _, classified) in enumerate(quantities) if classified}
+
+        def is_gap(index: int) -> bool:
+            """數量詞與項目之間可以跳過的字符：定制選項、空白及標點"""
+            return bool(modifier_covered[index]) or text_lower[index] in _IGNORED_CHARS
+
+        # 4. 每個項目名稱取第一次出現；數量先取緊接在前面的，再取緊接在後面的
+        first_spans = []
+        seen = set()
+        for span in spans:
+            if span[2] not in seen:
+                seen.add(span[2])
+                first_spans.append(span)
+        attached: Dict[str, int] = {}
+        for start, _, item_name, _ in first_spans:
+            while start > 0 and is_gap(start - 1):
+                start -= 1
+            index = quantity_by_end.get(start)
+            if index is not None:
+                attached[item_name] = index
+        claimed = set(attached.values())
+        for _, end, item_name, _ in first_spans:
+            if item_name in attached:
+                continue
+            while end < len(text_lower) and is_gap(end):
+                end += 1
+            index = quantity_by_start.get(end)
+            if index is not None and index not in claimed:
+                attached[item_name] = index
+                claimed.add(index)
+
+        items: Dict[str, ItemSpan] = {}
+        for start, end, item_name, keyword in first_spans:
+            index = attached.get(item_name)
+            value = quantities[index][2] if index is not None else None
+            items[item_name] = ItemSpan(item_name, keyword, start, end, self._to_quantity(value))
+
+        ordered_items = sorted(items.values(), key=lambda item: self._group_order[item.name])
+        return ScanResult(
+            text=text,
+            items=tuple(ordered_items),
+            modifiers=frozenset(modifiers),
+            modifier_spans=tuple(modifier_spans),
+            quantity_spans=tuple((start, end) for start, end, _, _ in quantities),
+            unattached_quantity_spans=tuple(
+                (start, end) for index, (start, end, _, _) in enumerate(quantities) if index not in claimed
+            ),
+            customizations=build_customizations(modifiers),
+            special_requests=build_special_requests(modifiers),
+            coverage=self._coverage(text_lower, covered),
+        )
+
+    @staticmethod
+    def _coverage(text: str, covered: bytearray) -> float:
+        """計算已識別字符佔有效字符（不含空白及標點）的比例"""
+        total = 0
+        hits = 0
+        for char, flag in zip(text, covered):
+            if char in _IGNORED_CHARS:
+                continue
+            total += 1
+            hits += flag
+        return hits / total if total else 0.0
+
+    @staticmethod
+    def _to_quantity(value: Optional[str]) -> float:
+        """將數量詞轉換為數字"""
+        if value is None:
+            return 1
+        if value in CHINESE_NUMBERS:
+            return CHINESE_NUMBERS[value]
+        return int(value)
+
+
+def build_customizations(modifiers: AbstractSet[str]) -> Dict[str, str]:
+    """
+    根據掃描到的定制關鍵詞生成定制選項
+
+    Args:
+        modifiers: 文本中出現的定制關鍵詞集合
+
+    Returns:
+        Dict[str, str]: 定制選項
+    """
+    customizations = {}
+
+    # 甜度
+    if '少甜' in modifiers:
+        customizations['甜度'] = '少甜'
+    elif '無糖' in modifiers or '走糖' in modifiers:
+        customizations['甜度'] = '無糖'
+    elif '甜' in modifiers:
+        customizations['甜度'] = '甜'
+    elif '半糖' in modifiers:
+        customizations['甜度'] = '半糖'
+
+    # 冰塊
+    if '走冰' in modifiers or '無冰' in modifiers:
+        customizations['冰塊'] = '走冰'
+    elif '少冰' in modifiers:
+        customizations['冰塊'] = '少冰'
+    elif '多冰' in modifiers:
+        customizations['冰塊'] = '多冰'
+
+    # 溫度
+    if '熱' in modifiers:
+        customizations['溫度'] = '熱'
+    elif '凍' in modifiers:
+        customizations['溫度'] = '凍'
+    elif '室溫' in modifiers:
+        customizations['溫度'] = '室溫'
+
+    # 加料
+    add_ons = [name for name in ('檸檬', '蜂蜜', '薄荷', '奶') if f'加{name}' in modifiers]
+    if add_ons:
+        customizations['加料'] = ','.join(add_ons)
+
+    # 份量
+    for size in ('大杯', '小杯', '中杯'):
+        if size in modifiers:
+            customizations['份量'] = size
+            break
+
+    return customizations
+
+
+def build_special_requests(modifiers: AbstractSet[str]) -> Tuple[str, ...]:
+    """
+    根據掃描到的定制關鍵詞生成特殊要求列表
+
+    Args:
+        modifiers: 文本中出現的定制關鍵詞集合
+
+    Returns:
+        Tuple[str, ...]: 特殊要求
+    """
+    special_requests = []
+    if '少甜' in modifiers:
+        special_requests.append('少甜')
+    if '走冰' in modifiers or '無冰' in modifiers:
+        special_requests.append('走冰')
+    if '加檸檬' in modifiers:
+        special_requests.append('加檸檬')
+    if '加蜂蜜' in modifiers:
+        special_requests.append('加蜂蜜')
+    if '熱' in modifiers:
+        special_requests.append('要熱的')
+    if '大杯' in modifiers:
+        special_requests.append('大杯')
+    return tuple(special_requests)
+
+
+# 默認掃描器（模塊載入時編譯）
+default_scanner = OrderScanner({**DRINK_PATTERNS, **FOOD_PATTERNS})
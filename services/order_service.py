@@ -1,20 +1,95 @@
 """
 訂單管理服務
 """
+import bisect
+import itertools
 import logging
-from typing import List, Optional, Dict, Any
-from models.order import Order, OrderStatus, OrderItem
+import threading
+import uuid
+from collections import deque
+from dataclasses import replace
+from typing import Deque, List, Optional, Dict, Any, Tuple
+from models.order import Order, OrderEvent, OrderEventType, OrderStatus, OrderItem
+from services.order_repository import OrderStoreError, SQLiteOrderRepository
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# 活躍狀態（非已送達和已取消）
+ACTIVE_STATUSES = (
+    OrderStatus.PENDING,
+    OrderStatus.CONFIRMED,
+    OrderStatus.PREPARING,
+    OrderStatus.READY
+)
+
+# 索引鍵：按創建時間排序，相同時間按 ID
+OrderKey = Tuple[datetime, str]
+
+# 訂單鎖分段數：同一訂單的修改串行，不同訂單的修改（含序列化寫入）並行
+LOCK_STRIPES = 64
+
+
+def _order_key(order: Order) -> OrderKey:
+    return (order.created_at, order.id)
+
+
 class OrderService:
-    """訂單管理服務類"""
+    """
+    訂單管理服務類（可在多線程中共用）
+    
+    訂單對象一經存入即不再修改：狀態更新會以新對象替換，已返回給調用方的
+    訂單不會被其他線程改動。修改同一訂單時持有其分段鎖；訂單字典及索引只在
+    短暫持有的 _lock 內更新，查詢看到的字典與索引始終一致。
+    
+    有持久化存儲時以數據庫為準：內存只保存活躍訂單，已送達及已取消的訂單
+    移出內存，查詢時從數據庫讀取；後台線程按提交順序讀取其他 worker 寫入的
+    修改，合併到內存並記錄為變更。
+    """
     
-    def __init__(self):
-        """初始化訂單服務"""
-        # 使用內存存儲作為佔位符，實際實現將使用數據庫
+    def __init__(self, repository: Optional[SQLiteOrderRepository] = None,
+                 event_log_size: int = 10000, sync_interval: float = 1.0):
+        """
+        初始化訂單服務
+        
+        Args:
+            repository: 持久化存儲；None 表示全部訂單只保存在內存（例如測試環境）
+            event_log_size: 保留的變更記錄數，落後更多的客戶端需重新載入全部活躍訂單
+            sync_interval: 讀取其他 worker 修改的間隔（秒），0 表示不讀取
+        """
+        # 活躍訂單的查詢由內存及索引完成（沒有存儲時包括全部訂單）
         self.orders: Dict[str, Order] = {}
+        # 二級索引：狀態 → 按創建時間排序的訂單鍵；內存中的訂單按創建時間排序
+        # 沒有存儲時已送達及已取消的訂單不會刪除，查詢活躍訂單只讀取活躍狀態的索引
+        self._status_index: Dict[OrderStatus, List[OrderKey]] = {status: [] for status in OrderStatus}
+        self._created_index: List[OrderKey] = []
+        self._lock = threading.Lock()
+        self._stripes = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self.repository = repository
+        
+        # 變更記錄：每次創建或狀態更新版本號加一；epoch 區分進程，重啟後客戶端需重新載入
+        self.version = 0
+        self.epoch = uuid.uuid4().hex[:8]
+        self._events: Deque[OrderEvent] = deque(maxlen=event_log_size)
+        self._changed = threading.Condition(self._lock)
+        
+        self.sync_interval = sync_interval
+        self._synced_seq = 0
+        self._stop = threading.Event()
+        self._sync_thread = None
+        if repository is not None:
+            # 先記下提交順序再載入：載入期間提交的修改由同步線程補上
+            self._synced_seq = repository.max_seq()
+            # find 已按創建時間排序，直接追加即保持索引有序
+            for order in repository.find(ACTIVE_STATUSES):
+                key = _order_key(order)
+                self.orders[order.id] = order
+                self._status_index[order.status].append(key)
+                self._created_index.append(key)
+            logger.info(f"已從存儲載入 {len(self.orders)} 筆活躍訂單")
+            if sync_interval > 0:
+                self._sync_thread = threading.Thread(target=self._sync_loop, name='order-sync', daemon=True)
+                self._sync_thread.start()
         logger.info("訂單服務初始化完成")
     
     def create_order(self, order_data: Dict[str, Any]) -> Order:
@@ -48,8 +123,18 @@ class OrderService:
                 confidence_score=order_data.get('confidence_score', 0.0)
             )
             
-            # 存儲訂單
-            self.orders[order.id] = order
+            # 存儲訂單並更新索引
+            key = _order_key(order)
+            with self._stripe(order.id):
+                # 持有分段鎖排隊寫入，同一訂單的寫入順序與修改順序一致；
+                # 存儲無法寫入時拋出 OrderStoreError，訂單不加入內存
+                if self.repository is not None:
+                    self.repository.save(order)
+                with self._lock:
+                    self.orders[order.id] = order
+                    bisect.insort(self._status_index[order.status], key)
+                    bisect.insort(self._created_index, key)
+                    self._record(OrderEventType.CREATED, order)
             
             logger.info(f"訂單創建成功: {order.id}")
             return order
@@ -68,7 +153,11 @@ class OrderService:
         Returns:
             Optional[Order]: 訂單對象或None
         """
-        return self.orders.get(order_id)
+        order = self.orders.get(order_id)
+        if order is None and self.repository is not None:
+            # 已完成的訂單或其他 worker 剛創建、尚未同步的訂單
+            order = self.repository.get(order_id)
+        return order
     
     def update_order_status(self, order_id: str, status: OrderStatus) -> bool:
         """
@@ -80,21 +169,156 @@ class OrderService:
             
         Returns:
             bool: 更新是否成功
+            
+        Raises:
+            OrderStoreError: 存儲無法寫入，狀態未更新
         """
         try:
-            order = self.orders.get(order_id)
+            with self._stripe(order_id):
+                order = self.get_order(order_id)
+                if order:
+                    updated = replace(order, status=status, updated_at=datetime.now())
+                    if self.repository is not None:
+                        self.repository.save(updated)
+                    with self._lock:
+                        self._replace(order_id, updated)
+                        self._record(OrderEventType.STATUS_CHANGED, updated)
             if order:
-                order.status = status
-                order.updated_at = datetime.now()
                 logger.info(f"訂單 {order_id} 狀態更新為 {status.value}")
                 return True
             else:
                 logger.warning(f"訂單 {order_id} 不存在")
                 return False
+        except OrderStoreError:
+            raise
         except Exception as e:
             logger.error(f"更新訂單狀態失敗: {e}")
             return False
     
+    def _replace(self, order_id: str, updated: Order):
+        """
+        以新版本替換內存中的訂單並更新索引（調用方須持有 _lock）
+        
+        狀態與索引在同一鎖內更新，查詢不會看到訂單同時在兩個狀態或都不在；
+        有存儲時已完成的訂單移出內存。
+        """
+        current = self.orders.pop(order_id, None)
+        if current is not None:
+            key = _order_key(current)
+            self._index_remove(self._status_index[current.status], key)
+            self._index_remove(self._created_index, key)
+        if self.repository is None or updated.status in ACTIVE_STATUSES:
+            key = _order_key(updated)
+            self.orders[order_id] = updated
+            bisect.insort(self._status_index[updated.status], key)
+            bisect.insort(self._created_index, key)
+    
+    def _sync_loop(self):
+        """後台同步線程"""
+        while not self._stop.wait(self.sync_interval):
+            try:
+                self.sync()
+            except Exception as e:
+                logger.warning(f"同步訂單修改失敗: {e}")
+    
+    def sync(self) -> int:
+        """
+        讀取存儲中其他 worker 提交的修改，合併到內存並記錄為變更
+        
+        Returns:
+            int: 合併的訂單數
+        """
+        applied = 0
+        while True:
+            changes = self.repository.changed_since(self._synced_seq)
+            for seq, order in changes:
+                applied += self._apply_stored(order)
+                self._synced_seq = seq
+            if len(changes) < 1000:
+                return applied
+    
+    def _apply_stored(self, stored: Order) -> bool:
+        """合併存儲中的訂單版本（比內存中的舊則忽略）"""
+        with self._stripe(stored.id):
+            current = self.orders.get(stored.id)
+            if current is None:
+                if stored.status not in ACTIVE_STATUSES:
+                    return False
+                # 不在內存中：可能是本 worker 剛完成、尚未提交的訂單，以最新寫入為準
+                latest = self.repository.get(stored.id)
+                if latest is not None and latest.updated_at > stored.updated_at:
+                    stored = latest
+                    if stored.status not in ACTIVE_STATUSES:
+                        return False
+            elif stored.updated_at <= current.updated_at:
+                return False
+            with self._lock:
+                self._replace(stored.id, stored)
+                event_type = OrderEventType.STATUS_CHANGED if current is not None else OrderEventType.CREATED
+                self._record(event_type, stored)
+            return True
+    
+    def close(self):
+        """停止同步線程"""
+        self._stop.set()
+        if self._sync_thread is not None:
+            self._sync_thread.join()
+    
+    def _record(self, event_type: OrderEventType, order: Order):
+        """記錄變更並喚醒等待中的訂閱者（調用方須持有 _lock）"""
+        self.version += 1
+        self._events.append(OrderEvent(self.version, event_type, order))
+        self._changed.notify_all()
+    
+    def get_changes_since(self, since: int) -> Tuple[int, Optional[List[OrderEvent]]]:
+        """
+        獲取指定版本之後的變更
+        
+        Args:
+            since: 客戶端已處理的版本號
+            
+        Returns:
+            Tuple[int, Optional[List[OrderEvent]]]: (當前版本, 按版本排序的變更)；
+            版本號無效或變更記錄已被淘汰時變更為 None，客戶端需重新載入全部活躍訂單
+        """
+        with self._lock:
+            missing = self.version - since
+            if missing < 0 or missing > len(self._events):
+                return self.version, None
+            # 變更記錄的版本號連續，只需從尾部取出缺少的部分
+            events = list(itertools.islice(reversed(self._events), missing))
+            events.reverse()
+            return self.version, events
+    
+    def wait_for_changes(self, since: int, timeout: Optional[float] = None) -> bool:
+        """
+        等待版本號超過 since
+        
+        Args:
+            since: 客戶端已處理的版本號
+            timeout: 最長等待時間（秒）
+            
+        Returns:
+            bool: 是否有新變更
+        """
+        with self._changed:
+            return self._changed.wait_for(lambda: self.version != since, timeout)
+    
+    def _stripe(self, order_id: str) -> threading.Lock:
+        """訂單所屬的分段鎖"""
+        return self._stripes[hash(order_id) % LOCK_STRIPES]
+    
+    @staticmethod
+    def _index_remove(index: List[OrderKey], key: OrderKey):
+        """從排序索引中移除訂單鍵"""
+        position = bisect.bisect_left(index, key)
+        if position < len(index) and index[position] == key:
+            del index[position]
+    
+    def _resolve(self, keys) -> List[Order]:
+        """把索引鍵轉換為訂單對象"""
+        return [self.orders[order_id] for _, order_id in keys]
+    
     def get_orders_by_status(self, status: OrderStatus) -> List[Order]:
         """
         根據狀態獲取訂單列表
@@ -103,24 +327,52 @@ class OrderService:
             status: 訂單狀態
             
         Returns:
-            List[Order]: 符合條件的訂單列表
+            List[Order]: 符合條件的訂單列表（按創建時間排序）
         """
-        return [order for order in self.orders.values() if order.status == status]
+        if self.repository is not None and status not in ACTIVE_STATUSES:
+            return self.repository.find([status])
+        with self._lock:
+            return self._resolve(self._status_index[status])
     
     def get_active_orders(self) -> List[Order]:
         """
         獲取活躍訂單（非已送達和已取消）
         
+        只讀取活躍狀態的索引，耗時與活躍訂單數成正比，與歷史訂單數無關。
+        
+        Returns:
+            List[Order]: 活躍訂單列表（按創建時間排序）
+        """
+        return self.get_active_snapshot()[1]
+    
+    def get_active_snapshot(self) -> Tuple[int, List[Order]]:
+        """
+        獲取活躍訂單及對應的版本號（同一時刻）
+        
         Returns:
-            List[Order]: 活躍訂單列表
-        """
-        active_statuses = [
-            OrderStatus.PENDING,
-            OrderStatus.CONFIRMED,
-            OrderStatus.PREPARING,
-            OrderStatus.READY
-        ]
-        return [
-            order for order in self.orders.values()
-            if order.status in active_statuses
-        ]
\ No newline at end of file
+            Tuple[int, List[Order]]: (版本號, 按創建時間排序的活躍訂單)
+        """
+        with self._lock:
+            # 各狀態索引已排序，timsort 合併有序段比 heapq.merge 快，縮短持鎖時間
+            keys = sorted(itertools.chain(*(self._status_index[status] for status in ACTIVE_STATUSES)))
+            return self.version, self._resolve(keys)
+    
+    def get_orders_created_between(self, start: Optional[datetime] = None,
+                                   end: Optional[datetime] = None) -> List[Order]:
+        """
+        獲取在指定時間範圍內創建的訂單
+        
+        Args:
+            start: 開始時間（包含），None 表示不限
+            end: 結束時間（不包含），None 表示不限
+            
+        Returns:
+            List[Order]: 按創建時間排序的訂單列表
+        """
+        if self.repository is not None:
+            # 已完成的訂單只在數據庫中
+            return self.repository.find(start=start, end=end)
+        with self._lock:
+            low = bisect.bisect_left(self._created_index, (start, '')) if start else 0
+            high = bisect.bisect_left(self._created_index, (end, '')) if end else len(self._created_index)
+            return self._resolve(self._created_index[low:high])
@@ -0,0 +1,149 @@
+"""
+訂單解析路由 - 本地優先，按覆蓋率決定是否調用 LLM
+"""
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from services.order_scanner import MODIFIER_GROUPS, ScanResult
+
+ROUTE_LOCAL = 'local'
+ROUTE_LLM = 'llm'
+ROUTE_CACHE = 'cache'
+ROUTE_FALLBACK = 'fallback'
+
+# 否定詞：出現在已識別的定制選項（走冰、無糖等）以外時，例如「唔要甜」，
+# 本地掃描只看到「甜」，結果會與顧客要求相反
+NEGATION_CHARS = frozenset('唔冇不無沒走別')
+# 含否定字但不表示否定的詞
+_NEGATION_SAFE_WORDS = ('唔該',)
+
+
+def has_unhandled_negation(scan: ScanResult) -> bool:
+    """
+    是否含有本地掃描未處理的否定詞
+
+    Args:
+        scan: 本地掃描結果
+
+    Returns:
+        bool: 否定詞不在任何已識別的定制選項或禮貌用語內時為 True
+    """
+    text = scan.text.lower()
+    handled = bytearray(len(text))
+    for start, end in scan.modifier_spans:
+        handled[start:end] = b'\x01' * (end - start)
+    for word in _NEGATION_SAFE_WORDS:
+        start = text.find(word)
+        while start != -1:
+            handled[start:start + len(word)] = b'\x01' * len(word)
+            start = text.find(word, start + len(word))
+    return any(char in NEGATION_CHARS and not handled[index] for index, char in enumerate(text))
+
+
+def has_conflicting_modifiers(scan: ScanResult) -> bool:
+    """
+    是否含有互斥的定制選項（例如同時有「熱」和「凍」）
+
+    本地結果把同一組定制選項套用到所有項目，互斥的選項無法分配到各自的項目。
+    包含在較長選項內的匹配（「少甜」中的「甜」）不計算。
+
+    Args:
+        scan: 本地掃描結果
+
+    Returns:
+        bool: 同一類別出現兩個不同選項時為 True
+    """
+    text = scan.text.lower()
+    chosen: Dict[str, str] = {}
+    for start, end in scan.modifier_spans:
+        if any(other_start <= start and end <= other_end and (other_start, other_end) != (start, end)
+               for other_start, other_end in scan.modifier_spans):
+            continue
+        group = MODIFIER_GROUPS.get(text[start:end])
+        if group is None:
+            continue
+        if chosen.setdefault(group[0], group[1]) != group[1]:
+            return True
+    return False
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    """路由決定"""
+    route: str
+    coverage: float
+    reason: str
+
+
+class ParseRouter:
+    """
+    本地優先的解析路由
+
+    本地掃描器識別出項目，且已識別字符（項目、數量、定制及語氣詞）
+    覆蓋率達到閾值時直接使用本地結果，否則交給 LLM。含有未處理的否定詞、
+    沒有歸屬項目的數量詞或互斥的定制選項時，不論覆蓋率都交給 LLM。本地結果
+    把定制選項套用到所有項目，因此多個項目帶定制選項時也交給 LLM。
+    """
+
+    def __init__(self, threshold: float = 0.9):
+        """
+        初始化路由
+
+        Args:
+            threshold: 本地結果的最低覆蓋率（大於 1 表示總是使用 LLM）
+        """
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+        self._latency_ms: Dict[str, float] = {}
+
+    def decide(self, scan: ScanResult) -> RouteDecision:
+        """
+        根據掃描結果決定路由
+
+        Args:
+            scan: 本地掃描結果
+
+        Returns:
+            RouteDecision: 路由決定
+        """
+        if not scan.items:
+            return RouteDecision(ROUTE_LLM, scan.coverage, 'no_items')
+        if scan.coverage < self.threshold:
+            return RouteDecision(ROUTE_LLM, scan.coverage, 'low_coverage')
+        if has_unhandled_negation(scan):
+            return RouteDecision(ROUTE_LLM, scan.coverage, 'negation')
+        if scan.unattached_quantity_spans:
+            return RouteDecision(ROUTE_LLM, scan.coverage, 'unattached_quantity')
+        if has_conflicting_modifiers(scan):
+            return RouteDecision(ROUTE_LLM, scan.coverage, 'conflicting_modifiers')
+        if len(scan.items) > 1 and scan.customizations:
+            return RouteDecision(ROUTE_LLM, scan.coverage, 'shared_modifiers')
+        return RouteDecision(ROUTE_LOCAL, scan.coverage, 'covered')
+
+    def record(self, route: str, latency_ms: float):
+        """
+        記錄一次請求的路由及耗時
+
+        Args:
+            route: 實際使用的路由
+            latency_ms: 整個解析耗時（毫秒）
+        """
+        with self._lock:
+            self._counts[route] = self._counts.get(route, 0) + 1
+            self._latency_ms[route] = self._latency_ms.get(route, 0.0) + latency_ms
+
+    def stats(self) -> Dict[str, Any]:
+        """獲取各路由的請求數及平均耗時"""
+        with self._lock:
+            return {
+                'threshold': self.threshold,
+                'routes': {
+                    route: {
+                        'count': count,
+                        'avg_latency_ms': round(self._latency_ms[route] / count, 3)
+                    }
+                    for route, count in self._counts.items()
+                }
+            }
@@ -0,0 +1,158 @@
+"""
+提示詞構建 - 固定系統前綴、緊湊菜單及 token 統計
+"""
+import math
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+from services.menu_catalog import PRICE_ITEMS
+
+# 粗略 token 估算：CJK 字符每字約 1 token，其餘文字約 4 字符 1 token
+_CJK_RE = re.compile(r'[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]')
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def build_menu_section() -> str:
+    """
+    由價格表生成緊湊的菜單段落（同價項目合併為一行）
+
+    Returns:
+        str: 例如 "18:檸檬茶/凍檸茶/..."，每個價格一行
+    """
+    by_price: Dict[float, List[str]] = {}
+    for name, price in PRICE_ITEMS:
+        by_price.setdefault(price, []).append(name)
+    return '\n'.join(
+        f"{price:g}:{'/'.join(names)}" for price, names in sorted(by_price.items())
+    )
+
+
+_RULES = """你是香港茶餐廳點餐AI。解析顧客粵語語音轉錄（可能有同音錯字，請按粵語讀音推斷；可能中英夾雜），只輸出JSON。
+規則：數量不明確時為1；未列出的項目按同類估價；無法識別時 clarification_needed=true 並列入 unclear_items；不確定的定制不要填。
+定制選項：甜度=少甜/正常/甜/無糖/半糖；冰塊=走冰/少冰/正常冰/多冰；溫度=凍/熱/室溫；加料=加檸檬/加蜂蜜/加薄荷/加奶/走奶；份量=大杯/中杯/小杯。
+量詞：杯份個碗碟客；中文數字及阿拉伯數字均可。"""
+
+_ORDER_SCHEMA = """輸出格式：
+{"items":[{"name":"凍檸茶","quantity":1,"unit_price":18.0,"customizations":{"甜度":"少甜"}}],"special_requests":["少甜"],"total":18.0,"confidence":0.95,"clarification_needed":false,"unclear_items":[]}"""
+
+_UPSELLING_SCHEMA = """輸出格式：
+{"success":true,"order":{"items":[{"name":"凍檸茶","quantity":1,"unit_price":18.0,"customizations":{"甜度":"少甜"},"special_requirements":["少甜"],"category":"飲品"}],"total_price":18.0,"special_requests":["少甜"],"confidence":0.95,"clarification_needed":false},"upselling":{"suggestions":[{"item":"牛油多士","reason":"經典配搭","price":18.0}]},"original_text":"原文"}
+加購建議：只點飲品→推薦小食/多士；只點主食→推薦飲品/例湯；消費滿$50→推薦甜品或升級套餐。"""
+
+
+class PromptBuilder:
+    """
+    訂單解析提示詞構建器
+
+    系統提示詞在構建時生成一次，之後每次請求逐字節相同，
+    以便服務商進行前綴緩存；每次請求只有用戶消息改變。
+    """
+
+    def __init__(self, include_upselling: bool = False):
+        """
+        初始化構建器
+
+        Args:
+            include_upselling: 是否要求模型同時返回追加銷售建議
+        """
+        schema = _UPSELLING_SCHEMA if include_upselling else _ORDER_SCHEMA
+        self.system_prompt = f"{_RULES}\n{schema}\n菜單價格(HK$):\n{build_menu_section()}"
+        self.system_tokens = estimate_tokens(self.system_prompt)
+
+    def build_messages(self, text: str) -> List[Dict[str, str]]:
+        """
+        構建聊天消息
+
+        Args:
+            text: 語音轉錄文字
+
+        Returns:
+            List[Dict[str, str]]: system + user 消息
+        """
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": f"轉錄：{text}"}
+        ]
+
+    def count_prompt_tokens(self, messages: List[Dict[str, str]]) -> int:
+        """估算一組消息的提示 token 數"""
+        return sum(estimate_tokens(message['content']) + _MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文字的 token 數（不依賴特定模型的分詞器）
+
+    Args:
+        text: 文字
+
+    Returns:
+        int: 估算的 token 數
+    """
+    cjk_count = len(_CJK_RE.findall(text))
+    return cjk_count + math.ceil((len(text) - cjk_count) / 4)
+
+
+class TokenAccountant:
+    """按請求累計提示及完成 token 數（線程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.estimated_prompt_tokens = 0
+        # API 返回的用量只在部分響應中出現，分別記錄總數及次數
+        self.prompt_tokens = 0
+        self.reported_prompt_requests = 0
+        self.completion_tokens = 0
+        self.reported_completion_requests = 0
+        self.last: Dict[str, Any] = {}
+
+    def record(self, estimated_prompt_tokens: int, usage: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        記錄一次請求的 token 用量
+
+        Args:
+            estimated_prompt_tokens: 本地估算的提示 token 數
+            usage: API 返回的 usage 對象（可選，含 prompt_tokens/completion_tokens）
+
+        Returns:
+            Dict[str, Any]: 本次請求的 token 統計
+        """
+        prompt_tokens = getattr(usage, 'prompt_tokens', None) if usage is not None else None
+        completion_tokens = getattr(usage, 'completion_tokens', None) if usage is not None else None
+        entry = {
+            'estimated_prompt_tokens': estimated_prompt_tokens,
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens
+        }
+        with self._lock:
+            self.requests += 1
+            self.estimated_prompt_tokens += estimated_prompt_tokens
+            if prompt_tokens is not None:
+                self.prompt_tokens += prompt_tokens
+                self.reported_prompt_requests += 1
+            if completion_tokens is not None:
+                self.completion_tokens += completion_tokens
+                self.reported_completion_requests += 1
+            self.last = entry
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        """獲取累計統計"""
+        def average(total: int, count: int) -> Optional[float]:
+            return round(total / count, 1) if count else None
+
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'estimated_prompt_tokens': self.estimated_prompt_tokens,
+                'avg_estimated_prompt_tokens': average(self.estimated_prompt_tokens, self.requests),
+                'prompt_tokens': self.prompt_tokens,
+                'reported_prompt_requests': self.reported_prompt_requests,
+                'avg_prompt_tokens': average(self.prompt_tokens, self.reported_prompt_requests),
+                'completion_tokens': self.completion_tokens,
+                'reported_completion_requests': self.reported_completion_requests,
+                'avg_completion_tokens': average(self.completion_tokens, self.reported_completion_requests),
+                'last': dict(self.last)
+            }
@@ -0,0 +1,196 @@
+"""
+語音識別器池 - 預先建立連接的識別器，請求到達時直接取用
+"""
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict
+
+from utils.latency import LatencyRecorder
+
+logger = logging.getLogger(__name__)
+
+# 連續失敗後的重試間隔（秒）
+_RETRY_DELAYS = (0.5, 1.0, 2.0, 5.0, 10.0)
+
+
+@dataclass
+class PooledRecognizer:
+    """池中的識別器（綁定推送流，只能用於一次識別）"""
+    recognizer: Any
+    push_stream: Any
+    connection: Any
+    created_at: float
+    generation: int
+
+
+class RecognizerPool:
+    """
+    預熱識別器池
+
+    SDK 的識別器在創建時綁定音頻輸入，因此每個識別器只服務一個請求；
+    後台線程持續補充已用 Connection.open 建立連接的識別器，使請求無需
+    等待連接及 TLS 握手。過舊或配置更新前創建的識別器會被丟棄。
+    """
+
+    def __init__(self, factory: Callable[[], tuple], size: int = 2, max_idle: float = 60.0,
+                 acquire_timeout: float = 0.2):
+        """
+        初始化識別器池
+
+        Args:
+            factory: 創建並預熱識別器的函數，返回 (recognizer, push_stream, connection)
+            size: 保持預熱的識別器數量
+            max_idle: 識別器最長閒置時間（秒），超過後重新建立
+            acquire_timeout: 池為空時等待預熱識別器的時間（秒），超時則即時創建
+        """
+        self._factory = factory
+        self.size = size
+        self.max_idle = max_idle
+        self.acquire_timeout = acquire_timeout
+        self._queue: 'queue.Queue[PooledRecognizer]' = queue.Queue()
+        self._generation = 0
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._lock = threading.Lock()
+        self.timings = LatencyRecorder()
+        self.hits = 0
+        self.cold_starts = 0
+        self.discarded = 0
+        self.errors = 0
+
+        self._thread = threading.Thread(target=self._refill_loop, name='recognizer-pool', daemon=True)
+        self._thread.start()
+
+    def _create(self) -> PooledRecognizer:
+        """創建並預熱一個識別器"""
+        with self._lock:
+            generation = self._generation
+        with self.timings.measure('warmup'):
+            recognizer, push_stream, connection = self._factory()
+        return PooledRecognizer(recognizer, push_stream, connection, time.monotonic(), generation)
+
+    def _is_usable(self, entry: PooledRecognizer) -> bool:
+        """識別器是否仍可使用（未過期且配置未更新）"""
+        return entry.generation == self._generation and time.monotonic() - entry.created_at < self.max_idle
+
+    def acquire(self) -> PooledRecognizer:
+        """
+        取用一個識別器（用完後調用 release）
+
+        Returns:
+            PooledRecognizer: 預熱的識別器，池為空時即時創建
+        """
+        started = time.perf_counter()
+        deadline = started + self.acquire_timeout
+        entry = None
+        while entry is None:
+            remaining = deadline - time.perf_counter()
+            try:
+                candidate = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if self._is_usable(candidate):
+                entry = candidate
+            else:
+                self._discard(candidate)
+        self._wakeup.set()
+        self.timings.record('wait', (time.perf_counter() - started) * 1000)
+
+        if entry is not None:
+            with self._lock:
+                self.hits += 1
+            return entry
+
+        with self._lock:
+            self.cold_starts += 1
+        logger.info("識別器池為空，即時創建識別器")
+        return self._create()
+
+    def release(self, entry: PooledRecognizer):
+        """識別完成後關閉識別器及連接"""
+        self._close(entry)
+
+    def invalidate(self):
+        """丟棄所有現有識別器（例如語音配置重建後），後台會以新配置補充"""
+        with self._lock:
+            self._generation += 1
+        logger.info("識別器池已失效，將以新配置重新預熱")
+        self._wakeup.set()
+
+    def _discard(self, entry: PooledRecognizer):
+        """丟棄不可用的識別器"""
+        with self._lock:
+            self.discarded += 1
+        self._close(entry)
+
+    @staticmethod
+    def _close(entry: PooledRecognizer):
+        """關閉識別器的連接（失敗時忽略）"""
+        try:
+            if entry.connection is not None:
+                entry.connection.close()
+        except Exception as e:
+            logger.debug(f"關閉識別器連接失敗: {e}")
+
+    def _refill_loop(self):
+        """後台補充預熱識別器，並定期替換過期的識別器"""
+        failures = 0
+        while not self._closed:
+            self._evict_stale()
+            if self._queue.qsize() < self.size:
+                try:
+                    self._queue.put(self._create())
+                    failures = 0
+                    continue
+                except Exception as e:
+                    with self._lock:
+                        self.errors += 1
+                    delay = _RETRY_DELAYS[min(failures, len(_RETRY_DELAYS) - 1)]
+                    failures += 1
+                    logger.warning(f"預熱識別器失敗，{delay} 秒後重試: {e}")
+                    self._wakeup.wait(delay)
+                    self._wakeup.clear()
+                    continue
+            self._wakeup.wait(self.max_idle / 2)
+            self._wakeup.clear()
+
+    def _evict_stale(self):
+        """移除過期或配置已更新的識別器"""
+        for _ in range(self._queue.qsize()):
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if self._is_usable(entry):
+                self._queue.put(entry)
+            else:
+                self._discard(entry)
+
+    def close(self):
+        """停止補充並關閉所有識別器"""
+        self._closed = True
+        self._wakeup.set()
+        while True:
+            try:
+                self._close(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        """獲取池狀態及等待時間統計"""
+        with self._lock:
+            acquired = self.hits + self.cold_starts
+            return {
+                'size': self.size,
+                'ready': self._queue.qsize(),
+                'hits': self.hits,
+                'cold_starts': self.cold_starts,
+                'hit_rate': round(self.hits / acquired, 4) if acquired else 0.0,
+                'discarded': self.discarded,
+                'errors': self.errors,
+                'generation': self._generation,
+                'timings': self.timings.stats()
+            }
@@ -0,0 +1,340 @@
+"""
+Azure Speech REST 客戶端 - 共用長連接池（可用時使用 HTTP/2）、重試預算及異步批量識別
+
+用於無法使用 Speech SDK 的無服務器入口（api/index.py、api/speech_api.py）。
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+
+from services.speech_token_manager import SpeechTokenManager
+
+logger = logging.getLogger(__name__)
+
+RECOGNITION_PATH = "/speech/recognition/conversation/cognitiveservices/v1"
+
+# 可重試的響應狀態（限流及服務端暫時錯誤）
+_RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+# 可重試的傳輸錯誤：請求未送達，或長連接已被服務端關閉
+_RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError, httpx.PoolTimeout)
+
+
+def _http2_available() -> bool:
+    """是否安裝了 h2（httpx 的 HTTP/2 支持）"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class SpeechRestClient:
+    """
+    Azure Speech 短音頻 REST 識別客戶端
+
+    同步客戶端在進程內共用，連接在請求之間保持；異步客戶端按事件循環
+    創建（httpx 連接池綁定事件循環）。
+    """
+
+    def __init__(self, azure_key: Optional[str], azure_region: str, language: str = 'zh-HK',
+                 connect_timeout: float = 3.0, read_timeout: float = 30.0, max_retries: int = 2,
+                 retry_backoff: float = 0.2, max_connections: int = 20, base_url: Optional[str] = None,
+                 token_manager: Optional[SpeechTokenManager] = None):
+        """
+        初始化客戶端
+
+        Args:
+            azure_key: Azure Speech Services 密鑰
+            azure_region: Azure 服務區域
+            language: 識別語言
+            connect_timeout: 建立連接超時（秒）
+            read_timeout: 等待識別結果超時（秒）
+            max_retries: 連接失敗、限流或服務端錯誤時的最大重試次數
+            retry_backoff: 重試退避基礎間隔（秒），按指數增長並加入隨機抖動
+            max_connections: 連接池大小（亦為批量識別的默認並發數）
+            base_url: 服務地址（默認按區域生成，可指向本地模擬服務）
+            token_manager: 令牌管理器；有可用令牌時以 Bearer 令牌代替訂閱密鑰
+        """
+        self.azure_key = azure_key
+        self.azure_region = azure_region
+        self.language = language
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_connections = max_connections
+        self.base_url = base_url or f"https://{azure_region}.stt.speech.microsoft.com"
+        self.token_manager = token_manager
+        self.http2 = _http2_available() and self.base_url.startswith('https://')
+
+        self._timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self._client: Optional[httpx.Client] = None
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'retries': 0, 'failures': 0}
+
+    def validate_config(self) -> bool:
+        """驗證配置"""
+        return bool(self.azure_key and self.azure_region)
+
+    def _client_options(self) -> Dict[str, Any]:
+        return {
+            'base_url': self.base_url,
+            'http2': self.http2,
+            'timeout': self._timeout,
+            'limits': self._limits,
+        }
+
+    @property
+    def client(self) -> httpx.Client:
+        """共用的同步 HTTP 客戶端（首次使用時創建）"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(**self._client_options())
+        return self._client
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """當前事件循環的異步 HTTP 客戶端"""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(**self._client_options())
+            self._async_clients[loop] = client
+        return client
+
+    def _headers(self, content_type: str) -> Dict[str, str]:
+        """請求頭：優先使用緩存的令牌（不等待刷新），否則使用訂閱密鑰"""
+        headers = {'Content-Type': content_type, 'Accept': 'application/json'}
+        token = self.token_manager.get_token() if self.token_manager is not None else None
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        else:
+            headers['Ocp-Apim-Subscription-Key'] = self.azure_key
+        return headers
+
+    def _rejected_token(self, response: httpx.Response, headers: Dict[str, str]) -> bool:
+        """令牌被拒絕時使其失效，以便下一次嘗試改用訂閱密鑰"""
+        if response.status_code == 401 and 'Authorization' in headers:
+            logger.warning("語音服務拒絕令牌，改用訂閱密鑰重試")
+            self.token_manager.invalidate()
+            return True
+        return False
+
+    def _params(self) -> Dict[str, str]:
+        return {'language': self.language, 'format': 'detailed'}
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """帶隨機抖動的指數退避"""
+        return random.uniform(0, self.retry_backoff * (2 ** attempt))
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _parse_response(self, response: httpx.Response) -> Dict[str, Any]:
+        """把識別響應轉換為結果字典"""
+        if response.status_code != 200:
+            return {
+                'success': False,
+                'error': f"API 請求失敗: {response.status_code}"
+            }
+
+        result = response.json()
+        if result.get('RecognitionStatus') == 'Success':
+            nbest = result.get('NBest') or [{}]
+            return {
+                'success': True,
+                'text': result.get('DisplayText', ''),
+                'confidence': nbest[0].get('Confidence', 0),
+                'language': self.language
+            }
+        return {
+            'success': False,
+            'error': f"識別失敗: {result.get('RecognitionStatus')}"
+        }
+
+    def _failure(self, error: str) -> Dict[str, Any]:
+        self._count('failures')
+        return {'success': False, 'error': error}
+
+    def transcribe(self, audio_data: bytes, content_type: str = "audio/wav") -> Dict[str, Any]:
+        """
+        識別一段短音頻
+
+        Args:
+            audio_data: 音頻數據
+            content_type: 音頻格式
+
+        Returns:
+            Dict: {'success', 'text', 'confidence', 'language'} 或 {'success': False, 'error'}
+        """
+        if not self.validate_config():
+            return {'success': False, 'error': 'Azure Speech Services 未配置'}
+
+        self._count('requests')
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count('retries')
+                time.sleep(self._backoff_delay(attempt - 1))
+            headers = self._headers(content_type)
+            try:
+                response = self.client.post(RECOGNITION_PATH, params=self._params(),
+                                            headers=headers, content=audio_data)
+            except _RETRY_ERRORS as e:
+                last_error = f'網絡請求失敗: {str(e)}'
+                continue
+            except httpx.TimeoutException:
+                return self._failure('請求超時，請重試')
+            except httpx.HTTPError as e:
+                return self._failure(f'網絡請求失敗: {str(e)}')
+
+            if response.status_code in _RETRY_STATUS or self._rejected_token(response, headers):
+                last_error = f"API 請求失敗: {response.status_code}"
+                continue
+            try:
+                return self._parse_response(response)
+            except Exception as e:
+                return self._failure(f'語音識別錯誤: {str(e)}')
+
+        logger.warning(f"REST 語音識別重試 {self.max_retries} 次後仍失敗: {last_error}")
+        return self._failure(last_error)
+
+    async def atranscribe(self, audio_data: bytes, content_type: str = "audio/wav") -> Dict[str, Any]:
+        """
+        識別一段短音頻（異步版本）
+
+        Args:
+            audio_data: 音頻數據
+            content_type: 音頻格式
+
+        Returns:
+            Dict: 與 transcribe 相同
+        """
+        if not self.validate_config():
+            return {'success': False, 'error': 'Azure Speech Services 未配置'}
+
+        client = self._get_async_client()
+        self._count('requests')
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count('retries')
+                await asyncio.sleep(self._backoff_delay(attempt - 1))
+            headers = self._headers(content_type)
+            try:
+                response = await client.post(RECOGNITION_PATH, params=self._params(),
+                                             headers=headers, content=audio_data)
+            except _RETRY_ERRORS as e:
+                last_error = f'網絡請求失敗: {str(e)}'
+                continue
+            except httpx.TimeoutException:
+                return self._failure('請求超時，請重試')
+            except httpx.HTTPError as e:
+                return self._failure(f'網絡請求失敗: {str(e)}')
+
+            if response.status_code in _RETRY_STATUS or self._rejected_token(response, headers):
+                last_error = f"API 請求失敗: {response.status_code}"
+                continue
+            try:
+                return self._parse_response(response)
+            except Exception as e:
+                return self._failure(f'語音識別錯誤: {str(e)}')
+
+        logger.warning(f"REST 語音識別重試 {self.max_retries} 次後仍失敗: {last_error}")
+        return self._failure(last_error)
+
+    async def atranscribe_batch(self, clips: Sequence[bytes], content_type: str = "audio/wav",
+                                concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        並發識別多段音頻
+
+        Args:
+            clips: 音頻數據列表
+            content_type: 音頻格式
+            concurrency: 最大並發數（默認為連接池大小）
+
+        Returns:
+            List[Dict]: 與 clips 順序相同的識別結果
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.max_connections)
+
+        async def run(clip: bytes) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.atranscribe(clip, content_type)
+
+        return list(await asyncio.gather(*(run(clip) for clip in clips)))
+
+    def transcribe_batch(self, clips: Sequence[bytes], content_type: str = "audio/wav",
+                         concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        """在同步代碼中並發識別多段音頻（使用臨時事件循環）"""
+        async def run() -> List[Dict[str, Any]]:
+            try:
+                return await self.atranscribe_batch(clips, content_type, concurrency)
+            finally:
+                await self.aclose()
+
+        return asyncio.run(run())
+
+    async def aclose(self):
+        """關閉當前事件循環的異步客戶端"""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def close(self):
+        """關閉同步客戶端及令牌管理器"""
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+        if self.token_manager is not None:
+            self.token_manager.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """獲取請求統計"""
+        with self._lock:
+            stats = dict(self._stats, http2=self.http2)
+        stats['token'] = self.token_manager.stats() if self.token_manager is not None else None
+        return stats
+
+
+# 進程內共用的客戶端
+_shared_client: Optional[SpeechRestClient] = None
+_shared_lock = threading.Lock()
+
+
+def get_speech_rest_client() -> SpeechRestClient:
+    """
+    獲取進程內共用的 REST 客戶端（按環境變量配置）
+
+    Returns:
+        SpeechRestClient: 共用客戶端
+    """
+    global _shared_client
+    if _shared_client is None:
+        with _shared_lock:
+            if _shared_client is None:
+                azure_key = os.getenv('AZURE_SPEECH_KEY')
+                azure_region = os.getenv('AZURE_SPEECH_REGION', 'eastasia')
+                token_manager = None
+                if azure_key and os.getenv('AZURE_SPEECH_USE_TOKEN', 'True').lower() == 'true':
+                    token_manager = SpeechTokenManager(azure_key, azure_region)
+                _shared_client = SpeechRestClient(
+                    azure_key=azure_key,
+                    azure_region=azure_region,
+                    connect_timeout=float(os.getenv('AZURE_SPEECH_REST_CONNECT_TIMEOUT', '3')),
+                    read_timeout=float(os.getenv('AZURE_SPEECH_REST_READ_TIMEOUT', '30')),
+                    max_retries=int(os.getenv('AZURE_SPEECH_REST_MAX_RETRIES', '2')),
+                    max_connections=int(os.getenv('AZURE_SPEECH_REST_MAX_CONNECTIONS', '20')),
+                    base_url=os.getenv('AZURE_SPEECH_REST_BASE_URL') or None,
+                    token_manager=token_manager
+                )
+    return _shared_client
@@ -3,30 +3,92 @@
 """
 import azure.cognitiveservices.speech as speechsdk
 import logging
-import os
-import tempfile
+import random
 import time
 import threading
-import gc
-from typing import Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+from utils.audio_format import FORMAT_WAV, sniff_audio_format
+from services.recognizer_pool import RecognizerPool
+from services.streaming_recognition import EventCallback, StreamingRecognition
+from utils.latency import LatencyRecorder
+from utils.temp_audio import TempFileReaper, default_temp_dir, write_temp_audio
 
 logger = logging.getLogger(__name__)
 
+# 推送流單次寫入上限：SDK 的 write 會在內部複製數據，一般上傳整段一次寫入即可
+PUSH_STREAM_WRITE_BYTES = 4 * 1024 * 1024
+
+# 識別策略名稱
+STRATEGY_SINGLE = "單次識別"
+STRATEGY_CONTINUOUS = "連續識別"
+
+
+def _backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """帶隨機抖動的指數退避（full jitter）：在 [0, min(cap, base * 2^attempt)] 內均勻取值"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
 class SpeechService:
     """語音識別服務類"""
     
-    def __init__(self, azure_key: str, azure_region: str):
+    def __init__(self, azure_key: str, azure_region: str, pool_size: int = 2,
+                 pool_max_idle: float = 60.0, pool_acquire_timeout: float = 0.2,
+                 stream_segmentation_silence_ms: int = 500, temp_dir: Optional[str] = None,
+                 hedge_delay: float = 2.5, request_deadline: float = 20.0,
+                 retry_backoff_base: float = 0.2, retry_backoff_cap: float = 2.0,
+                 strategy_workers: int = 8, vad_enabled: bool = True, vad_padding_ms: int = 200):
         """
         初始化語音服務
         
         Args:
             azure_key: Azure Speech Services API 密鑰
             azure_region: Azure 服務區域
+            pool_size: 預熱識別器數量（0 表示不使用識別器池）
+            pool_max_idle: 預熱識別器最長閒置時間（秒）
+            pool_acquire_timeout: 池為空時等待預熱識別器的時間（秒）
+            stream_segmentation_silence_ms: 串流識別中斷句所需的靜音長度（毫秒）
+            temp_dir: 文件識別回退路徑的臨時目錄（None 時優先使用 /dev/shm）
+            hedge_delay: 單次識別超過此時間（約為 p95 耗時，秒）未返回時並行啟動連續識別
+            request_deadline: 帶回退識別的總時限（秒）
+            retry_backoff_base: 重試退避的基礎間隔（秒）
+            retry_backoff_cap: 重試退避的最大間隔（秒）
+            strategy_workers: 執行識別策略的線程數（所有請求共用，用滿時不再對沖）
+            vad_enabled: 識別前是否裁剪首尾靜音並丟棄沒有語音的上傳
+            vad_padding_ms: 裁剪時在語音首尾保留的長度（毫秒）
         """
         self.azure_key = azure_key
         self.azure_region = azure_region
         self.speech_config = None
+        self.stream_segmentation_silence_ms = stream_segmentation_silence_ms
+        self._streaming_config = None
+        self.temp_dir = temp_dir or default_temp_dir()
+        self._temp_reaper = TempFileReaper()
+        self.hedge_delay = hedge_delay
+        self.request_deadline = request_deadline
+        self.retry_backoff_base = retry_backoff_base
+        self.retry_backoff_cap = retry_backoff_cap
+        # 識別策略在線程池中執行，請求線程只等待第一個可用結果
+        self.strategy_workers = strategy_workers
+        self._strategy_executor = ThreadPoolExecutor(max_workers=strategy_workers, thread_name_prefix='speech-strategy')
+        self._strategy_inflight = 0
+        self._stats_lock = threading.Lock()
+        self._hedge_stats = {'requests': 0, 'hedged': 0, 'hedge_skipped': 0, 'retries': 0, 'deadline_exceeded': 0,
+                             'wins': {STRATEGY_SINGLE: 0, STRATEGY_CONTINUOUS: 0}}
+        self.vad_enabled = vad_enabled
+        self.vad_padding_ms = vad_padding_ms
+        self._vad_stats = {'checked': 0, 'empty': 0, 'uncertain': 0, 'input_seconds': 0.0, 'speech_seconds': 0.0, 'kept_seconds': 0.0}
+        self.timings = LatencyRecorder()
         self._configure_speech_service()
+        
+        # 預熱識別器池：請求到達時連接已經建立
+        self._recognizer_pool = None
+        if pool_size > 0:
+            self._recognizer_pool = RecognizerPool(
+                self._create_warm_recognizer,
+                size=pool_size,
+                max_idle=pool_max_idle,
+                acquire_timeout=pool_acquire_timeout
+            )
     
     def _configure_speech_service(self):
         """配置 Azure Speech Services"""
@@ -43,6 +105,7 @@ class SpeechService:
             
             # 設置語言為香港粵語
             self.speech_config.speech_recognition_language = "zh-HK"
+            self._streaming_config = None
             
             # 針對粵語優化的配置
             self.speech_config.set_property(
@@ -84,18 +147,106 @@ class SpeechService:
             logger.error(f"Azure Speech Services 配置失敗: {e}")
             raise
     
-    def transcribe_audio_sync(self, audio_data: bytes) -> Tuple[bool, str, float]:
+    def _create_warm_recognizer(self) -> tuple:
+        """
+        創建綁定推送流的識別器，並預先建立到語音服務的連接
+        
+        Returns:
+            tuple: (recognizer, push_stream, connection)
+        """
+        import azure.cognitiveservices.speech.audio as audio
+        
+        push_stream = audio.PushAudioInputStream()
+        recognizer = speechsdk.SpeechRecognizer(
+            speech_config=self.speech_config,
+            audio_config=audio.AudioConfig(stream=push_stream)
+        )
+        connection = speechsdk.Connection.from_recognizer(recognizer)
+        connection.open(False)  # 單次識別
+        return recognizer, push_stream, connection
+    
+    def _get_streaming_config(self) -> speechsdk.SpeechConfig:
+        """
+        串流識別專用的語音配置（連續模式，較短的斷句靜音）
+        
+        Returns:
+            speechsdk.SpeechConfig: 語音配置
+        """
+        if self._streaming_config is None:
+            config = speechsdk.SpeechConfig(subscription=self.azure_key, region=self.azure_region)
+            config.speech_recognition_language = "zh-HK"
+            config.set_property(
+                speechsdk.PropertyId.Speech_SegmentationSilenceTimeoutMs,
+                str(self.stream_segmentation_silence_ms)  # 顧客停頓後盡快給出分段結果
+            )
+            config.set_property(
+                speechsdk.PropertyId.SpeechServiceResponse_RequestDetailedResultTrueFalse,
+                "false"
+            )
+            self._streaming_config = config
+        return self._streaming_config
+    
+    def create_streaming_session(self, on_event: EventCallback, sample_rate: int = 16000) -> StreamingRecognition:
+        """
+        創建串流識別會話（客戶端邊錄音邊送入 PCM 幀）
+        
+        Args:
+            on_event: 事件回調，接收 recognizing / recognized / error 事件
+            sample_rate: 客戶端 PCM 採樣率
+            
+        Returns:
+            StreamingRecognition: 未啟動的識別會話
+        """
+        return StreamingRecognition(self._get_streaming_config(), on_event, sample_rate)
+    
+    def finish_streaming_session(self, session: StreamingRecognition, timeout: float = 5.0) -> Tuple[bool, str, float]:
+        """
+        結束串流識別會話並返回最終結果（記錄停止錄音到得到結果的耗時）
+        
+        Args:
+            session: 識別會話
+            timeout: 等待最終結果的時間（秒）
+            
+        Returns:
+            Tuple[bool, str, float]: (成功標誌, 轉錄文字, 信心度)
+        """
+        with self.timings.measure('stream_finalize'):
+            success, text, confidence = session.finish(timeout)
+        if not success and self._is_context_validation_error(text):
+            self._recycle_recognizers()
+        return success, text, confidence
+    
+    @staticmethod
+    def _is_context_validation_error(message: str) -> bool:
+        """是否為 1007 上下文驗證錯誤（需要重建語音配置）"""
+        return "1007" in message or "Could not validate speech context" in message
+    
+    def _recycle_recognizers(self):
+        """重建語音配置，並讓識別器池以新配置重新預熱"""
+        logger.info("檢測到上下文驗證錯誤，重新初始化語音服務...")
+        try:
+            self._configure_speech_service()
+        except Exception as config_error:
+            logger.error(f"重新配置語音服務失敗: {config_error}")
+            return
+        if self._recognizer_pool is not None:
+            self._recognizer_pool.invalidate()
+    
+    def transcribe_audio_sync(self, audio_data: bytes, converted: bool = False) -> Tuple[bool, str, float]:
         """
         將音頻轉換為文字（同步版本）
         
         Args:
             audio_data: 音頻數據 (bytes)
+            converted: audio_data 是否已經過 _prepare_audio 轉換（避免重複轉換）
             
         Returns:
             Tuple[bool, str, float]: (成功標誌, 轉錄文字, 信心度)
         """
         try:
             logger.info(f"開始處理音頻數據，大小: {len(audio_data)} bytes")
+            if not converted:
+                audio_data = self._convert_or_original(audio_data)
             
             # 優先嘗試使用內存流，避免臨時文件問題
             try:
@@ -115,52 +266,45 @@ class SpeechService:
         使用內存流進行語音識別，避免臨時文件
         
         Args:
-            audio_data: 音頻數據 (bytes)
+            audio_data: 已轉換的 WAV 數據
             
         Returns:
             Tuple[bool, str, float]: (成功標誌, 轉錄文字, 信心度)
         """
         try:
             import azure.cognitiveservices.speech.audio as audio
-            import io
             
             logger.info("使用內存流進行語音識別...")
             
-            # 轉換音頻數據
-            try:
-                converted_audio = self._convert_audio_to_wav(audio_data)
-            except Exception as convert_error:
-                logger.warning(f"音頻轉換失敗，使用原始數據: {convert_error}")
-                converted_audio = audio_data
-            
-            # 創建內存流
-            audio_stream = io.BytesIO(converted_audio)
-            
-            # 創建推送音頻輸入流
-            push_stream = audio.PushAudioInputStream()
-            audio_config = audio.AudioConfig(stream=push_stream)
-            
-            # 創建語音識別器
-            speech_recognizer = speechsdk.SpeechRecognizer(
-                speech_config=self.speech_config,
-                audio_config=audio_config
-            )
-            
-            # 將音頻數據寫入流
-            chunk_size = 1024
-            audio_stream.seek(0)
-            
-            while True:
-                chunk = audio_stream.read(chunk_size)
-                if not chunk:
-                    break
-                push_stream.write(chunk)
+            # 取用預熱的識別器（已綁定推送流並建立連接）
+            pooled = None
+            if self._recognizer_pool is not None:
+                pooled = self._recognizer_pool.acquire()
+                speech_recognizer, push_stream = pooled.recognizer, pooled.push_stream
+            else:
+                push_stream = audio.PushAudioInputStream()
+                speech_recognizer = speechsdk.SpeechRecognizer(
+                    speech_config=self.speech_config,
+                    audio_config=audio.AudioConfig(stream=push_stream)
+                )
             
-            push_stream.close()
+            try:
+                # 將音頻數據寫入流
+                feed_ms = self._feed_push_stream(push_stream, audio_data)
+                push_stream.close()
+                
+                # 執行識別
+                logger.info("開始內存流語音識別...")
+                started = time.perf_counter()
+                result = speech_recognizer.recognize_once()
+                recognize_ms = (time.perf_counter() - started) * 1000
+            finally:
+                if pooled is not None:
+                    self._recognizer_pool.release(pooled)
             
-            # 執行識別
-            logger.info("開始內存流語音識別...")
-            result = speech_recognizer.recognize_once()
+            self.timings.record('stream_feed', feed_ms)
+            self.timings.record('stream_recognize', recognize_ms)
+            logger.info(f"內存流識別耗時: 寫入 {feed_ms:.1f}ms，識別 {recognize_ms:.1f}ms")
             
             return self._process_recognition_result(result)
             
@@ -168,12 +312,72 @@ class SpeechService:
             logger.error(f"內存流識別失敗: {e}")
             raise
 
+    def _feed_push_stream(self, push_stream, audio_data: bytes) -> float:
+        """
+        將音頻數據寫入推送流
+        
+        整個緩衝區一次寫入，不經過 BytesIO；超過 PUSH_STREAM_WRITE_BYTES
+        時才按 memoryview 切片分批寫入（SDK 只接受 bytes）。
+        
+        Args:
+            push_stream: PushAudioInputStream
+            audio_data: 音頻數據
+            
+        Returns:
+            float: 寫入耗時（毫秒）
+        """
+        started = time.perf_counter()
+        if isinstance(audio_data, bytes) and len(audio_data) <= PUSH_STREAM_WRITE_BYTES:
+            push_stream.write(audio_data)
+        else:
+            view = memoryview(audio_data)
+            for offset in range(0, len(view), PUSH_STREAM_WRITE_BYTES):
+                push_stream.write(view[offset:offset + PUSH_STREAM_WRITE_BYTES].tobytes())
+        return (time.perf_counter() - started) * 1000
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """獲取語音識別各階段耗時及識別器池統計"""
+        return {
+            'timings': self.timings.stats(),
+            'pool': self._recognizer_pool.stats() if self._recognizer_pool is not None else None,
+            'temp_files': self._temp_reaper.stats(),
+            'hedging': self.get_hedge_stats(),
+            'vad': self.get_vad_stats()
+        }
+    
+    def get_vad_stats(self) -> Dict[str, Any]:
+        """獲取語音活動檢測統計（語音佔比及裁剪掉的音頻秒數）"""
+        with self._stats_lock:
+            stats = dict(self._vad_stats)
+        stats['speech_ratio'] = round(stats['speech_seconds'] / stats['input_seconds'], 4) if stats['input_seconds'] else 0.0
+        stats['trimmed_seconds'] = round(stats['input_seconds'] - stats['kept_seconds'], 3)
+        for key in ('input_seconds', 'speech_seconds', 'kept_seconds'):
+            stats[key] = round(stats[key], 3)
+        return stats
+    
+    def get_hedge_stats(self) -> Dict[str, Any]:
+        """獲取對沖識別統計"""
+        with self._stats_lock:
+            stats = dict(self._hedge_stats, wins=dict(self._hedge_stats['wins']))
+        stats['hedge_rate'] = round(stats['hedged'] / stats['requests'], 4) if stats['requests'] else 0.0
+        return stats
+    
+    def _count(self, key: str, strategy: Optional[str] = None):
+        """累計對沖識別統計"""
+        with self._stats_lock:
+            if strategy is not None:
+                self._hedge_stats['wins'][strategy] += 1
+            else:
+                self._hedge_stats[key] += 1
+
     def _transcribe_with_file(self, audio_data: bytes) -> Tuple[bool, str, float]:
         """
         使用臨時文件進行語音識別（備用方法）
         
+        文件寫在內存文件系統上，關閉句柄後立即識別；刪除交給後台線程。
+        
         Args:
-            audio_data: 音頻數據 (bytes)
+            audio_data: 已轉換的 WAV 數據
             
         Returns:
             Tuple[bool, str, float]: (成功標誌, 轉錄文字, 信心度)
@@ -182,25 +386,8 @@ class SpeechService:
         try:
             logger.info("使用臨時文件進行語音識別...")
             
-            # 創建臨時文件並確保完全關閉句柄
-            temp_file = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-            temp_file_path = temp_file.name
-            
-            try:
-                # 轉換音頻數據
-                try:
-                    converted_audio = self._convert_audio_to_wav(audio_data)
-                    temp_file.write(converted_audio)
-                except Exception as convert_error:
-                    logger.warning(f"音頻轉換失敗，使用原始數據: {convert_error}")
-                    temp_file.write(audio_data)
-                
-                temp_file.flush()  # 確保數據寫入磁盤
-            finally:
-                temp_file.close()  # 明確關閉文件句柄
-            
-            # 短暫延遲，確保文件句柄完全釋放
-            time.sleep(0.1)
+            with self.timings.measure('file_write'):
+                temp_file_path = write_temp_audio(audio_data, self.temp_dir)
             
             # 創建音頻配置和識別器
             audio_config = speechsdk.audio.AudioConfig(filename=temp_file_path)
@@ -211,7 +398,8 @@ class SpeechService:
             
             # 執行識別
             logger.info("開始文件語音識別...")
-            result = speech_recognizer.recognize_once()
+            with self.timings.measure('file_recognize'):
+                result = speech_recognizer.recognize_once()
             
             return self._process_recognition_result(result)
             
@@ -219,13 +407,13 @@ class SpeechService:
             logger.error(f"文件識別失敗: {e}")
             raise
         finally:
-            # 安全清理臨時文件
+            # 在後台刪除臨時文件
             if temp_file_path:
-                self._safe_cleanup_temp_file(temp_file_path)
+                self._temp_reaper.discard(temp_file_path)
 
     def _process_recognition_result(self, result) -> Tuple[bool, str, float]:
         """
-        處理語音識別結果
+        處理語音識別結果（1007 上下文驗證錯誤時重建配置並回收池中的識別器）
         
         Args:
             result: Azure Speech SDK 識別結果
@@ -246,11 +434,21 @@ class SpeechService:
             logger.error(f"語音識別被取消: {cancellation_details.reason}")
             if cancellation_details.reason == speechsdk.CancellationReason.Error:
                 logger.error(f"錯誤詳情: {cancellation_details.error_details}")
+                if self._is_context_validation_error(cancellation_details.error_details or ''):
+                    self._recycle_recognizers()
             return False, f"識別錯誤: {cancellation_details.error_details}", 0.0
         else:
             logger.error(f"未知的識別結果: {result.reason}")
             return False, "識別失敗", 0.0
 
+    def _convert_or_original(self, audio_data: bytes) -> bytes:
+        """轉換為 WAV，失敗時使用原始數據"""
+        try:
+            return self._convert_audio_to_wav(audio_data)
+        except Exception as convert_error:
+            logger.warning(f"音頻轉換失敗，使用原始數據: {convert_error}")
+            return audio_data
+    
     def _convert_audio_to_wav(self, audio_data: bytes) -> bytes:
         """
         將音頻數據轉換為 WAV 格式，增強兼容性
@@ -262,14 +460,27 @@ class SpeechService:
             bytes: WAV 格式的音頻數據
         """
         try:
+            # 根據文件頭識別格式，只用對應的解碼器嘗試一次
+            audio_format = sniff_audio_format(audio_data)
+            
             # 檢查是否已經是 WAV 格式
-            if audio_data.startswith(b'RIFF') and b'WAVE' in audio_data[:12]:
+            if audio_format == FORMAT_WAV:
                 logger.info("音頻已經是 WAV 格式，驗證參數...")
                 # 驗證是否符合 Azure 要求的格式
                 if self._validate_wav_format(audio_data):
                     return audio_data
-                else:
-                    logger.info("WAV 格式不符合要求，需要重新轉換...")
+                logger.info("WAV 格式不符合要求，需要重新轉換...")
+                
+                # 進程內轉換（混音、重採樣、量化），無需 ffmpeg
+                try:
+                    from utils.pcm import convert_wav
+                    wav_data = convert_wav(audio_data)
+                    logger.info(f"進程內 WAV 轉換成功，原始大小: {len(audio_data)} bytes，轉換後: {len(wav_data)} bytes")
+                    return wav_data
+                except ImportError:
+                    logger.warning("numpy 模塊未安裝，使用 pydub 轉換 WAV")
+                except ValueError as e:
+                    logger.info(f"進程內 WAV 轉換不適用，使用 pydub: {e}")
             
             # 使用 pydub 進行音頻轉換
             try:
@@ -278,20 +489,17 @@ class SpeechService:
                 
                 logger.info("開始音頻格式轉換...")
                 
-                # 嘗試從不同格式讀取
                 audio_segment = None
-                supported_formats = ["webm", "mp3", "ogg", "wav", "m4a"]
-                
-                for format_name in supported_formats:
+                if audio_format is not None:
                     try:
-                        audio_segment = AudioSegment.from_file(io.BytesIO(audio_data), format=format_name)
-                        logger.info(f"成功從 {format_name.upper()} 格式讀取音頻")
-                        break
+                        audio_segment = AudioSegment.from_file(io.BytesIO(audio_data), format=audio_format)
+                        logger.info(f"成功從 {audio_format.upper()} 格式讀取音頻")
                     except Exception as e:
-                        logger.debug(f"{format_name.upper()} 格式讀取失敗: {e}")
-                        continue
+                        logger.warning(f"{audio_format.upper()} 格式讀取失敗: {e}")
+                else:
+                    logger.info("無法從文件頭識別音頻格式")
                 
-                # 如果所有格式都失敗，嘗試自動檢測
+                # 識別失敗或解碼失敗時，交給 ffmpeg 自動檢測
                 if audio_segment is None:
                     try:
                         audio_segment = AudioSegment.from_file(io.BytesIO(audio_data))
@@ -479,111 +687,152 @@ class SpeechService:
         # 目前使用同步版本
         return self.transcribe_audio_sync(audio_data)
     
-    def transcribe_audio_continuous(self, audio_data: bytes) -> Tuple[bool, str, float]:
+    def transcribe_audio_continuous(self, audio_data: bytes, timeout: float = 30.0,
+                                    stop_event: Optional[threading.Event] = None,
+                                    converted: bool = False) -> Tuple[bool, str, float]:
         """
         使用連續識別模式處理音頻（適合有停頓的語音）
         
+        音頻經推送流從內存送入識別器，流關閉後識別完剩餘音頻即結束會話。
+        
         Args:
             audio_data: 音頻數據 (bytes)
+            timeout: 等待識別完成的時間（秒）
+            stop_event: 外部設置此事件可提前結束識別（例如對沖時另一策略已成功）
+            converted: audio_data 是否已經過 _prepare_audio 轉換（避免重複轉換）
             
         Returns:
             Tuple[bool, str, float]: (成功標誌, 轉錄文字, 信心度)
         """
         try:
+            import azure.cognitiveservices.speech.audio as audio
+            
             logger.info(f"開始連續識別處理音頻數據，大小: {len(audio_data)} bytes")
+            if not converted:
+                audio_data = self._convert_or_original(audio_data)
             
-            # 創建臨時文件並確保完全關閉句柄
-            temp_file = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-            temp_file_path = temp_file.name
+            # 創建推送流及語音識別器（不取自識別器池：池中的連接按單次識別模式建立，
+            # 用於連續識別時 SDK 會重新連接，而且會佔用單次識別的預熱識別器）
+            push_stream = audio.PushAudioInputStream()
+            speech_recognizer = speechsdk.SpeechRecognizer(
+                speech_config=self.speech_config,
+                audio_config=audio.AudioConfig(stream=push_stream)
+            )
             
-            try:
-                # 轉換音頻數據
-                try:
-                    converted_audio = self._convert_audio_to_wav(audio_data)
-                    temp_file.write(converted_audio)
-                except Exception as convert_error:
-                    logger.warning(f"音頻轉換失敗，使用原始數據: {convert_error}")
-                    temp_file.write(audio_data)
-                
-                temp_file.flush()  # 確保數據寫入磁盤
-            finally:
-                temp_file.close()  # 明確關閉文件句柄
+            # 用於收集識別結果及取消的錯誤詳情
+            recognized_texts = []
+            errors = []
+            recognition_done = stop_event or threading.Event()
+            
+            def recognized_handler(evt):
+                """處理識別結果"""
+                if evt.result.text:
+                    logger.info(f"識別到文字: {evt.result.text}")
+                    recognized_texts.append(evt.result.text)
+            
+            def session_stopped_handler(evt):
+                """會話停止處理"""
+                logger.info("連續識別會話停止")
+                recognition_done.set()
+            
+            def canceled_handler(evt):
+                """取消處理（推送流結束時原因為 EndOfStream）"""
+                if evt.reason == speechsdk.CancellationReason.Error:
+                    logger.error(f"識別被取消，錯誤詳情: {evt.error_details}")
+                    errors.append(evt.error_details or '')
+                recognition_done.set()
+            
+            # 連接事件處理器
+            speech_recognizer.recognized.connect(recognized_handler)
+            speech_recognizer.session_stopped.connect(session_stopped_handler)
+            speech_recognizer.canceled.connect(canceled_handler)
+            
+            # 整段音頻寫入後關閉流，SDK 讀到流結尾即結束會話
+            feed_ms = self._feed_push_stream(push_stream, audio_data)
+            push_stream.close()
             
-            # 短暫延遲，確保文件句柄完全釋放
-            time.sleep(0.1)
+            logger.info("開始連續語音識別...")
+            started = time.perf_counter()
+            speech_recognizer.start_continuous_recognition()
             
-            try:
-                # 創建音頻配置
-                audio_config = speechsdk.audio.AudioConfig(filename=temp_file_path)
-                
-                # 創建語音識別器
-                speech_recognizer = speechsdk.SpeechRecognizer(
-                    speech_config=self.speech_config,
-                    audio_config=audio_config
-                )
-                
-                # 用於收集識別結果
-                recognized_texts = []
-                recognition_done = threading.Event()
-                
-                def recognized_handler(evt):
-                    """處理識別結果"""
-                    if evt.result.text:
-                        logger.info(f"識別到文字: {evt.result.text}")
-                        recognized_texts.append(evt.result.text)
-                
-                def session_stopped_handler(evt):
-                    """會話停止處理"""
-                    logger.info("連續識別會話停止")
-                    recognition_done.set()
-                
-                def canceled_handler(evt):
-                    """取消處理"""
-                    logger.warning(f"識別被取消: {evt.reason}")
-                    if evt.reason == speechsdk.CancellationReason.Error:
-                        logger.error(f"錯誤詳情: {evt.error_details}")
-                    recognition_done.set()
-                
-                # 連接事件處理器
-                speech_recognizer.recognized.connect(recognized_handler)
-                speech_recognizer.session_stopped.connect(session_stopped_handler)
-                speech_recognizer.canceled.connect(canceled_handler)
-                
-                logger.info("開始連續語音識別...")
-                
-                # 開始連續識別
-                speech_recognizer.start_continuous_recognition()
-                
-                # 等待識別完成，最多等待30秒
-                if recognition_done.wait(timeout=30):
-                    logger.info("連續識別完成")
-                else:
-                    logger.warning("連續識別超時")
-                
-                # 停止識別
-                speech_recognizer.stop_continuous_recognition()
-                
-                # 合併所有識別結果
-                if recognized_texts:
-                    full_text = " ".join(recognized_texts).strip()
-                    logger.info(f"連續識別最終結果: {full_text}")
-                    confidence = min(0.95, len(full_text) / 50.0 + 0.7)
-                    return True, full_text, confidence
-                else:
-                    logger.warning("連續識別未得到任何結果")
-                    return False, "未識別到語音內容", 0.0
-                    
-            finally:
-                # 安全清理臨時文件
-                self._safe_cleanup_temp_file(temp_file_path)
+            # 等待識別完成或被提前結束
+            if recognition_done.wait(timeout=timeout):
+                logger.info("連續識別完成")
+            else:
+                logger.warning("連續識別超時")
+            
+            # 停止識別
+            speech_recognizer.stop_continuous_recognition()
+            self.timings.record('continuous_feed', feed_ms)
+            self.timings.record('continuous_recognize', (time.perf_counter() - started) * 1000)
+            
+            # 合併所有識別結果
+            if recognized_texts:
+                full_text = " ".join(recognized_texts).strip()
+                logger.info(f"連續識別最終結果: {full_text}")
+                confidence = min(0.95, len(full_text) / 50.0 + 0.7)
+                return True, full_text, confidence
+            elif errors:
+                if self._is_context_validation_error(errors[-1]):
+                    self._recycle_recognizers()
+                return False, f"識別錯誤: {errors[-1]}", 0.0
+            else:
+                logger.warning("連續識別未得到任何結果")
+                return False, "未識別到語音內容", 0.0
                 
         except Exception as e:
             logger.error(f"連續語音識別異常: {e}")
             return False, f"識別異常: {str(e)}", 0.0
     
+    def _prepare_audio(self, audio_data: bytes) -> Tuple[bytes, Optional[Any]]:
+        """
+        轉換音頻並裁剪首尾靜音
+        
+        Args:
+            audio_data: 原始音頻數據
+            
+        Returns:
+            Tuple[bytes, Optional[VadResult]]: (待識別的 WAV 數據, 檢測結果，未檢測時為 None)
+        """
+        try:
+            converted_audio = self._convert_audio_to_wav(audio_data)
+        except Exception as convert_error:
+            logger.warning(f"音頻轉換失敗，使用原始數據: {convert_error}")
+            return audio_data, None
+        
+        if not self.vad_enabled:
+            return converted_audio, None
+        
+        try:
+            from utils.vad import trim_wav
+            with self.timings.measure('vad'):
+                trimmed_audio, vad = trim_wav(converted_audio, self.vad_padding_ms)
+        except (ImportError, ValueError) as e:
+            logger.info(f"跳過語音活動檢測: {e}")
+            return converted_audio, None
+        
+        with self._stats_lock:
+            self._vad_stats['checked'] += 1
+            self._vad_stats['empty'] += vad.is_empty
+            self._vad_stats['uncertain'] += vad.uncertain
+            self._vad_stats['input_seconds'] += vad.input_seconds
+            self._vad_stats['speech_seconds'] += vad.speech_seconds
+            self._vad_stats['kept_seconds'] += vad.kept_seconds
+        if vad.uncertain:
+            logger.info(f"語音活動檢測無法判斷（語音幀 {vad.speech_seconds:.2f} 秒），保留整段 {vad.input_seconds:.2f} 秒")
+        else:
+            logger.info(f"語音活動檢測: 語音佔比 {vad.speech_ratio:.0%}，保留 {vad.kept_seconds:.2f}/{vad.input_seconds:.2f} 秒")
+        return trimmed_audio, vad
+    
     def transcribe_audio_with_fallback(self, audio_data: bytes, max_retries: int = 2) -> Tuple[bool, str, float]:
         """
-        帶回退機制和重試的語音識別
+        帶對沖及重試的語音識別
+        
+        識別前先裁剪首尾靜音，確定沒有語音的上傳直接返回，不調用 Azure；
+        無法判斷時照常識別整段音頻。
+        每輪先啟動單次識別；開始執行後超過 hedge_delay 仍未返回（或已返回但無結果）時
+        啟動連續識別，採用第一個可用結果並結束另一個策略。整輪失敗後按帶抖動的
+        指數退避重試，總耗時不超過 request_deadline。
         
         Args:
             audio_data: 音頻數據 (bytes)
@@ -592,147 +841,138 @@ class SpeechService:
         Returns:
             Tuple[bool, str, float]: (成功標誌, 轉錄文字, 信心度)
         """
+        deadline = time.monotonic() + self.request_deadline
         last_error = None
         
-        # 嘗試不同的識別策略
-        strategies = [
-            ("單次識別", self.transcribe_audio_sync),
-            ("連續識別", self.transcribe_audio_continuous)
-        ]
+        # 只在這裡轉換一次，各策略直接使用（轉換失敗時各策略重試也不會成功）
+        audio_data, vad = self._prepare_audio(audio_data)
+        if vad is not None and vad.is_empty:
+            logger.info("未檢測到語音，跳過識別")
+            return False, "未檢測到語音內容，請再說一次", 0.0
+        
+        self._count('requests')
         
         for retry_count in range(max_retries + 1):
-            for strategy_name, strategy_func in strategies:
-                try:
-                    logger.info(f"嘗試 {strategy_name} (第 {retry_count + 1} 次)")
-                    success, text, confidence = strategy_func(audio_data)
-                    
-                    if success and text.strip():
-                        logger.info(f"{strategy_name} 成功: {text}")
-                        return success, text, confidence
-                    else:
-                        logger.warning(f"{strategy_name} 無結果: {text}")
-                        last_error = text
-                        
-                except Exception as e:
-                    error_str = str(e)
-                    logger.warning(f"{strategy_name} 失敗: {error_str}")
-                    last_error = error_str
-                    
-                    # 檢查是否是特定錯誤，需要特殊處理
-                    if "1007" in error_str or "Could not validate speech context" in error_str:
-                        logger.info("檢測到上下文驗證錯誤，重新初始化語音服務...")
-                        try:
-                            self._configure_speech_service()
-                        except Exception as config_error:
-                            logger.error(f"重新配置語音服務失敗: {config_error}")
-                    
-                    # 如果是最後一次重試，不需要繼續
-                    if retry_count == max_retries:
-                        break
-                    
-                    # 短暫延遲後重試
-                    time.sleep(1.0)
+            if retry_count > 0:
+                delay = _backoff_delay(retry_count - 1, self.retry_backoff_base, self.retry_backoff_cap)
+                if time.monotonic() + delay >= deadline:
+                    break
+                self._count('retries')
+                logger.info(f"{delay:.2f} 秒後重試識別 (第 {retry_count + 1} 次)")
+                time.sleep(delay)
+            
+            result, error = self._hedged_attempt(audio_data, deadline)
+            if result is not None:
+                return result
+            last_error = error or last_error
+            if time.monotonic() >= deadline:
+                break
+        
+        if time.monotonic() >= deadline:
+            self._count('deadline_exceeded')
+            last_error = last_error or "識別超時"
         
         # 所有策略都失敗了
         error_message = f"所有識別策略都失敗了。最後錯誤: {last_error or '未知錯誤'}"
         logger.error(error_message)
         return False, error_message, 0.0
-
-    def _safe_cleanup_temp_file(self, temp_file_path: str, max_retries: int = 5, delay: float = 0.3):
+    
+    def _hedged_attempt(self, audio_data: bytes, deadline: float) -> Tuple[Optional[Tuple[bool, str, float]], Optional[str]]:
         """
-        增強的安全清理臨時文件，專門處理 Windows 文件佔用問題
+        執行一輪對沖識別
+        
+        對沖計時從單次識別開始執行時算起（不含在線程池中排隊的時間）；線程池
+        已用滿時不對沖，只在單次識別失敗後改用連續識別。單次識別在 SDK 中
+        無法中途取消，落敗時只丟棄其結果；連續識別通過 stop_event 提前結束。
         
         Args:
-            temp_file_path: 臨時文件路徑
-            max_retries: 最大重試次數
-            delay: 重試間隔（秒）
+            audio_data: 已轉換的 WAV 數據
+            deadline: 總時限（time.monotonic() 時間）
+            
+        Returns:
+            Tuple: (第一個可用結果或 None, 最後的錯誤信息)
         """
-        import sys
-        import subprocess
+        stop_event = threading.Event()
+        future, single_started = self._submit_strategy(self.transcribe_audio_sync, audio_data, True)
+        pending = {future: STRATEGY_SINGLE}
+        logger.info(f"嘗試 {STRATEGY_SINGLE}")
+        hedged = False
+        skip_hedge = False
+        last_error = None
         
-        for attempt in range(max_retries):
-            try:
-                # 第一步：強制垃圾回收和延遲
-                if attempt > 0:
-                    gc.collect()
-                    time.sleep(delay * attempt)  # 遞增延遲
+        try:
+            while pending or not hedged:
+                now = time.monotonic()
+                if now >= deadline:
+                    logger.warning("識別超過總時限")
+                    return None, last_error or "識別超時"
                 
-                # 檢查文件是否存在
-                if not os.path.exists(temp_file_path):
-                    logger.debug(f"臨時文件已不存在: {temp_file_path}")
-                    return
+                single_running = STRATEGY_SINGLE in pending.values()
+                hedge_at = (single_started[0] if single_started else now) + self.hedge_delay
+                if not hedged and single_running and not skip_hedge and now >= hedge_at and self._strategy_saturated():
+                    skip_hedge = True
+                    self._count('hedge_skipped')
+                    logger.info(f"識別線程已用滿，{STRATEGY_SINGLE} 超時也不啟動對沖")
                 
-                # 第二步：嘗試標準刪除
-                os.unlink(temp_file_path)
-                logger.debug(f"成功清理臨時文件: {temp_file_path}")
-                return
-                    
-            except PermissionError as e:
-                logger.warning(f"清理嘗試 {attempt + 1}/{max_retries} (權限錯誤): {e}")
+                # 單次識別開始執行後超過 p95 耗時或已失敗時，啟動連續識別
+                if not hedged and (not single_running or (not skip_hedge and now >= hedge_at)):
+                    hedged = True
+                    if single_running:
+                        self._count('hedged')
+                        logger.info(f"{STRATEGY_SINGLE} 超過 {self.hedge_delay} 秒未返回，並行啟動 {STRATEGY_CONTINUOUS}")
+                    future, _ = self._submit_strategy(
+                        self.transcribe_audio_continuous, audio_data, max(0.0, deadline - now), stop_event, True
+                    )
+                    pending[future] = STRATEGY_CONTINUOUS
                 
-                # Windows 特殊處理
-                if sys.platform.startswith('win') and attempt < max_retries - 1:
-                    try:
-                        # 嘗試使用 Windows del 命令強制刪除
-                        result = subprocess.run(
-                            ['del', '/F', '/Q', f'"{temp_file_path}"'],
-                            shell=True,
-                            capture_output=True,
-                            timeout=5,
-                            text=True
-                        )
-                        
-                        # 檢查是否成功刪除
-                        if not os.path.exists(temp_file_path):
-                            logger.info(f"使用 del 命令成功清理: {temp_file_path}")
-                            return
-                        elif result.returncode == 0:
-                            logger.debug(f"del 命令執行成功但文件仍存在")
-                            
-                    except subprocess.TimeoutExpired:
-                        logger.warning(f"del 命令超時")
-                    except Exception as cmd_error:
-                        logger.debug(f"del 命令失敗: {cmd_error}")
-                    
-            except OSError as e:
-                if e.errno == 32 or "being used by another process" in str(e):
-                    logger.warning(f"清理嘗試 {attempt + 1}/{max_retries} (文件被佔用): {e}")
-                    
-                    # 最後一次嘗試時，標記文件為待刪除
-                    if attempt == max_retries - 1:
-                        try:
-                            import random
-                            pending_name = f"{temp_file_path}.delete_{int(time.time())}_{random.randint(1000,9999)}"
-                            os.rename(temp_file_path, pending_name)
-                            logger.info(f"文件標記為待清理: {pending_name}")
-                            
-                            # 嘗試使用後台任務清理
-                            if sys.platform.startswith('win'):
-                                try:
-                                    # 創建一個延遲刪除的批處理命令
-                                    subprocess.Popen(
-                                        f'timeout /t 5 >nul && del /F /Q "{pending_name}"',
-                                        shell=True,
-                                        creationflags=subprocess.CREATE_NO_WINDOW
-                                    )
-                                    logger.debug(f"已安排延遲刪除任務")
-                                except:
-                                    pass
-                            return
-                            
-                        except Exception as rename_error:
-                            logger.error(f"無法重命名文件為待刪除: {rename_error}")
-                else:
-                    logger.error(f"清理時發生未知 OSError: {e}")
-                    break
-                    
-            except Exception as e:
-                logger.error(f"清理時發生未知異常: {e}")
-                break
+                wake_at = deadline if hedged or skip_hedge else min(deadline, hedge_at)
+                done, _ = wait(list(pending), timeout=max(0.0, wake_at - time.monotonic()),
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    strategy_name = pending.pop(future)
+                    # 策略自行捕獲異常並返回錯誤信息（1007 錯誤已在策略中回收識別器）
+                    success, text, confidence = future.result()
+                    if success and text.strip():
+                        logger.info(f"{strategy_name} 成功: {text}")
+                        self._count('wins', strategy_name)
+                        return (success, text, confidence), None
+                    logger.warning(f"{strategy_name} 無結果: {text}")
+                    last_error = text
+            return None, last_error
+        finally:
+            # 結束仍在運行的策略（單次識別完成後自行釋放資源）
+            stop_event.set()
+            for future in pending:
+                future.cancel()
+    
+    def _submit_strategy(self, fn, *args) -> Tuple[Future, List[float]]:
+        """
+        在策略線程池中執行識別策略
+        
+        Returns:
+            Tuple[Future, List[float]]: (future, 開始執行時記下的 time.monotonic()，未開始時為空)
+        """
+        started = []
+        
+        def run():
+            started.append(time.monotonic())
+            return fn(*args)
         
-        # 所有嘗試都失敗了 - 靜默處理，避免日誌噪音
-        logger.debug(f"臨時文件將由系統稍後清理: {temp_file_path}")
-        # 不再輸出錯誤信息，因為這是 Windows 上的常見情況，不影響功能
+        with self._stats_lock:
+            self._strategy_inflight += 1
+        future = self._strategy_executor.submit(run)
+        # 取消排隊中的策略時同樣會調用
+        future.add_done_callback(self._strategy_finished)
+        return future, started
+    
+    def _strategy_finished(self, future: Future):
+        with self._stats_lock:
+            self._strategy_inflight -= 1
+    
+    def _strategy_saturated(self) -> bool:
+        """策略線程是否都在執行或已有排隊的策略"""
+        with self._stats_lock:
+            return self._strategy_inflight >= self.strategy_workers
 
     def configure_for_cantonese(self):
         """配置粵語識別參數"""
@@ -0,0 +1,169 @@
+"""
+Azure Speech 訪問令牌管理 - 進程內緩存 STS 令牌，後台線程在過期前刷新
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# STS 令牌有效期為 10 分鐘
+TOKEN_TTL = 600.0
+# 連續失敗後的重試間隔（秒）
+_RETRY_DELAYS = (1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
+# 連續失敗達到此次數時視為熔斷（調用方改用訂閱密鑰）
+_CIRCUIT_THRESHOLD = 3
+
+
+class SpeechTokenManager:
+    """
+    STS 令牌管理器
+
+    get_token 只讀取緩存，從不等待網絡請求：令牌接近過期時喚醒後台線程
+    刷新，沒有可用令牌時返回 None，調用方改用訂閱密鑰。
+    """
+
+    def __init__(self, azure_key: str, azure_region: str, refresh_before: float = 60.0,
+                 expiry_margin: float = 15.0, timeout: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic, endpoint: Optional[str] = None):
+        """
+        初始化令牌管理器（後台線程立即獲取第一個令牌）
+
+        Args:
+            azure_key: Azure Speech Services 密鑰
+            azure_region: Azure 服務區域
+            refresh_before: 在過期前多少秒開始刷新
+            expiry_margin: 在過期前多少秒停止使用舊令牌
+            timeout: 獲取令牌的請求超時（秒）
+            clock: 時鐘函數（秒）
+            endpoint: STS 地址（默認按區域生成）
+        """
+        self.azure_key = azure_key
+        self.endpoint = endpoint or f"https://{azure_region}.api.cognitive.microsoft.com/sts/v1.0/issueToken"
+        self.refresh_before = refresh_before
+        self.expiry_margin = expiry_margin
+        self._clock = clock
+        self._http = httpx.Client(timeout=timeout)
+
+        self._token: Optional[str] = None
+        self._issued_at = 0.0
+        self._failures = 0
+        self._retry_at = 0.0
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'refreshes': 0, 'errors': 0}
+
+        self._thread = threading.Thread(target=self._refresh_loop, name='speech-token', daemon=True)
+        self._thread.start()
+
+    def _age(self) -> float:
+        return self._clock() - self._issued_at
+
+    def get_token(self) -> Optional[str]:
+        """
+        獲取緩存的令牌（不阻塞）
+
+        Returns:
+            Optional[str]: 有效的令牌；尚未獲取、已過期或已失效時為 None
+        """
+        with self._lock:
+            token = self._token
+            age = self._age()
+            if token is not None and age < TOKEN_TTL - self.expiry_margin:
+                self._stats['hits'] += 1
+            else:
+                token = None
+                self._stats['misses'] += 1
+        if token is None or age >= TOKEN_TTL - self.refresh_before:
+            self._wakeup.set()
+        return token
+
+    def invalidate(self):
+        """丟棄當前令牌（例如服務返回 401），後台立即重新獲取"""
+        with self._lock:
+            self._token = None
+        self._wakeup.set()
+
+    def refresh(self) -> bool:
+        """
+        同步獲取新令牌（由後台線程調用）
+
+        Returns:
+            bool: 是否成功
+        """
+        try:
+            response = self._http.post(self.endpoint, headers={
+                'Ocp-Apim-Subscription-Key': self.azure_key,
+                'Content-Type': 'application/x-www-form-urlencoded'
+            })
+            response.raise_for_status()
+            token = response.text.strip()
+            if not token:
+                raise ValueError("STS 返回空令牌")
+        except Exception as e:
+            with self._lock:
+                self._failures += 1
+                self._stats['errors'] += 1
+                delay = _RETRY_DELAYS[min(self._failures - 1, len(_RETRY_DELAYS) - 1)]
+                self._retry_at = self._clock() + delay
+            logger.warning(f"獲取語音服務令牌失敗，{delay} 秒後重試: {e}")
+            return False
+
+        with self._lock:
+            self._token = token
+            self._issued_at = self._clock()
+            self._failures = 0
+            self._retry_at = 0.0
+            self._stats['refreshes'] += 1
+        logger.debug("語音服務令牌已刷新")
+        return True
+
+    def _next_refresh_delay(self) -> float:
+        """距離下一次需要刷新的秒數"""
+        with self._lock:
+            now = self._clock()
+            if self._failures:
+                return max(0.0, self._retry_at - now)
+            if self._token is None:
+                return 0.0
+            return max(0.0, TOKEN_TTL - self.refresh_before - self._age())
+
+    def _refresh_loop(self):
+        """後台刷新令牌；失敗時按遞增間隔重試"""
+        while not self._closed:
+            delay = self._next_refresh_delay()
+            if delay > 0:
+                self._wakeup.wait(delay)
+                self._wakeup.clear()
+                # 被 get_token 喚醒時重新計算（重試間隔內不提前請求）
+                if self._next_refresh_delay() > 0:
+                    continue
+            if not self._closed:
+                self.refresh()
+
+    @property
+    def circuit_open(self) -> bool:
+        """是否因連續失敗而暫停使用令牌"""
+        with self._lock:
+            return self._failures >= _CIRCUIT_THRESHOLD
+
+    def close(self):
+        """停止後台刷新"""
+        self._closed = True
+        self._wakeup.set()
+        self._http.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """獲取令牌使用及刷新統計"""
+        with self._lock:
+            return dict(
+                self._stats,
+                token_valid=self._token is not None and self._age() < TOKEN_TTL - self.expiry_margin,
+                age_seconds=round(self._age(), 1) if self._token is not None else None,
+                consecutive_failures=self._failures,
+                circuit_open=self._failures >= _CIRCUIT_THRESHOLD
+            )
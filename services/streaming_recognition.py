@@ -0,0 +1,142 @@
+"""
+串流語音識別 - 邊錄音邊識別，推送中間及最終結果
+"""
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Tuple
+
+import azure.cognitiveservices.speech as speechsdk
+import azure.cognitiveservices.speech.audio as audio
+
+logger = logging.getLogger(__name__)
+
+# PushAudioInputStream 支持的 16-bit PCM 採樣率
+SUPPORTED_SAMPLE_RATES = (8000, 16000, 22050, 24000, 32000, 44100, 48000)
+
+EventCallback = Callable[[str, Dict[str, Any]], None]
+
+
+class StreamingRecognition:
+    """
+    一個客戶端連接的連續識別會話
+
+    客戶端持續送入 16-bit 單聲道 PCM 幀，識別器的 recognizing（中間結果）
+    及 recognized（分段最終結果）事件經 on_event 回調推送；客戶端停止錄音時
+    關閉推送流，SDK 立即完成最後一段識別。
+    """
+
+    def __init__(self, speech_config: speechsdk.SpeechConfig, on_event: EventCallback,
+                 sample_rate: int = 16000):
+        """
+        創建識別會話
+
+        Args:
+            speech_config: 語音配置
+            on_event: 事件回調 (事件名稱, 數據)，在 SDK 線程中調用
+            sample_rate: 客戶端 PCM 採樣率
+        """
+        if sample_rate not in SUPPORTED_SAMPLE_RATES:
+            raise ValueError(f"不支持的採樣率: {sample_rate}")
+
+        self.sample_rate = sample_rate
+        self._on_event = on_event
+        self._segments: List[str] = []
+        self._error = None
+        self._stopped = threading.Event()
+        self._finished = False
+        self.bytes_received = 0
+
+        # 識別器綁定客戶端採樣率的推送流、串流配置及連續識別連接，不能取自識別器池；
+        # 建立連接期間送入的音頻由推送流緩衝，連接與顧客說話同時進行
+        stream_format = audio.AudioStreamFormat(samples_per_second=sample_rate, bits_per_sample=16, channels=1)
+        self._push_stream = audio.PushAudioInputStream(stream_format=stream_format)
+        self._recognizer = speechsdk.SpeechRecognizer(
+            speech_config=speech_config,
+            audio_config=audio.AudioConfig(stream=self._push_stream)
+        )
+        self._recognizer.recognizing.connect(self._handle_recognizing)
+        self._recognizer.recognized.connect(self._handle_recognized)
+        self._recognizer.canceled.connect(self._handle_canceled)
+        self._recognizer.session_stopped.connect(lambda evt: self._stopped.set())
+
+    def _emit(self, event: str, payload: Dict[str, Any]):
+        """調用事件回調（回調異常不影響識別）"""
+        try:
+            self._on_event(event, payload)
+        except Exception as e:
+            logger.warning(f"推送識別事件失敗 ({event}): {e}")
+
+    def _handle_recognizing(self, evt):
+        """中間結果"""
+        if evt.result.text:
+            self._emit('recognizing', {'text': evt.result.text})
+
+    def _handle_recognized(self, evt):
+        """分段最終結果"""
+        if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech and evt.result.text:
+            self._segments.append(evt.result.text)
+            self._emit('recognized', {'text': evt.result.text})
+
+    def _handle_canceled(self, evt):
+        """識別取消（推送流結束時原因為 EndOfStream，不是錯誤）"""
+        if evt.reason == speechsdk.CancellationReason.Error:
+            self._error = evt.error_details
+            logger.error(f"串流識別錯誤: {evt.error_details}")
+            self._emit('error', {'error': f'識別錯誤: {evt.error_details}'})
+        self._stopped.set()
+
+    def start(self):
+        """開始連續識別（不阻塞）"""
+        self._recognizer.start_continuous_recognition_async()
+
+    def write(self, chunk: bytes):
+        """
+        送入一段 PCM 數據
+
+        Args:
+            chunk: 16-bit 小端單聲道 PCM
+        """
+        if self._finished or not chunk:
+            return
+        self.bytes_received += len(chunk)
+        self._push_stream.write(chunk)
+
+    def finish(self, timeout: float = 5.0) -> Tuple[bool, str, float]:
+        """
+        結束輸入並等待最終結果
+
+        Args:
+            timeout: 等待最後一段識別的時間（秒）
+
+        Returns:
+            Tuple[bool, str, float]: (成功標誌, 轉錄文字, 信心度)
+        """
+        if not self._finished:
+            self._finished = True
+            self._push_stream.close()
+        if not self._stopped.wait(timeout):
+            logger.warning("等待串流識別結果超時")
+        self._recognizer.stop_continuous_recognition_async()
+
+        text = "".join(self._segments).strip()
+        if text:
+            return True, text, min(0.95, len(text) / 50.0 + 0.7)
+        if self._error:
+            return False, f"識別錯誤: {self._error}", 0.0
+        return False, "未識別到語音內容", 0.0
+
+    def close(self):
+        """中止會話（例如客戶端斷線）"""
+        if not self._finished:
+            self._finished = True
+            try:
+                self._push_stream.close()
+                self._recognizer.stop_continuous_recognition_async()
+            except Exception as e:
+                logger.debug(f"關閉串流識別會話失敗: {e}")
+
+    @property
+    def duration(self) -> float:
+        """已收到的音頻時長（秒）"""
+        return self.bytes_received / (self.sample_rate * 2)
+
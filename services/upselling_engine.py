@@ -0,0 +1,308 @@
+"""
+追加銷售規則引擎 - 規則表預編譯為位掩碼，按特徵組合緩存建議
+"""
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'upselling_rules.json'
+)
+
+# 由訂單項目推導的特徵（固定位）
+HAS_DRINKS = 1 << 0
+HAS_TEA = 1 << 1
+HAS_COFFEE = 1 << 2
+HAS_FOOD = 1 << 3
+HAS_COLD = 1 << 4
+HAS_HOT = 1 << 5
+
+ITEM_FEATURES: Mapping[str, int] = {
+    'has_drinks': HAS_DRINKS,
+    'has_tea': HAS_TEA,
+    'has_coffee': HAS_COFFEE,
+    'has_food': HAS_FOOD,
+    'has_cold': HAS_COLD,
+    'has_hot': HAS_HOT,
+}
+
+DRINK_KEYWORDS = ('茶', '汁', '可樂', '咖啡', '奶茶')
+COFFEE_KEYWORDS = ('咖啡', '鴛鴦')
+FOOD_KEYWORDS = ('河', '麵', '飯', '多士', '三明治')
+
+# 規則文件檢查間隔（秒）
+DEFAULT_RELOAD_INTERVAL = 5.0
+
+
+@lru_cache(maxsize=1024)
+def item_features(item_name: str, temperature: str = '') -> int:
+    """
+    計算單個訂單項目的特徵位（按名稱及溫度緩存）
+
+    Args:
+        item_name: 項目名稱
+        temperature: 定制選項中的溫度（凍/熱/室溫）
+
+    Returns:
+        int: 特徵位掩碼
+    """
+    name = item_name.lower()
+    mask = 0
+    if any(keyword in name for keyword in DRINK_KEYWORDS):
+        mask |= HAS_DRINKS
+        if '茶' in name:
+            mask |= HAS_TEA
+        if any(keyword in name for keyword in COFFEE_KEYWORDS):
+            mask |= HAS_COFFEE
+        if temperature == '凍' or '凍' in name:
+            mask |= HAS_COLD
+        elif temperature == '熱' or '熱' in name:
+            mask |= HAS_HOT
+    if any(keyword in name for keyword in FOOD_KEYWORDS):
+        mask |= HAS_FOOD
+    return mask
+
+
+@dataclass
+class CompiledRules:
+    """編譯後的規則表（每次重新載入生成新對象，緩存隨之失效）"""
+    rules: Tuple[Tuple[int, int, Tuple[Dict[str, Any], ...]], ...]
+    dayparts: Tuple[Tuple[int, int, int], ...]
+    spend_bands: Tuple[Tuple[float, int], ...]
+    max_suggestions: int = 4
+    memo: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+
+
+def compile_rules(data: Mapping[str, Any]) -> CompiledRules:
+    """
+    將規則數據編譯為位掩碼規則表
+
+    Args:
+        data: 規則文件內容（dayparts、spend_bands、rules、max_suggestions）
+
+    Returns:
+        CompiledRules: 編譯後的規則表
+
+    Raises:
+        ValueError: 規則引用了未定義的特徵或格式錯誤
+    """
+    features = dict(ITEM_FEATURES)
+
+    def allocate(name: str) -> int:
+        if name in features:
+            raise ValueError(f"重複定義的特徵: {name}")
+        features[name] = 1 << len(features)
+        return features[name]
+
+    dayparts = tuple(
+        (int(entry['start_hour']), int(entry['end_hour']), allocate(entry['feature']))
+        for entry in data.get('dayparts', ())
+    )
+    spend_bands = tuple(sorted(
+        ((float(entry['min_total']), allocate(entry['feature'])) for entry in data.get('spend_bands', ())),
+        key=lambda band: -band[0]
+    ))
+
+    def to_mask(names: Sequence[str]) -> int:
+        mask = 0
+        for name in names:
+            if name not in features:
+                raise ValueError(f"未定義的特徵: {name}")
+            mask |= features[name]
+        return mask
+
+    rules = []
+    for rule in data.get('rules', ()):
+        suggestions = tuple(
+            {
+                'item': str(entry['item']),
+                'message': str(entry.get('message', '')),
+                'price': float(entry.get('price', 0.0)),
+                'category': str(entry.get('category', ''))
+            }
+            for entry in rule.get('suggest', ())
+        )
+        rules.append((to_mask(rule.get('when', ())), to_mask(rule.get('unless', ())), suggestions))
+
+    return CompiledRules(
+        rules=tuple(rules),
+        dayparts=dayparts,
+        spend_bands=spend_bands,
+        max_suggestions=int(data.get('max_suggestions', 4))
+    )
+
+
+class UpsellingEngine:
+    """
+    追加銷售規則引擎
+
+    訂單先轉換為特徵位掩碼（項目類別、冷熱、消費檔次、時段），
+    同一掩碼的建議只計算一次。規則文件修改後自動重新載入，無需重新部署。
+    """
+
+    def __init__(self, path: str = DEFAULT_RULES_PATH, reload_interval: float = DEFAULT_RELOAD_INTERVAL,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化規則引擎
+
+        Args:
+            path: 規則文件路徑（JSON）
+            reload_interval: 檢查規則文件是否修改的間隔（秒），0 表示每次都檢查
+            clock: 時間來源（便於測試）
+        """
+        self.path = path
+        self.reload_interval = reload_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self._hour_mask = (0, 0.0)  # (時段特徵, 有效期至)
+        self.reloads = 0
+        self._compiled = CompiledRules(rules=(), dayparts=(), spend_bands=())
+        self.reload()
+
+    def reload(self) -> bool:
+        """
+        重新載入規則文件；文件無效時保留現有規則
+
+        Returns:
+            bool: 是否成功載入
+        """
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError as e:
+                logger.error(f"追加銷售規則文件不可用，保留現有規則: {e}")
+                return False
+            # 無論成功與否都記下修改時間，無效文件在再次修改前不會重複嘗試
+            self._mtime = mtime
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    compiled = compile_rules(json.load(f))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.error(f"追加銷售規則載入失敗，保留現有規則: {e}")
+                return False
+            self._compiled = compiled
+            self._hour_mask = (0, 0.0)
+            self.reloads += 1
+            logger.info(f"追加銷售規則已載入: {len(compiled.rules)} 條 ({self.path})")
+            return True
+
+    def _maybe_reload(self):
+        """按間隔檢查規則文件的修改時間"""
+        now = self._clock()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.reload_interval
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self.reload()
+
+    def _daypart_mask(self, compiled: CompiledRules) -> int:
+        """當前時段的特徵位（每小時計算一次）"""
+        mask, valid_until = self._hour_mask
+        now = time.time()
+        if now < valid_until:
+            return mask
+        hour = time.localtime(now).tm_hour
+        mask = self.daypart_features(compiled, hour)
+        self._hour_mask = (mask, now - now % 3600 + 3600)
+        return mask
+
+    @staticmethod
+    def daypart_features(compiled: CompiledRules, hour: int) -> int:
+        """指定小時對應的時段特徵位（按規則文件順序取第一個匹配的時段）"""
+        for start_hour, end_hour, bit in compiled.dayparts:
+            if start_hour <= hour <= end_hour:
+                return bit
+        return 0
+
+    def order_features(self, order: Mapping[str, Any], hour: Optional[int] = None) -> int:
+        """
+        計算訂單的特徵位掩碼
+
+        Args:
+            order: 訂單數據（items、total）
+            hour: 指定小時（可選，默認使用當前時間）
+
+        Returns:
+            int: 特徵位掩碼
+        """
+        compiled = self._compiled
+        mask = 0
+        for item in order.get('items', ()):
+            customizations = item.get('customizations') or {}
+            mask |= item_features(item.get('name', ''), customizations.get('溫度', ''))
+
+        total = order.get('total', 0) or 0
+        for min_total, bit in compiled.spend_bands:
+            if total >= min_total:
+                mask |= bit
+                break
+
+        if hour is None:
+            mask |= self._daypart_mask(compiled)
+        else:
+            mask |= self.daypart_features(compiled, hour)
+        return mask
+
+    def suggest(self, order: Mapping[str, Any], hour: Optional[int] = None) -> Dict[str, Any]:
+        """
+        生成追加銷售建議
+
+        Args:
+            order: 訂單數據
+            hour: 指定小時（可選，默認使用當前時間）
+
+        Returns:
+            Dict: suggestions、total_suggestions、categories（建議對象為共享數據，請勿修改）
+        """
+        self._maybe_reload()
+        compiled = self._compiled
+        mask = self.order_features(order, hour)
+        result = compiled.memo.get(mask)
+        if result is None:
+            result = self._evaluate(compiled, mask)
+            compiled.memo[mask] = result
+        return {
+            'suggestions': list(result['suggestions']),
+            'total_suggestions': result['total_suggestions'],
+            'categories': list(result['categories'])
+        }
+
+    @staticmethod
+    def _evaluate(compiled: CompiledRules, mask: int) -> Dict[str, Any]:
+        """對一個特徵組合求值：按規則順序收集、去重、排序並截取"""
+        unique: Dict[str, Dict[str, Any]] = {}
+        for when, unless, suggestions in compiled.rules:
+            if mask & when == when and not mask & unless:
+                for suggestion in suggestions:
+                    unique.setdefault(suggestion['item'], suggestion)
+
+        ordered: List[Dict[str, Any]] = sorted(unique.values(), key=lambda s: (s['category'], s['price']))
+        final = tuple(ordered[:compiled.max_suggestions])
+        return {
+            'suggestions': final,
+            'total_suggestions': len(ordered),
+            'categories': tuple(dict.fromkeys(s['category'] for s in final))
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """獲取規則引擎狀態"""
+        compiled = self._compiled
+        return {
+            'path': self.path,
+            'rules': len(compiled.rules),
+            'reloads': self.reloads,
+            'memoized_combinations': len(compiled.memo)
+        }
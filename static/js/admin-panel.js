@@ -5,23 +5,24 @@
 class AdminPanel {
     constructor() {
         this.orders = [];
-        this.websocket = null;
-        this.reconnectAttempts = 0;
-        this.maxReconnectAttempts = 5;
-        this.reconnectDelay = 1000;
+        this.eventSource = null;
+        // 變更游標：服務端 epoch 及已處理的版本號
+        this.epoch = null;
+        this.version = null;
         
         this.initializeElements();
         this.bindEvents();
         this.loadOrders();
+        this.connectFeed();
         this.updateTime();
         
         // 每30秒更新一次時間
         setInterval(() => this.updateTime(), 30000);
         
-        // 每5秒刷新一次訂單（如果沒有WebSocket連接）
+        // 每5秒只拉取變更（如果沒有推送連接）
         setInterval(() => {
-            if (!this.websocket || this.websocket.readyState !== WebSocket.OPEN) {
-                this.loadOrders();
+            if (!this.eventSource || this.eventSource.readyState !== EventSource.OPEN) {
+                this.loadOrders(true);
             }
         }, 5000);
     }
@@ -55,15 +56,17 @@ class AdminPanel {
         }
     }
     
-    async loadOrders() {
+    async loadOrders(incremental = false) {
         try {
-            const response = await fetch('/api/order/active');
+            // 增量模式只下載上次版本之後的變更；服務端無法補發時返回全部活躍訂單
+            const params = incremental && this.version !== null
+                ? `?since=${this.version}&epoch=${this.epoch}`
+                : '';
+            const response = await fetch(`/api/order/changes${params}`);
             const result = await response.json();
             
             if (result.success) {
-                this.orders = result.orders;
-                this.updateStatistics();
-                this.displayOrders();
+                this.applyChanges(result);
             } else {
                 console.error('載入訂單失敗:', result.error);
             }
@@ -73,6 +76,39 @@ class AdminPanel {
         }
     }
     
+    applyChanges(result) {
+        // 推送連接已處理更新的版本時忽略較舊的輪詢結果
+        if (!result.reset && result.epoch === this.epoch && result.version <= this.version) {
+            return;
+        }
+        
+        if (result.reset) {
+            this.orders = result.orders;
+        } else {
+            result.events.forEach(event => this.applyEvent(event));
+        }
+        this.epoch = result.epoch;
+        this.version = result.version;
+        
+        this.updateStatistics();
+        this.displayOrders();
+    }
+    
+    applyEvent(event) {
+        const order = event.order;
+        const index = this.orders.findIndex(o => o.id === order.id);
+        const active = !['delivered', 'cancelled'].includes(order.status);
+        
+        if (!active) {
+            if (index !== -1) this.orders.splice(index, 1);
+        } else if (index !== -1) {
+            this.orders[index] = order;
+        } else {
+            this.orders.push(order);
+        }
+        this.version = event.version;
+    }
+    
     updateStatistics() {
         const today = new Date().toDateString();
         
@@ -291,13 +327,37 @@ class AdminPanel {
         this.displayOrders();
     }
     
-    connectWebSocket() {
-        // WebSocket 連接將在後續任務中實現
+    connectFeed() {
+        if (!window.EventSource) {
+            this.updateConnectionStatus('disconnected');
+            return;
+        }
+        
         this.updateConnectionStatus('connecting');
+        // 斷線後瀏覽器自動重連，並以 Last-Event-ID 取回缺少的變更
+        this.eventSource = new EventSource('/api/order/stream');
         
-        setTimeout(() => {
-            this.updateConnectionStatus('disconnected');
-        }, 2000);
+        this.eventSource.addEventListener('open', () => {
+            this.updateConnectionStatus('connected');
+        });
+        
+        this.eventSource.addEventListener('error', () => {
+            this.updateConnectionStatus(
+                this.eventSource.readyState === EventSource.CLOSED ? 'disconnected' : 'connecting'
+            );
+        });
+        
+        this.eventSource.addEventListener('snapshot', (e) => {
+            this.applyChanges(JSON.parse(e.data));
+        });
+        
+        this.eventSource.addEventListener('change', (e) => {
+            const event = JSON.parse(e.data);
+            if (this.version !== null && event.version <= this.version) return;
+            this.applyEvent(event);
+            this.updateStatistics();
+            this.displayOrders();
+        });
     }
     
     updateConnectionStatus(status) {
@@ -61,40 +61,104 @@ async function parseOrder(transcription) {
         // 顯示處理中狀態
         showProcessingStatus('正在解析您的訂單...');
         
-        // 調用訂單解析API
-        const response = await fetch('/api/order/parse', {
+        // 優先使用串流解析，逐項顯示訂單
+        const result = await parseOrderStream(transcription);
+        
+        // 隱藏處理狀態
+        hideProcessingStatus();
+        
+        handleParseResult(result);
+        
+    } catch (error) {
+        console.error('解析訂單錯誤:', error);
+        hideProcessingStatus();
+        showError('網絡錯誤，請檢查連接後重試');
+    }
+}
+
+async function parseOrderStream(transcription) {
+    const requestBody = JSON.stringify({
+        transcription: transcription,
+        context: 'tea_restaurant'
+    });
+    
+    const response = await fetch('/api/order/parse/stream', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: requestBody
+    });
+    
+    // 瀏覽器不支援串流讀取時回退到一次性解析
+    if (!response.ok || !response.body || !window.TextDecoder) {
+        const fallback = await fetch('/api/order/parse', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
             },
-            body: JSON.stringify({
-                transcription: transcription,
-                context: 'tea_restaurant'
-            })
+            body: requestBody
         });
+        return await fallback.json();
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder('utf-8');
+    const isNewOrder = !(orderDisplay.currentOrder && orderDisplay.currentOrder.order);
+    const partialItems = [];
+    let buffer = '';
+    let finalResult = null;
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
         
-        const result = await response.json();
-        
-        // 隱藏處理狀態
-        hideProcessingStatus();
+        buffer += decoder.decode(value, { stream: true });
         
-        if (result.success) {
-            // 檢查是否有現有訂單需要合併
-            if (orderDisplay.currentOrder && orderDisplay.currentOrder.order) {
-                // 合併新項目到現有訂單
-                mergeOrderItems(result);
-            } else {
-                // 顯示新訂單
-                orderDisplay.updateOrder(result);
+        // SSE 消息以空行分隔
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const message = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            
+            let event = 'message';
+            let data = '';
+            message.split('\n').forEach(line => {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            });
+            if (!data) continue;
+            
+            const payload = JSON.parse(data);
+            if (event === 'item') {
+                partialItems.push(payload);
+                // 新訂單：第一個項目到達即顯示
+                if (isNewOrder) {
+                    hideProcessingStatus();
+                    orderDisplay.displayOrderItems({ items: partialItems, special_requests: [] });
+                    orderDisplay.showOrderSection();
+                }
+            } else if (event === 'result' || event === 'error') {
+                finalResult = payload;
             }
+        }
+    }
+    
+    return finalResult || { success: false, error: '訂單解析失敗，請重試' };
+}
+
+function handleParseResult(result) {
+    if (result.success) {
+        // 檢查是否有現有訂單需要合併
+        if (orderDisplay.currentOrder && orderDisplay.currentOrder.order) {
+            // 合併新項目到現有訂單
+            mergeOrderItems(result);
         } else {
-            showError(result.error || result.message || '訂單解析失敗，請重試');
+            // 顯示新訂單
+            orderDisplay.updateOrder(result);
         }
-        
-    } catch (error) {
-        console.error('解析訂單錯誤:', error);
-        hideProcessingStatus();
-        showError('網絡錯誤，請檢查連接後重試');
+    } else {
+        showError(result.error || result.message || '訂單解析失敗，請重試');
     }
 }
 
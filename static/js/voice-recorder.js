@@ -8,12 +8,18 @@ class VoiceRecorder {
         this.isRecording = false;
         this.recordingTimer = null;
         this.recordingStartTime = null;
+        this.socket = null;          // 串流識別 WebSocket 連接
+        this.streamingSession = null; // 進行中的串流識別
+        this.streamingFailed = false; // 連接失敗時暫停串流識別
+        this.pendingFinal = null;     // 等待最終結果的回調
         
         // 配置選項
         this.options = {
             sampleRate: 16000,
             maxRecordingTime: 60000, // 最大錄音時間 60 秒
             showRecordingTime: true,  // 顯示錄音時間
+            streaming: true,          // 邊錄音邊經 WebSocket 識別（不可用時改為錄音後上傳）
+            streamingFinalTimeout: 6000, // 停止錄音後等待最終結果的時間（毫秒）
             ...options
         };
         
@@ -109,6 +115,7 @@ class VoiceRecorder {
         try {
             this.wavRecorder.startRecording();
             this.isRecording = true;
+            this.startStreaming();
             this.recordingStartTime = Date.now();
             
             // 更新UI
@@ -147,6 +154,9 @@ class VoiceRecorder {
         try {
             const audioBlob = this.wavRecorder.stopRecording();
             this.isRecording = false;
+            this.wavRecorder.onChunk = null;
+            const streamingSession = this.streamingSession;
+            this.streamingSession = null;
             
             // 停止計時器
             this.stopRecordingTimer();
@@ -167,12 +177,17 @@ class VoiceRecorder {
             
             // 檢查錄音時長
             if (recordingDuration < 0.5) {
+                if (streamingSession) {
+                    this.socket.emit('stop');
+                }
                 this.handleError('錄音時間太短，請重新錄音');
                 return;
             }
             
-            // 處理錄音
-            if (audioBlob) {
+            // 處理錄音：串流識別已在進行時只需等待最終結果
+            if (streamingSession) {
+                this.finishStreaming(streamingSession, audioBlob, recordingDuration);
+            } else if (audioBlob) {
                 this.processRecording(audioBlob, recordingDuration);
             }
             
@@ -182,6 +197,102 @@ class VoiceRecorder {
         }
     }
     
+    connectStreaming() {
+        // 頁面未載入 Socket.IO 客戶端時不使用串流識別
+        if (!this.options.streaming || typeof io === 'undefined') {
+            return null;
+        }
+        if (this.socket) {
+            return this.socket;
+        }
+        
+        this.socket = io('/speech', { transports: ['websocket'] });
+        
+        // 中間結果即時顯示
+        this.socket.on('recognizing', (data) => {
+            const session = this.streamingSession;
+            if (session && data.text) {
+                this.showTranscriptionResult(session.confirmed + data.text + '…', 0);
+            }
+        });
+        
+        this.socket.on('recognized', (data) => {
+            const session = this.streamingSession;
+            if (session && data.text) {
+                session.confirmed += data.text;
+                this.showTranscriptionResult(session.confirmed, 0);
+            }
+        });
+        
+        this.socket.on('final', (data) => {
+            if (this.pendingFinal) {
+                this.pendingFinal(data);
+            }
+        });
+        
+        this.socket.on('error', (data) => {
+            console.warn('串流識別錯誤:', data && data.error);
+        });
+        
+        this.socket.on('connect', () => {
+            this.streamingFailed = false;
+        });
+        
+        this.socket.on('connect_error', (error) => {
+            this.streamingFailed = true;
+            console.warn('串流識別連接失敗，改為錄音後上傳:', error.message);
+        });
+        
+        return this.socket;
+    }
+    
+    startStreaming() {
+        const socket = this.connectStreaming();
+        if (!socket || this.streamingFailed) {
+            return;
+        }
+        
+        // 連接建立前的事件由 Socket.IO 緩衝，建立後依次送出
+        this.streamingSession = { confirmed: '' };
+        socket.emit('start', { sample_rate: this.wavRecorder.audioContext.sampleRate });
+        this.wavRecorder.onChunk = (pcmData) => {
+            socket.emit('audio', pcmData.buffer);
+        };
+    }
+    
+    async finishStreaming(session, audioBlob, duration = 0) {
+        this.showTranscriptionResult(session.confirmed || '處理中...', 0);
+        
+        const result = !this.socket.connected ? null : await new Promise((resolve) => {
+            const timeoutId = setTimeout(() => resolve(null), this.options.streamingFinalTimeout);
+            this.pendingFinal = (data) => {
+                clearTimeout(timeoutId);
+                resolve(data);
+            };
+            this.socket.emit('stop');
+        });
+        this.pendingFinal = null;
+        
+        if (result && result.success && result.transcription) {
+            this.showTranscriptionResult(result.transcription, result.confidence);
+            if (this.onTranscriptionReceived) {
+                this.onTranscriptionReceived({
+                    success: true,
+                    transcription: result.transcription,
+                    confidence: result.confidence,
+                    mode: 'streaming'
+                });
+            }
+            return;
+        }
+        
+        // 串流識別失敗或超時：上傳完整錄音
+        console.warn('串流識別未返回結果，改為上傳錄音:', result && result.error);
+        if (audioBlob) {
+            this.processRecording(audioBlob, duration);
+        }
+    }
+    
     processRecording(audioBlob, duration = 0) {
         if (!audioBlob || audioBlob.size === 0) {
             this.handleError('沒有錄製到音頻數據');
@@ -452,6 +563,11 @@ class VoiceRecorder {
     cleanup() {
         this.stopRecordingTimer();
         
+        if (this.socket) {
+            this.socket.disconnect();
+            this.socket = null;
+        }
+        
         if (this.wavRecorder) {
             this.wavRecorder.cleanup();
             this.wavRecorder = null;
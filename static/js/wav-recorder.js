@@ -10,6 +10,7 @@ class WAVRecorder {
         this.recording = false;
         this.audioData = [];
         this.sampleRate = 16000; // Azure Speech Services 推薦的採樣率
+        this.onChunk = null; // 每段 PCM 數據的回調（串流識別用）
     }
 
     async initialize() {
@@ -42,6 +43,9 @@ class WAVRecorder {
                     // 轉換為 16-bit PCM
                     const pcmData = this.floatTo16BitPCM(inputData);
                     this.audioData.push(pcmData);
+                    if (this.onChunk) {
+                        this.onChunk(pcmData);
+                    }
                 }
             };
 
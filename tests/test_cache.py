@@ -0,0 +1,138 @@
+"""
+緩存測試 - TTL 過期、LRU 淘汰、兩級緩存回填及 SQLite 清理
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.cache
+from utils.cache import LRUCache, SQLiteCache, TieredCache, make_cache_key
+
+
+class FakeClock:
+    """可手動推進的時鐘"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def wall_clock(monkeypatch):
+    """替換 SQLiteCache 使用的 time.time"""
+    clock = FakeClock(1_700_000_000.0)
+    monkeypatch.setattr(utils.cache.time, 'time', clock)
+    return clock
+
+
+def test_cache_key_is_stable_and_separates_parts():
+    assert make_cache_key('奶茶', 'model', 2) == make_cache_key('奶茶', 'model', 2)
+    assert make_cache_key('ab', 'c') != make_cache_key('a', 'bc')
+
+
+def test_lru_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = LRUCache(max_size=10, ttl=30, clock=clock)
+    cache.set('default', 1)
+    cache.set('short', 2, ttl=5)
+
+    clock.advance(5)
+    assert cache.get('short') is None
+    assert cache.get('default') == 1
+
+    clock.advance(25)
+    assert cache.get('default') is None
+    assert cache.stats()['expirations'] == 2
+
+
+def test_lru_without_ttl_never_expires():
+    clock = FakeClock()
+    cache = LRUCache(ttl=None, clock=clock)
+    cache.set('key', 'value')
+
+    clock.advance(10 ** 9)
+    assert cache.get('key') == 'value'
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_size=2, ttl=None)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')  # a 變成最近使用
+    cache.set('c', 3)
+
+    assert 'b' not in cache
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_tiered_backfills_local_with_remaining_ttl(tmp_path, wall_clock):
+    clock = FakeClock()
+    local = LRUCache(ttl=300, clock=clock)
+    shared = SQLiteCache(str(tmp_path / 'cache.db'), ttl=300)
+    shared.set('key', {'items': ['奶茶']}, ttl=60)
+    wall_clock.advance(50)
+
+    cache = TieredCache(local, shared)
+    assert cache.get('key') == {'items': ['奶茶']}
+    assert 'key' in local
+
+    # 共享層只剩 10 秒，回填的條目不能活得更久
+    clock.advance(9)
+    assert local.get('key') == {'items': ['奶茶']}
+    clock.advance(2)
+    assert local.get('key') is None
+
+
+def test_tiered_writes_and_deletes_both_tiers(tmp_path):
+    local = LRUCache(ttl=None)
+    shared = SQLiteCache(str(tmp_path / 'cache.db'), ttl=None)
+    cache = TieredCache(local, shared)
+
+    cache.set('key', [1, 2])
+    assert local.get('key') == [1, 2] and shared.get('key') == [1, 2]
+
+    assert cache.delete('key')
+    assert cache.get('key') is None
+
+
+def test_sqlite_expired_entries_are_misses(tmp_path, wall_clock):
+    cache = SQLiteCache(str(tmp_path / 'cache.db'), ttl=10)
+    cache.set('key', 'value')
+
+    assert cache.get_with_ttl('key') == ('value', 10)
+    wall_clock.advance(10)
+    assert cache.get('key') is None
+
+
+def test_sqlite_prune_removes_expired_and_oldest(tmp_path, wall_clock):
+    cache = SQLiteCache(str(tmp_path / 'cache.db'), max_size=3, ttl=None)
+    for index in range(4):
+        wall_clock.advance(1)
+        cache.set(f'key-{index}', index)
+    # 最新寫入但已過期的條目應先被刪除，而不是擠掉較舊的有效條目
+    wall_clock.advance(1)
+    cache.set('expiring', 'value', ttl=5)
+
+    wall_clock.advance(5)
+    cache.prune()
+
+    # 過期條目先刪除，再按寫入時間只保留最新的 max_size 個
+    assert len(cache) == 3
+    assert cache.get('expiring') is None and cache.get('key-0') is None
+    assert [cache.get(f'key-{index}') for index in (1, 2, 3)] == [1, 2, 3]
+
+
+def test_sqlite_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    SQLiteCache(path, ttl=None).set('key', {'total': 22.0})
+
+    assert SQLiteCache(path, ttl=None).get('key') == {'total': 22.0}
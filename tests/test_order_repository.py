@@ -0,0 +1,212 @@
+"""
+訂單存儲測試 - 分組提交、未提交寫入的讀取、舊版本不覆蓋、寫入失敗狀態及重啟載入
+"""
+import os
+import sqlite3
+import sys
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import services.order_repository
+from models.order import Order, OrderItem, OrderStatus
+from services.order_repository import OrderStoreError, SQLiteOrderRepository, sqlite_path_from_url
+from services.order_service import ACTIVE_STATUSES, OrderService
+
+
+def make_order(**fields) -> Order:
+    return Order(items=[OrderItem(name='凍檸茶', quantity=1, unit_price=18.0)], **fields)
+
+
+def stored_rows(path: str):
+    """直接讀取數據庫中的 {訂單ID: (狀態, 更新時間)}"""
+    conn = sqlite3.connect(path)
+    try:
+        return {order_id: (status, updated_at)
+                for order_id, status, updated_at in conn.execute('SELECT id, status, updated_at FROM orders')}
+    finally:
+        conn.close()
+
+
+class WriteLock:
+    """從另一個連接持有數據庫寫鎖，令寫入線程無法提交"""
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute('BEGIN IMMEDIATE')
+
+    def release(self):
+        self.conn.execute('ROLLBACK')
+        self.conn.close()
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'orders.db')
+
+
+@pytest.fixture
+def repository(path):
+    repository = SQLiteOrderRepository(path)
+    yield repository
+    repository.close()
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('sqlite:///voice_ordering.db', 'voice_ordering.db'),
+    ('sqlite:////data/voice_ordering.db', '/data/voice_ordering.db'),
+    ('sqlite:///:memory:', None),
+    ('sqlite:///', None),
+    ('postgresql://localhost/orders', None),
+    ('', None),
+    (None, None),
+])
+def test_sqlite_path_from_url(url, expected):
+    assert sqlite_path_from_url(url) == expected
+
+
+def test_queued_writes_are_grouped_and_readable_before_commit(repository, path):
+    repository.save(make_order())  # 建表後寫入線程已打開連接
+    repository.flush()
+    lock = WriteLock(path)
+    try:
+        orders = [make_order() for _ in range(20)]
+        for order in orders:
+            repository.save(order)
+        # 同一訂單多次修改只提交最新一次
+        latest = orders[0]
+        for status in (OrderStatus.CONFIRMED, OrderStatus.PREPARING):
+            latest = replace(latest, status=status, updated_at=latest.updated_at + timedelta(seconds=1))
+            repository.save(latest)
+
+        # 尚未提交，但讀取結果包括隊列中的寫入
+        assert len(stored_rows(path)) == 1
+        assert repository.get(latest.id).status == OrderStatus.PREPARING
+        pending = {order.id for order in repository.find([OrderStatus.PENDING])}
+        assert {order.id for order in orders[1:]} <= pending and latest.id not in pending
+        assert latest.id in {order.id for order in repository.find([OrderStatus.PREPARING])}
+    finally:
+        lock.release()
+
+    assert repository.flush(timeout=10)
+    rows = stored_rows(path)
+    assert len(rows) == 21
+    assert rows[latest.id] == (OrderStatus.PREPARING.value, latest.updated_at.isoformat())
+    stats = repository.stats()
+    assert stats['coalesced'] >= 2 and stats['max_batch'] > 1 and stats['pending'] == 0
+
+
+def test_older_version_does_not_overwrite_newer(path):
+    # 兩個 worker 寫入同一訂單：較舊的版本較遲提交時不覆蓋
+    first, second = SQLiteOrderRepository(path), SQLiteOrderRepository(path)
+    try:
+        order = make_order()
+        newer = replace(order, status=OrderStatus.READY, updated_at=order.updated_at + timedelta(seconds=5))
+        first.save(newer)
+        first.flush()
+        second.save(replace(order, status=OrderStatus.CONFIRMED, updated_at=order.updated_at + timedelta(seconds=1)))
+        second.flush()
+
+        assert stored_rows(path)[order.id] == (OrderStatus.READY.value, newer.updated_at.isoformat())
+        assert second.get(order.id).status == OrderStatus.READY
+        # 被拒絕的寫入不改變提交順序，其他 worker 不會再次讀到
+        assert [changed.status for _, changed in second.changed_since(0)] == [OrderStatus.READY]
+    finally:
+        first.close()
+        second.close()
+
+
+def test_changed_since_follows_commit_order(repository):
+    orders = [make_order() for _ in range(3)]
+    for order in orders:
+        repository.save(order)
+    repository.flush()
+    seq = repository.max_seq()
+    updated = replace(orders[0], status=OrderStatus.DELIVERED, updated_at=datetime.now() + timedelta(seconds=1))
+    repository.save(updated)
+    repository.flush()
+
+    assert [(order.id, order.status) for _, order in repository.changed_since(seq)] == \
+        [(updated.id, OrderStatus.DELIVERED)]
+    assert len(repository.changed_since(0, limit=2)) == 2
+
+
+def test_failed_writes_reject_new_orders_until_recovered(path, monkeypatch):
+    monkeypatch.setattr(services.order_repository, '_RETRY_DELAYS', (0.01, 0.01))
+    repository = SQLiteOrderRepository(path, timeout=0.01)
+    try:
+        repository.save(make_order())
+        repository.flush()
+        lock = WriteLock(path)
+        try:
+            queued = make_order()
+            repository.save(queued)
+            with pytest.raises(OrderStoreError):
+                repository.flush(timeout=10)
+            assert repository.failed and repository.stats()['failed']
+            with pytest.raises(OrderStoreError):
+                repository.save(make_order())
+            # 失敗期間仍能讀到排隊中的訂單
+            assert repository.get(queued.id) is not None
+        finally:
+            lock.release()
+
+        # 寫鎖釋放後繼續重試的那批寫入成功，存儲恢復
+        deadline = time.monotonic() + 10
+        while repository.failed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not repository.failed
+        assert repository.flush(timeout=10)
+        assert queued.id in stored_rows(path)
+        repository.save(make_order())
+        assert repository.flush(timeout=10)
+    finally:
+        repository.close()
+
+
+def test_close_while_failing_counts_lost_orders(path, monkeypatch):
+    monkeypatch.setattr(services.order_repository, '_RETRY_DELAYS', (0.01,))
+    repository = SQLiteOrderRepository(path, timeout=0.01)
+    repository.save(make_order())
+    repository.flush()
+    lock = WriteLock(path)
+    try:
+        repository.save(make_order())
+        with pytest.raises(OrderStoreError):
+            repository.flush(timeout=10)
+        repository.close()
+    finally:
+        lock.release()
+
+    assert repository.stats()['lost'] == 1
+    with pytest.raises(OrderStoreError):
+        repository.save(make_order())
+
+
+def test_restart_reloads_only_active_orders(path):
+    repository = SQLiteOrderRepository(path)
+    service = OrderService(repository, sync_interval=0)
+    orders = [service.create_order({'items': [{'name': '奶茶', 'quantity': 1, 'unit_price': 22.0}]})
+              for _ in range(6)]
+    service.update_order_status(orders[0].id, OrderStatus.DELIVERED)
+    service.update_order_status(orders[1].id, OrderStatus.CANCELLED)
+    service.update_order_status(orders[2].id, OrderStatus.READY)
+    service.close()
+    repository.close()
+
+    repository = SQLiteOrderRepository(path)
+    restarted = OrderService(repository, sync_interval=0)
+    try:
+        assert {order.id for order in restarted.get_active_orders()} == {order.id for order in orders[2:]}
+        assert restarted.get_order(orders[2].id).status == OrderStatus.READY
+        assert set(restarted.orders) == {order.id for order in orders[2:]}
+        # 已完成的訂單不在內存中，但仍可從數據庫讀取
+        assert restarted.get_order(orders[0].id).status == OrderStatus.DELIVERED
+        assert all(order.status in ACTIVE_STATUSES for order in restarted.orders.values())
+    finally:
+        restarted.close()
+        repository.close()
@@ -0,0 +1,195 @@
+"""
+訂單接口測試 - 活躍訂單列表及訂單詳情的 ETag 條件請求、變更輪詢及 SSE 推送
+"""
+import json
+import os
+import sys
+import threading
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import routes.order_routes
+from routes.order_routes import order_bp
+
+ORDER_DATA = {'items': [{'name': '凍檸茶', 'quantity': 1, 'unit_price': 18.0}]}
+
+
+@pytest.fixture
+def app(monkeypatch):
+    # 每個測試使用新的內存訂單服務及響應緩存
+    monkeypatch.setattr(routes.order_routes, 'order_service', None)
+    monkeypatch.setattr(routes.order_routes, '_active_payload', None)
+    routes.order_routes._order_payloads.clear()
+    app = Flask(__name__)
+    app.config.update(DATABASE_URL='sqlite:///:memory:', ORDER_SYNC_INTERVAL=0, ORDER_EVENT_LOG_SIZE=5,
+                      ORDER_STREAM_HEARTBEAT=0.05, ORDER_STREAM_MAX_SECONDS=0.5, ORDER_STREAM_RETRY=2)
+    app.register_blueprint(order_bp, url_prefix='/api/order')
+    yield app
+    if routes.order_routes.order_service is not None:
+        routes.order_routes.order_service.close()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def create_order(client) -> str:
+    response = client.post('/api/order/create', json=ORDER_DATA)
+    assert response.status_code == 200
+    return response.json['order']['id']
+
+
+def assert_revalidates(client, url: str, order_id: str, check_body):
+    """200 → 304（If-None-Match）→ 修改訂單 → 200 且 ETag 改變"""
+    first = client.get(url)
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and etag
+    assert first.headers['Cache-Control'] == 'no-cache'
+    check_body(first.json, 'pending')
+
+    cached = client.get(url, headers={'If-None-Match': etag})
+    assert cached.status_code == 304 and cached.data == b''
+    assert cached.headers['ETag'] == etag
+
+    updated = client.put(f'/api/order/{order_id}/status', json={'status': 'confirmed'})
+    assert updated.status_code == 200
+
+    changed = client.get(url, headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] not in ('', etag)
+    check_body(changed.json, 'confirmed')
+
+    assert client.get(url, headers={'If-None-Match': changed.headers['ETag']}).status_code == 304
+
+
+def test_active_orders_revalidate_with_etag(client):
+    order_id = create_order(client)
+
+    def check_body(body, status):
+        assert [(order['id'], order['status']) for order in body['orders']] == [(order_id, status)]
+
+    assert_revalidates(client, '/api/order/active', order_id, check_body)
+
+
+def test_order_detail_revalidates_with_etag(client):
+    order_id = create_order(client)
+
+    def check_body(body, status):
+        assert (body['order']['id'], body['order']['status']) == (order_id, status)
+
+    assert_revalidates(client, f'/api/order/{order_id}', order_id, check_body)
+
+
+def test_active_etag_changes_when_an_order_is_created(client):
+    create_order(client)
+    etag = client.get('/api/order/active').headers['ETag']
+
+    create_order(client)
+
+    response = client.get('/api/order/active', headers={'If-None-Match': etag})
+    assert response.status_code == 200 and len(response.json['orders']) == 2
+
+
+def test_missing_order_is_not_found(client):
+    assert client.get('/api/order/missing').status_code == 404
+
+
+def get_changes(client, **params):
+    response = client.get('/api/order/changes', query_string=params)
+    assert response.status_code == 200
+    return response.json
+
+
+def test_changes_without_cursor_return_all_active_orders(client):
+    ids = [create_order(client) for _ in range(2)]
+
+    body = get_changes(client)
+
+    assert body['reset'] and body['version'] == 2
+    assert {order['id'] for order in body['orders']} == set(ids)
+
+
+def test_changes_with_cursor_return_only_newer_events(client):
+    order_id = create_order(client)
+    epoch = get_changes(client)['epoch']
+    client.put(f'/api/order/{order_id}/status', json={'status': 'ready'})
+
+    body = get_changes(client, since=1, epoch=epoch)
+    assert not body['reset'] and body['version'] == 2
+    assert [(event['version'], event['type'], event['order']['status']) for event in body['events']] == \
+        [(2, 'status_changed', 'ready')]
+    # 游標也可寫成 "<epoch>:<version>"
+    assert get_changes(client, since=f'{epoch}:2')['events'] == []
+
+
+def test_changes_older_than_the_event_log_reset(client):
+    ids = [create_order(client) for _ in range(8)]
+    epoch = get_changes(client)['epoch']
+
+    # 變更記錄只保留 5 個：落後更多的客戶端收到全部活躍訂單
+    assert not get_changes(client, since=3, epoch=epoch)['reset']
+    body = get_changes(client, since=2, epoch=epoch)
+    assert body['reset'] and body['version'] == 8
+    assert {order['id'] for order in body['orders']} == set(ids)
+
+
+def test_changes_from_another_epoch_reset(client):
+    create_order(client)
+    epoch = get_changes(client)['epoch']
+
+    # 服務重啟後版本號重新計算，舊 epoch 的游標即使數值有效也不能使用
+    assert get_changes(client, since=1, epoch='restarted')['reset']
+    assert get_changes(client, since='restarted:1')['reset']
+    assert get_changes(client, since='not-a-version', epoch=epoch)['reset']
+
+
+def read_stream(client, **headers):
+    """讀取整個 SSE 響應（ORDER_STREAM_MAX_SECONDS 後由服務端結束），返回 (retry, 事件列表, 心跳數)"""
+    response = client.get('/api/order/stream', headers=headers)
+    assert response.status_code == 200 and response.mimetype == 'text/event-stream'
+    retry, events, heartbeats = None, [], 0
+    for message in response.get_data(as_text=True).split('\n\n'):
+        if message.startswith('retry: '):
+            retry = int(message[len('retry: '):])
+        elif message.startswith(':'):
+            heartbeats += 1
+        elif message:
+            fields = dict(line.split(': ', 1) for line in message.split('\n'))
+            events.append((fields['event'], fields.get('id'), json.loads(fields['data'])))
+    return retry, events, heartbeats
+
+
+def test_stream_sends_snapshot_then_live_changes(client):
+    order_id = create_order(client)
+    epoch = get_changes(client)['epoch']
+    timer = threading.Timer(0.1, lambda: client.put(f'/api/order/{order_id}/status', json={'status': 'ready'}))
+    timer.start()
+    try:
+        retry, events, heartbeats = read_stream(client)
+    finally:
+        timer.join()
+
+    assert retry == 2000 and heartbeats > 0
+    (kind, event_id, snapshot), (change_kind, change_id, change) = events
+    assert (kind, event_id) == ('snapshot', f'{epoch}:1')
+    assert [order['id'] for order in snapshot['orders']] == [order_id]
+    assert (change_kind, change_id) == ('change', f'{epoch}:2')
+    assert (change['type'], change['order']['status']) == ('status_changed', 'ready')
+
+
+def test_stream_resumes_from_last_event_id(client):
+    for _ in range(3):
+        create_order(client)
+    epoch = get_changes(client)['epoch']
+
+    _, events, _ = read_stream(client, **{'Last-Event-ID': f'{epoch}:1'})
+    assert [(kind, event_id) for kind, event_id, _ in events] == [('change', f'{epoch}:2'), ('change', f'{epoch}:3')]
+
+    # 其他 epoch 的事件 ID（例如服務重啟前）改為發送快照
+    _, events, _ = read_stream(client, **{'Last-Event-ID': 'restarted:1'})
+    assert [(kind, event_id) for kind, event_id, _ in events] == [('snapshot', f'{epoch}:3')]
+    assert len(events[0][2]['orders']) == 3
@@ -0,0 +1,347 @@
+"""
+訂單服務測試 - 狀態及創建時間索引與訂單字典保持一致、並發修改、多個 worker 同步及變更記錄
+
+hammer、check_invariants 及 check_store 也供 benchmarks/stress_order_service.py 使用。
+"""
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.order import OrderEventType, OrderStatus
+from services.order_repository import SQLiteOrderRepository
+from services.order_service import ACTIVE_STATUSES, OrderService
+
+ORDER_DATA = {'items': [{'name': '凍檸茶', 'quantity': 1, 'unit_price': 18.0}]}
+STATUSES = list(OrderStatus)
+
+
+def check_invariants(service: OrderService, created: int) -> Counter:
+    """檢查訂單字典與索引一致（有存儲時內存只保存活躍訂單）"""
+    errors = Counter()
+    expected = created
+    if service.repository is not None:
+        expected = len(service.repository.find(ACTIVE_STATUSES))
+        if any(order.status not in ACTIVE_STATUSES for order in service.orders.values()):
+            errors['內存中有已完成的訂單'] += 1
+    if len(service.orders) != expected:
+        errors['訂單數與創建次數不符'] += 1
+    if len(service._created_index) != expected:
+        errors['創建時間索引大小不符'] += 1
+    if service._created_index != sorted(service._created_index):
+        errors['創建時間索引未排序'] += 1
+    indexed = Counter()
+    for status, keys in service._status_index.items():
+        if keys != sorted(keys):
+            errors[f'{status.value} 索引未排序'] += 1
+        for _, order_id in keys:
+            indexed[order_id] += 1
+            if service.orders[order_id].status != status:
+                errors['索引狀態與訂單不符'] += 1
+    if any(count != 1 for count in indexed.values()) or len(indexed) != expected:
+        errors['訂單不在恰好一個狀態索引中'] += 1
+    return errors
+
+
+def hammer(service, threads: int, ops: int, seed: int):
+    """多線程隨機執行創建（30%）、更新（50%）及查詢（20%），返回 (耗時, 錯誤計數)"""
+    ids = []
+    ids_lock = threading.Lock()
+    errors = Counter()
+    barrier = threading.Barrier(threads)
+
+    def worker(index: int):
+        rng = random.Random(seed + index)
+        barrier.wait()
+        for _ in range(ops // threads):
+            roll = rng.random()
+            try:
+                if roll < 0.3 or not ids:
+                    order = service.create_order(ORDER_DATA)
+                    with ids_lock:
+                        ids.append(order.id)
+                elif roll < 0.8:
+                    service.update_order_status(rng.choice(ids), rng.choice(STATUSES))
+                elif roll < 0.9:
+                    status = rng.choice(STATUSES)
+                    orders = service.get_orders_by_status(status)
+                    # 返回的快照在之後也不應被其他線程改動
+                    if any(order.status != status for order in orders):
+                        errors['按狀態查詢返回其他狀態的訂單'] += 1
+                else:
+                    orders = service.get_active_orders()
+                    if any(order.status not in ACTIVE_STATUSES for order in orders):
+                        errors['活躍訂單包含已完成的訂單'] += 1
+                    if len({order.id for order in orders}) != len(orders):
+                        errors['活躍訂單重複'] += 1
+            except Exception as e:
+                errors[f'{type(e).__name__}: {e}'] += 1
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - started, errors, len(ids)
+
+
+def check_store(service: OrderService, path: str, created: int) -> Counter:
+    """檢查數據庫保存了全部訂單，且與內存一致（同一訂單的寫入按修改順序提交）"""
+    service.repository.flush()
+    conn = sqlite3.connect(path)
+    rows = dict(((order_id, (status, updated_at))
+                 for order_id, status, updated_at in conn.execute('SELECT id, status, updated_at FROM orders')))
+    conn.close()
+    errors = Counter()
+    if len(rows) != created:
+        errors['數據庫訂單數與創建次數不符'] += 1
+    for order_id, order in service.orders.items():
+        if rows.get(order_id) != (order.status.value, order.updated_at.isoformat()):
+            errors['數據庫與內存不一致'] += 1
+    return errors
+
+
+def mutate(service: OrderService, rng: random.Random, ops: int):
+    """隨機創建訂單及更新狀態，返回全部訂單 ID"""
+    ids = []
+    for _ in range(ops):
+        if not ids or rng.random() < 0.4:
+            ids.append(service.create_order(ORDER_DATA).id)
+        else:
+            assert service.update_order_status(rng.choice(ids), rng.choice(STATUSES))
+    return ids
+
+
+def test_indexes_match_orders():
+    service = OrderService()
+    ids = mutate(service, random.Random(1), 500)
+
+    assert check_invariants(service, len(ids)) == Counter()
+
+    orders = sorted(service.orders.values(), key=lambda order: (order.created_at, order.id))
+    for status in OrderStatus:
+        assert service.get_orders_by_status(status) == [order for order in orders if order.status == status]
+    assert service.get_active_orders() == [order for order in orders if order.status in ACTIVE_STATUSES]
+
+    # 創建時間範圍：包含開始、不包含結束
+    start, end = orders[len(orders) // 4].created_at, orders[len(orders) * 3 // 4].created_at
+    assert service.get_orders_created_between(start, end) == \
+        [order for order in orders if start <= order.created_at < end]
+    assert service.get_orders_created_between(end=orders[0].created_at) == []
+    assert len(service.get_orders_created_between()) == len(ids)
+
+
+def test_updates_replace_orders_without_mutating_snapshots():
+    service = OrderService()
+    order = service.create_order(ORDER_DATA)
+    snapshot = service.get_active_orders()
+
+    service.update_order_status(order.id, OrderStatus.READY)
+
+    assert snapshot[0].status == OrderStatus.PENDING
+    assert service.get_order(order.id).status == OrderStatus.READY
+    assert service.get_orders_by_status(OrderStatus.PENDING) == []
+    assert not service.update_order_status('missing', OrderStatus.READY)
+
+
+def test_finished_orders_leave_memory_with_repository(tmp_path):
+    repository = SQLiteOrderRepository(str(tmp_path / 'orders.db'))
+    service = OrderService(repository, sync_interval=0)
+    try:
+        ids = mutate(service, random.Random(2), 300)
+        repository.flush()
+
+        assert check_invariants(service, len(ids)) == Counter()
+        delivered = service.get_orders_by_status(OrderStatus.DELIVERED)
+        assert delivered and all(order.id not in service.orders for order in delivered)
+        assert all(service.get_order(order.id).status == OrderStatus.DELIVERED for order in delivered)
+
+        everything = service.get_orders_created_between()
+        assert len(everything) == len(ids)
+        assert service.get_orders_created_between(start=everything[-1].created_at + timedelta(seconds=1)) == []
+    finally:
+        service.close()
+        repository.close()
+
+
+@pytest.fixture
+def frequent_switches():
+    """縮短線程切換間隔，讓交錯更頻繁"""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-4)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_concurrent_updates_keep_invariants(frequent_switches):
+    service = OrderService()
+    _, errors, created = hammer(service, threads=8, ops=4000, seed=1)
+
+    assert errors == Counter()
+    assert check_invariants(service, created) == Counter()
+
+
+def test_concurrent_updates_are_persisted_in_order(tmp_path, frequent_switches):
+    path = str(tmp_path / 'orders.db')
+    repository = SQLiteOrderRepository(path)
+    service = OrderService(repository, sync_interval=0)
+    try:
+        _, errors, created = hammer(service, threads=8, ops=2000, seed=2)
+
+        assert errors == Counter()
+        assert check_invariants(service, created) == Counter()
+        assert check_store(service, path, created) == Counter()
+    finally:
+        service.close()
+        repository.close()
+
+
+def test_workers_sharing_a_database_converge(tmp_path, frequent_switches):
+    # 兩個 worker 各自修改，同時不斷同步對方的修改；完成後兩者的活躍訂單與數據庫一致
+    path = str(tmp_path / 'orders.db')
+    repositories = [SQLiteOrderRepository(path) for _ in range(2)]
+    services = [OrderService(repository, sync_interval=0) for repository in repositories]
+    stop = threading.Event()
+
+    def keep_syncing():
+        while not stop.is_set():
+            for service in services:
+                service.sync()
+            time.sleep(0.001)
+
+    syncer = threading.Thread(target=keep_syncing)
+    syncer.start()
+    try:
+        results = []
+        workers = [threading.Thread(target=lambda s=service, seed=seed: results.append(hammer(s, 4, 800, seed)))
+                   for seed, service in enumerate(services)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        stop.set()
+        syncer.join()
+
+        assert all(errors == Counter() for _, errors, _ in results)
+        for repository in repositories:
+            repository.flush()
+        stored = {order.id: order for order in repositories[0].find(ACTIVE_STATUSES)}
+        for service in services:
+            service.sync()
+            assert check_invariants(service, 0) == Counter()
+            assert {order_id: (order.status, order.updated_at) for order_id, order in service.orders.items()} == \
+                {order_id: (order.status, order.updated_at) for order_id, order in stored.items()}
+    finally:
+        stop.set()
+        for service in services:
+            service.close()
+        for repository in repositories:
+            repository.close()
+
+
+def test_sync_applies_other_workers_changes(tmp_path):
+    path = str(tmp_path / 'orders.db')
+    repositories = [SQLiteOrderRepository(path) for _ in range(2)]
+    first, second = [OrderService(repository, sync_interval=0) for repository in repositories]
+    try:
+        order = first.create_order(ORDER_DATA)
+        repositories[0].flush()
+        assert second.sync() == 1
+        assert second.get_changes_since(0)[1][-1].order.id == order.id
+
+        first.update_order_status(order.id, OrderStatus.READY)
+        repositories[0].flush()
+        assert second.sync() == 1
+        assert second.orders[order.id].status == OrderStatus.READY
+
+        first.update_order_status(order.id, OrderStatus.DELIVERED)
+        repositories[0].flush()
+        second.sync()
+        assert order.id not in second.orders
+        assert check_invariants(second, 0) == Counter()
+    finally:
+        for service in (first, second):
+            service.close()
+        for repository in repositories:
+            repository.close()
+
+
+def test_stale_stored_versions_are_ignored(tmp_path):
+    path = str(tmp_path / 'orders.db')
+    repository = SQLiteOrderRepository(path)
+    service = OrderService(repository, sync_interval=0)
+    try:
+        created = service.create_order(ORDER_DATA)
+        service.update_order_status(created.id, OrderStatus.PREPARING)
+        version = service.version
+
+        # 比內存中舊的版本（例如同步延遲）不覆蓋
+        assert not service._apply_stored(created)
+        assert service.orders[created.id].status == OrderStatus.PREPARING
+
+        # 本 worker 剛完成的訂單不因舊的活躍版本重新出現
+        service.update_order_status(created.id, OrderStatus.DELIVERED)
+        assert not service._apply_stored(created)
+        assert created.id not in service.orders
+        assert service.version == version + 1
+    finally:
+        service.close()
+        repository.close()
+
+
+def test_changes_since_returns_only_missing_events():
+    service = OrderService(event_log_size=5)
+    order = service.create_order(ORDER_DATA)
+    service.update_order_status(order.id, OrderStatus.CONFIRMED)
+
+    version, events = service.get_changes_since(1)
+    assert version == 2
+    assert [(event.version, event.type, event.order.status) for event in events] == \
+        [(2, OrderEventType.STATUS_CHANGED, OrderStatus.CONFIRMED)]
+    assert service.get_changes_since(2) == (2, [])
+
+
+def test_changes_older_than_the_event_log_require_reload():
+    service = OrderService(event_log_size=5)
+    for _ in range(8):
+        service.create_order(ORDER_DATA)
+
+    # 只保留最後 5 個變更：版本 3 之後的仍可補發，更早的需要重新載入
+    assert [event.version for event in service.get_changes_since(3)[1]] == [4, 5, 6, 7, 8]
+    assert service.get_changes_since(2) == (8, None)
+    assert service.get_changes_since(0) == (8, None)
+    # 客戶端的版本號比服務的新（例如來自重啟前的進程）
+    assert service.get_changes_since(9) == (8, None)
+
+
+def test_wait_for_changes_times_out_without_changes():
+    service = OrderService()
+    service.create_order(ORDER_DATA)
+
+    started = time.monotonic()
+    assert not service.wait_for_changes(service.version, timeout=0.1)
+    assert time.monotonic() - started >= 0.1
+    # 已經落後時立即返回
+    assert service.wait_for_changes(0, timeout=0)
+
+
+def test_wait_for_changes_wakes_on_new_order():
+    service = OrderService()
+    timer = threading.Timer(0.05, service.create_order, args=(ORDER_DATA,))
+    timer.start()
+    try:
+        started = time.monotonic()
+        assert service.wait_for_changes(0, timeout=5)
+        assert time.monotonic() - started < 4
+        assert service.version == 1
+    finally:
+        timer.join()
@@ -0,0 +1,136 @@
+"""
+本地優先解析路由測試 - 數量歸屬、互斥定制選項及否定詞
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.openrouter_service import OpenRouterService
+from services.order_scanner import default_scanner
+from services.parse_router import ROUTE_LLM, ROUTE_LOCAL, ParseRouter
+
+
+@pytest.fixture(scope='module')
+def service():
+    service = OpenRouterService('test-key')
+    yield service
+    service.close()
+
+
+def local_items(service, text):
+    """本地路由的項目 {名稱: (數量, 定制選項)}；交給 LLM 時返回 (None, 原因)"""
+    result, decision = service._route_locally(text)
+    if decision.route != ROUTE_LOCAL:
+        return None, decision.reason
+    return {item['name']: (item['quantity'], item['customizations']) for item in result['order']['items']}, decision.reason
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('三杯凍奶茶', {'奶茶': 3}),
+    ('兩杯熱奶茶一杯凍咖啡', {'奶茶': 2, '咖啡': 1}),
+    ('奶茶少甜兩杯', {'奶茶': 2}),
+    ('兩個三明治', {'三明治': 2}),
+    ('一杯半糖奶茶', {'奶茶': 1}),
+])
+def test_quantity_attaches_across_modifiers(text, expected):
+    scan = default_scanner.scan(text)
+
+    assert {item.name: item.quantity for item in scan.items} == expected
+    assert scan.unattached_quantity_spans == ()
+
+
+def test_single_item_with_modifiers_stays_local(service):
+    items, _ = local_items(service, '三杯凍奶茶')
+    assert items == {'奶茶': (3, {'溫度': '凍'})}
+
+    items, _ = local_items(service, '一杯奶茶少甜走冰')
+    assert items == {'奶茶': (1, {'甜度': '少甜', '冰塊': '走冰'})}
+
+
+@pytest.mark.parametrize('text, reason', [
+    # 「熱」和「凍」分屬不同項目，本地結果會把同一溫度套用到兩杯
+    ('兩杯熱奶茶一杯凍咖啡', 'conflicting_modifiers'),
+    ('一杯熱奶茶一杯咖啡', 'shared_modifiers'),
+    # 第二個「一杯」沒有歸屬（重複的項目名稱）
+    ('一杯奶茶再一杯奶茶', 'unattached_quantity'),
+    # 本地掃描只看到「甜」，結果與要求相反
+    ('我要兩杯凍檸茶同埋一杯奶茶唔要甜', 'negation'),
+])
+def test_ambiguous_orders_go_to_llm(service, text, reason):
+    result, decision = service._route_locally(text)
+    assert result is None and decision.route == ROUTE_LLM
+
+    # 不論覆蓋率，這些情況本身就要交給 LLM
+    decision = ParseRouter(threshold=0.0).decide(default_scanner.scan(text))
+    assert (decision.route, decision.reason) == (ROUTE_LLM, reason)
+
+
+def test_handled_negation_stays_local(service):
+    items, _ = local_items(service, '一杯奶茶無糖走冰')
+    assert items == {'奶茶': (1, {'甜度': '無糖', '冰塊': '走冰'})}
+
+
+# 人工標註的轉錄樣本：正確的 {名稱: (數量, 定制選項)}；None 表示本地掃描無法正確理解
+LABELLED_SAMPLES = [
+    ('一杯奶茶', {'奶茶': (1, {})}),
+    ('兩杯可樂', {'可樂': (2, {})}),
+    ('三杯凍奶茶', {'奶茶': (3, {'溫度': '凍'})}),
+    ('我要一杯凍奶茶少甜', {'奶茶': (1, {'甜度': '少甜', '溫度': '凍'})}),
+    ('唔該一杯熱咖啡', {'咖啡': (1, {'溫度': '熱'})}),
+    ('我想要兩份炒飯', {'炒飯': (2, {})}),
+    ('一個牛油多士同埋一杯奶茶', {'牛油多士': (1, {}), '奶茶': (1, {})}),
+    ('一杯奶茶走冰唔該', {'奶茶': (1, {'冰塊': '走冰'})}),
+    ('一杯奶茶，謝謝', {'奶茶': (1, {})}),
+    ('奶茶兩杯', {'奶茶': (2, {})}),
+    ('一杯鴛鴦少甜', {'鴛鴦': (1, {'甜度': '少甜'})}),
+    ('兩個三明治', {'三明治': (2, {})}),
+    ('一碟乾炒牛河', {'乾炒牛河': (1, {})}),
+    ('麻煩你一杯檸檬茶走冰', {'檸檬茶': (1, {'冰塊': '走冰'})}),
+    ('一杯半糖奶茶', {'奶茶': (1, {'甜度': '半糖'})}),
+    ('一杯大杯奶茶', {'奶茶': (1, {'份量': '大杯'})}),
+    ('我要一杯奶茶呀', {'奶茶': (1, {})}),
+    ('要一杯雪碧', {'雪碧': (1, {})}),
+    ('奶茶同咖啡', {'奶茶': (1, {}), '咖啡': (1, {})}),
+    ('一碗雲吞麵同埋一杯熱奶茶', {'雲吞麵': (1, {}), '奶茶': (1, {'溫度': '熱'})}),
+    ('兩杯熱奶茶一杯凍咖啡', {'奶茶': (2, {'溫度': '熱'}), '咖啡': (1, {'溫度': '凍'})}),
+    # 追加到已有訂單、「就得」、改單、否定及逐杯要求，本地結果都會出錯
+    ('加一杯奶茶', None),
+    ('奶茶就得', None),
+    ('奶茶加多一杯', None),
+    ('一杯奶茶改做咖啡', None),
+    ('唔好奶茶要咖啡', None),
+    ('一杯奶茶唔要冰', None),
+    ('兩杯奶茶每杯都少甜', None),
+    ('兩杯奶茶一杯少甜', None),
+    ('一杯好甜嘅奶茶', None),
+    ('外賣一杯奶茶', None),
+]
+
+
+def routed_locally(service, threshold):
+    """以指定閾值路由全部樣本，返回 [(文字, 標註, 本地結果)]"""
+    service.router.threshold = threshold
+    try:
+        return [(text, label, local_items(service, text)[0]) for text, label in LABELLED_SAMPLES]
+    finally:
+        service.router.threshold = 0.9
+
+
+def test_default_threshold_only_routes_correct_results_locally(service):
+    routed = routed_locally(service, 0.9)
+
+    wrong = [text for text, label, items in routed if items is not None and items != label]
+    assert wrong == []
+    # 簡單訂單大部分仍然不用調用 LLM
+    correct = [text for text, label, items in routed if items is not None]
+    assert len(correct) >= 15
+
+
+def test_lower_threshold_routes_misunderstood_orders_locally(service):
+    # 0.8 時「加一杯奶茶」按新訂單處理，默認值不能再低
+    routed = routed_locally(service, 0.8)
+
+    assert [text for text, label, items in routed if items is not None and items != label] == ['加一杯奶茶']
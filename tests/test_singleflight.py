@@ -0,0 +1,149 @@
+"""
+請求合併測試 - 並發調用只執行一次、異常傳給所有等待者、執行者被取消
+"""
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.singleflight import AsyncSingleFlight, SingleFlight
+
+CALLERS = 8
+
+
+def run_threads(flight, fn):
+    """CALLERS 個線程同時以相同鍵調用 fn，返回各自的結果或異常"""
+    barrier = threading.Barrier(CALLERS)
+
+    def call():
+        barrier.wait()
+        try:
+            return flight.do('key', fn)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(CALLERS) as pool:
+        return list(pool.map(lambda _: call(), range(CALLERS)))
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    executions = []
+
+    def fn():
+        executions.append(1)
+        release.wait(5)
+        return 'result'
+
+    # 等所有線程都加入後才完成
+    threading.Timer(0.2, release.set).start()
+    results = run_threads(flight, fn)
+
+    assert len(executions) == 1
+    assert sorted(results, key=lambda r: r[1]) == [('result', False)] + [('result', True)] * (CALLERS - 1)
+    assert flight.stats()['executions'] == 1 and flight.stats()['coalesced'] == CALLERS - 1
+    assert flight.in_flight() == 0
+
+
+def test_exception_reaches_every_waiter():
+    flight = SingleFlight()
+    error = ValueError('上游失敗')
+
+    def fn():
+        threading.Event().wait(0.2)
+        raise error
+
+    results = run_threads(flight, fn)
+
+    assert results == [error] * CALLERS
+    assert flight.in_flight() == 0
+
+
+def test_async_callers_share_one_execution():
+    flight = AsyncSingleFlight()
+    executions = []
+
+    async def fetch():
+        executions.append(1)
+        await asyncio.sleep(0.05)
+        return 'result'
+
+    async def main():
+        return await asyncio.gather(*(flight.do('key', fetch) for _ in range(CALLERS)))
+
+    results = asyncio.run(main())
+
+    assert len(executions) == 1
+    assert [shared for _, shared in results].count(False) == 1
+    assert {result for result, _ in results} == {'result'}
+    assert flight.in_flight() == 0
+
+
+def test_async_exception_reaches_every_waiter():
+    flight = AsyncSingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        raise ValueError('上游失敗')
+
+    async def main():
+        return await asyncio.gather(*(flight.do('key', fetch) for _ in range(CALLERS)), return_exceptions=True)
+
+    results = asyncio.run(main())
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_waiters_retry_when_leader_is_cancelled():
+    flight = AsyncSingleFlight()
+    executions = []
+
+    async def fetch():
+        executions.append(1)
+        await asyncio.sleep(0.1)
+        return 'result'
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do('key', fetch))
+        await asyncio.sleep(0)
+        waiters = [asyncio.ensure_future(flight.do('key', fetch)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*waiters)
+
+    results = asyncio.run(main())
+
+    # 其中一個等待者重新執行，其餘共享它的結果
+    assert len(executions) == 2
+    assert {result for result, _ in results} == {'result'}
+    assert [shared for _, shared in results].count(False) == 1
+    assert flight.stats()['executions'] == 2 and flight.stats()['coalesced'] == 2
+    assert flight.in_flight() == 0
+
+
+def test_cancelled_waiter_does_not_affect_others():
+    flight = AsyncSingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return 'result'
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do('key', fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flight.do('key', fetch))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return await leader
+
+    assert asyncio.run(main()) == ('result', False)
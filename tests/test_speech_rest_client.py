@@ -0,0 +1,189 @@
+"""
+REST 語音識別客戶端測試 - 429/5xx 重試、令牌被拒絕時改用訂閱密鑰、批量識別保持順序
+
+StubSpeechHandler 及 start_stub_server 也供 benchmarks/bench_speech_rest.py 使用。
+"""
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.speech_rest_client import RECOGNITION_PATH, SpeechRestClient
+from services.speech_token_manager import SpeechTokenManager
+
+TOKEN_PATH = '/sts/v1.0/issueToken'
+
+
+class StubSpeechHandler(BaseHTTPRequestHandler):
+    """
+    模擬的 Azure Speech REST 服務
+
+    識別接口返回音頻長度作為識別文字；statuses 中的狀態碼按順序用於之後的識別請求，
+    用完後返回 200；revoked_tokens 中的 Bearer 令牌返回 401。STS 接口依次發出
+    token-1、token-2 ……
+    """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    handshake_s = 0.0
+    latency_s = 0.0
+    connections = 0
+    tokens_issued = 0
+    statuses = []
+    revoked_tokens = set()
+    auth_log = []
+    lock = threading.Lock()
+
+    @classmethod
+    def reset(cls):
+        with cls.lock:
+            cls.handshake_s = cls.latency_s = 0.0
+            cls.connections = cls.tokens_issued = 0
+            cls.statuses, cls.revoked_tokens, cls.auth_log = [], set(), []
+
+    def setup(self):
+        super().setup()
+        with StubSpeechHandler.lock:
+            StubSpeechHandler.connections += 1
+        time.sleep(self.handshake_s)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path.startswith(TOKEN_PATH):
+            with StubSpeechHandler.lock:
+                StubSpeechHandler.tokens_issued += 1
+                token = f'token-{StubSpeechHandler.tokens_issued}'
+            self._reply(200, token.encode(), 'text/plain')
+            return
+        if not self.path.startswith(RECOGNITION_PATH):
+            self._reply(404, b'', 'text/plain')
+            return
+
+        time.sleep(self.latency_s)
+        auth = self.headers.get('Authorization')
+        with StubSpeechHandler.lock:
+            StubSpeechHandler.auth_log.append(auth or 'key')
+            status = StubSpeechHandler.statuses.pop(0) if StubSpeechHandler.statuses else 200
+        if auth is not None and auth.split(' ', 1)[-1] in self.revoked_tokens:
+            status = 401
+        payload = json.dumps({
+            'RecognitionStatus': 'Success',
+            'DisplayText': f'{len(body)} bytes',
+            'NBest': [{'Confidence': 0.9}]
+        }).encode()
+        self._reply(status, payload, 'application/json')
+
+    def _reply(self, status: int, payload: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # 批量請求同時建立連接
+
+
+def start_stub_server():
+    """在隨機端口啟動模擬服務，返回 (服務器, 基礎地址)"""
+    server = StubServer(('127.0.0.1', 0), StubSpeechHandler)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+@pytest.fixture
+def base_url():
+    StubSpeechHandler.reset()
+    server, base_url = start_stub_server()
+    yield base_url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(base_url):
+    client = SpeechRestClient('key', 'local', base_url=base_url, max_retries=2, retry_backoff=0)
+    yield client
+    client.close()
+
+
+@pytest.mark.parametrize('status', [429, 500, 502, 503, 504])
+def test_retryable_status_is_retried(client, status):
+    StubSpeechHandler.statuses = [status, status]
+
+    result = client.transcribe(b'x' * 10)
+
+    assert result == {'success': True, 'text': '10 bytes', 'confidence': 0.9, 'language': 'zh-HK'}
+    assert len(StubSpeechHandler.auth_log) == 3
+    assert client.stats()['retries'] == 2 and client.stats()['failures'] == 0
+
+
+def test_gives_up_after_max_retries(client):
+    StubSpeechHandler.statuses = [503] * 3
+
+    result = client.transcribe(b'x')
+
+    assert result == {'success': False, 'error': 'API 請求失敗: 503'}
+    assert len(StubSpeechHandler.auth_log) == 3
+    assert client.stats()['failures'] == 1
+
+
+def test_other_errors_are_not_retried(client):
+    StubSpeechHandler.statuses = [400]
+
+    assert client.transcribe(b'x') == {'success': False, 'error': 'API 請求失敗: 400'}
+    assert len(StubSpeechHandler.auth_log) == 1 and client.stats()['retries'] == 0
+
+
+def test_async_retries_follow_the_same_rules(client):
+    StubSpeechHandler.statuses = [429, 500]
+
+    result = client.transcribe_batch([b'x' * 5])
+
+    assert result[0]['text'] == '5 bytes'
+    assert client.stats()['retries'] == 2
+
+
+def test_rejected_token_is_invalidated_and_not_reused(base_url):
+    token_manager = SpeechTokenManager('key', 'local', endpoint=f"{base_url}{TOKEN_PATH}")
+    client = SpeechRestClient('key', 'local', base_url=base_url, max_retries=2, retry_backoff=0,
+                              token_manager=token_manager)
+    try:
+        deadline = time.monotonic() + 5
+        while token_manager.get_token() is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert token_manager.get_token() == 'token-1'
+        StubSpeechHandler.revoked_tokens = {'token-1'}
+
+        result = client.transcribe(b'x' * 3)
+
+        # 第二次嘗試使用訂閱密鑰，或後台已重新獲取的新令牌，但不再使用被拒絕的令牌
+        assert result['success'] and result['text'] == '3 bytes'
+        assert StubSpeechHandler.auth_log[0] == 'Bearer token-1'
+        assert len(StubSpeechHandler.auth_log) == 2
+        assert StubSpeechHandler.auth_log[1] in ('key', 'Bearer token-2')
+        assert client.stats()['retries'] == 1
+    finally:
+        client.close()
+
+
+def test_batch_results_keep_clip_order(client):
+    StubSpeechHandler.latency_s = 0.01
+    # 最先到達的請求需要重試，完成得較晚；結果仍按輸入順序返回
+    StubSpeechHandler.statuses = [503] * 3
+    clips = [b'x' * (100 - index * 7) for index in range(12)]
+
+    results = client.transcribe_batch(clips, concurrency=4)
+
+    assert [result['text'] for result in results] == [f'{len(clip)} bytes' for clip in clips]
+    assert results == [client.transcribe(clip) for clip in clips]
@@ -0,0 +1,88 @@
+"""
+語音活動檢測測試 - 以合成音頻檢查裁剪、全段語音及無法判斷時保留整段
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.pcm import wav_header
+from utils.vad import FRAME_MS, detect_speech, trim_wav
+
+RATE = 16000
+
+
+def voiced(seconds: float, depth: float = 0.4) -> np.ndarray:
+    """模擬連續說話：120 Hz 基頻加諧波，按約 4 Hz 的音節起伏（depth < 1 時不降到靜音）"""
+    t = np.arange(int(RATE * seconds)) / RATE
+    tone = sum(np.sin(2 * np.pi * 120 * k * t) / k for k in range(1, 6))
+    envelope = 1 - depth + depth * np.sin(2 * np.pi * 4 * t)
+    return 3000 * envelope * tone
+
+
+def noise(seconds: float, level: float = 30.0, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(0, level, int(RATE * seconds))
+
+
+def pcm(signal: np.ndarray) -> np.ndarray:
+    return np.clip(signal, -32768, 32767).astype('<i2')
+
+
+def to_wav(samples: np.ndarray) -> bytes:
+    raw = samples.tobytes()
+    return wav_header(len(raw), RATE) + raw
+
+
+@pytest.mark.parametrize('depth', [0.1, 0.4])
+def test_speech_without_pauses_is_kept_whole(depth):
+    # 沒有停頓時最安靜的幀也是語音，不能用作噪聲底
+    samples = pcm(voiced(3.0, depth) + noise(3.0))
+    result = detect_speech(samples, RATE)
+
+    assert not result.is_empty
+    assert not result.uncertain
+    assert result.speech_ratio > 0.8
+    assert (result.start, result.end) == (0, len(samples))
+
+    data = to_wav(samples)
+    trimmed, _ = trim_wav(data)
+    assert trimmed == data
+
+
+def test_leading_and_trailing_silence_is_trimmed():
+    samples = pcm(np.concatenate([noise(1.0, seed=1), voiced(1.0) + noise(1.0, seed=2), noise(1.0, seed=3)]))
+    result = detect_speech(samples, RATE, padding_ms=200)
+
+    assert not result.is_empty
+    assert not result.uncertain
+    assert 0.7 * RATE <= result.start <= 1.0 * RATE
+    assert 2.0 * RATE <= result.end <= 2.3 * RATE
+
+    trimmed, _ = trim_wav(to_wav(samples), padding_ms=200)
+    assert len(trimmed) < len(to_wav(samples))
+
+
+def test_silence_is_empty():
+    samples = pcm(noise(2.0))
+    result = detect_speech(samples, RATE)
+
+    assert result.is_empty
+    trimmed, _ = trim_wav(to_wav(samples))
+    assert trimmed == b''
+
+
+def test_short_burst_is_uncertain_and_kept():
+    burst = voiced(FRAME_MS * 2 / 1000)
+    samples = pcm(np.concatenate([noise(1.0, seed=1), burst + noise(len(burst) / RATE, seed=2), noise(1.0, seed=3)]))
+    result = detect_speech(samples, RATE, min_speech_ms=100)
+
+    assert not result.is_empty
+    assert result.uncertain
+    assert (result.start, result.end) == (0, len(samples))
+
+    data = to_wav(samples)
+    trimmed, _ = trim_wav(data)
+    assert trimmed == data
@@ -0,0 +1,51 @@
+"""
+音頻格式識別工具 - 根據文件頭魔數判斷容器格式，避免逐個格式試解碼
+"""
+from typing import Optional
+
+# 返回值為 pydub/ffmpeg 的輸入格式名稱
+FORMAT_WAV = 'wav'
+FORMAT_WEBM = 'webm'
+FORMAT_OGG = 'ogg'
+FORMAT_MP3 = 'mp3'
+FORMAT_AAC = 'aac'
+FORMAT_M4A = 'm4a'
+FORMAT_FLAC = 'flac'
+
+_EBML_MAGIC = b'\x1a\x45\xdf\xa3'
+
+
+def sniff_audio_format(data: bytes) -> Optional[str]:
+    """
+    根據文件頭判斷音頻容器格式
+
+    支持 RIFF/WAVE、EBML (WebM/Matroska)、OggS、ID3 及 MPEG 幀同步 (MP3)、
+    ADTS (AAC)、ISO BMFF ftyp (M4A/MP4) 及 fLaC。
+
+    Args:
+        data: 音頻數據（只讀取前 12 字節）
+
+    Returns:
+        Optional[str]: pydub 格式名稱，無法識別時返回 None
+    """
+    header = bytes(data[:12])
+    if len(header) < 4:
+        return None
+
+    if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+        return FORMAT_WAV
+    if header[:4] == _EBML_MAGIC:
+        return FORMAT_WEBM
+    if header[:4] == b'OggS':
+        return FORMAT_OGG
+    if header[:4] == b'fLaC':
+        return FORMAT_FLAC
+    if header[:3] == b'ID3':
+        return FORMAT_MP3
+    if header[4:8] == b'ftyp':
+        return FORMAT_M4A
+    if header[0] == 0xFF and header[1] & 0xE0 == 0xE0:
+        # 幀同步：layer 位為 00 的是 AAC ADTS，其餘為 MPEG 音頻
+        return FORMAT_AAC if header[1] & 0x06 == 0 else FORMAT_MP3
+    return None
+
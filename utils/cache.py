@@ -0,0 +1,346 @@
+"""
+緩存工具 - 帶 TTL 的 LRU 緩存及跨進程共享的 SQLite 緩存
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(*parts: Any) -> str:
+    """
+    根據內容生成穩定的緩存鍵（跨進程一致，不受 PYTHONHASHSEED 影響）
+
+    Args:
+        *parts: 參與計算的內容，例如規範化文字、模型名稱、提示詞版本
+
+    Returns:
+        str: SHA-256 十六進制摘要
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """線程安全的 LRU 緩存，支持每項獨立的 TTL，插入及淘汰均為 O(1)"""
+
+    def __init__(self, max_size: int = 100, ttl: Optional[float] = 300,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化緩存
+
+        Args:
+            max_size: 最大條目數
+            ttl: 默認存活時間（秒），None 表示不過期
+            clock: 時間來源（便於測試）
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._data: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        獲取緩存項，命中時移到最近使用位置
+
+        Args:
+            key: 緩存鍵
+
+        Returns:
+            Optional[Any]: 緩存值或 None
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and self._clock() >= expires_at:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        保存緩存項，超出容量時淘汰最久未使用的項
+
+        Args:
+            key: 緩存鍵
+            value: 緩存值
+            ttl: 本項的存活時間（秒），默認使用緩存的 TTL
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = self._clock() + ttl if ttl is not None else None
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            self._data[key] = (value, expires_at)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> bool:
+        """刪除緩存項"""
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        """清空緩存"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def stats(self) -> Dict[str, Any]:
+        """獲取緩存統計信息"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class SQLiteCache:
+    """
+    基於 SQLite (WAL 模式) 的共享緩存
+
+    同一節點上的所有 worker 進程共用一個數據庫文件，條目在重啟後仍然保留。
+    值以 JSON 存儲，因此只適用於可 JSON 序列化的數據。
+    """
+
+    _PRUNE_INTERVAL = 100  # 每寫入多少次清理一次過期及超量條目
+
+    def __init__(self, path: str, max_size: int = 10000, ttl: Optional[float] = 3600,
+                 timeout: float = 1.0):
+        """
+        初始化共享緩存
+
+        Args:
+            path: 數據庫文件路徑
+            max_size: 最大條目數（超出時淘汰最舊的寫入）
+            ttl: 默認存活時間（秒），None 表示不過期
+            timeout: 等待數據庫鎖的時間（秒）
+        """
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            ' key TEXT PRIMARY KEY,'
+            ' value TEXT NOT NULL,'
+            ' expires_at REAL,'
+            ' created_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_created_at ON cache (created_at)')
+
+    def _connection(self) -> sqlite3.Connection:
+        """獲取當前線程的數據庫連接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        獲取緩存項
+
+        Args:
+            key: 緩存鍵
+
+        Returns:
+            Optional[Any]: 緩存值或 None（未命中、過期或讀取失敗）
+        """
+        return self.get_with_ttl(key)[0]
+
+    def get_with_ttl(self, key: Hashable) -> Tuple[Optional[Any], Optional[float]]:
+        """
+        獲取緩存項及其剩餘存活時間
+
+        Args:
+            key: 緩存鍵
+
+        Returns:
+            Tuple[Optional[Any], Optional[float]]: (緩存值或 None, 剩餘秒數；不過期時為 None)
+        """
+        try:
+            row = self._connection().execute(
+                'SELECT value, expires_at FROM cache WHERE key = ?', (str(key),)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"共享緩存讀取失敗: {e}")
+            with self._lock:
+                self.errors += 1
+            return None, None
+
+        now = time.time()
+        with self._lock:
+            if row is None or (row[1] is not None and now >= row[1]):
+                self.misses += 1
+                return None, None
+            self.hits += 1
+        return json.loads(row[0]), (row[1] - now if row[1] is not None else None)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        保存緩存項
+
+        Args:
+            key: 緩存鍵
+            value: 可 JSON 序列化的值
+            ttl: 本項的存活時間（秒），默認使用緩存的 TTL
+        """
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        try:
+            payload = json.dumps(value, ensure_ascii=False)
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO cache (key, value, expires_at, created_at) VALUES (?, ?, ?, ?)',
+                (str(key), payload, expires_at, now)
+            )
+            with self._lock:
+                self._writes += 1
+                prune = self._writes % self._PRUNE_INTERVAL == 0
+            if prune:
+                self.prune()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"共享緩存寫入失敗: {e}")
+            with self._lock:
+                self.errors += 1
+
+    def prune(self):
+        """刪除過期條目，並把條目數限制在 max_size 以內"""
+        conn = self._connection()
+        conn.execute('DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?', (time.time(),))
+        conn.execute(
+            'DELETE FROM cache WHERE key IN ('
+            ' SELECT key FROM cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_size,)
+        )
+
+    def delete(self, key: Hashable) -> bool:
+        """刪除緩存項"""
+        cursor = self._connection().execute('DELETE FROM cache WHERE key = ?', (str(key),))
+        return cursor.rowcount > 0
+
+    def clear(self):
+        """清空緩存"""
+        self._connection().execute('DELETE FROM cache')
+
+    def __len__(self) -> int:
+        return self._connection().execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """獲取緩存統計信息（計數器為本進程的數據）"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'path': self.path,
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'errors': self.errors,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class TieredCache:
+    """兩級緩存：進程內 LRU 在前，共享緩存在後；共享層命中時回填進程內緩存"""
+
+    def __init__(self, local: LRUCache, shared: Optional[SQLiteCache] = None):
+        """
+        初始化兩級緩存
+
+        Args:
+            local: 進程內緩存
+            shared: 共享緩存（可選）
+        """
+        self.local = local
+        self.shared = shared
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """依次查找進程內及共享緩存"""
+        value = self.local.get(key)
+        if value is None and self.shared is not None:
+            value, remaining = self.shared.get_with_ttl(key)
+            if value is not None:
+                # 回填的條目不能比共享層活得更久
+                ttl = self.local.ttl
+                if remaining is not None:
+                    ttl = remaining if ttl is None else min(ttl, remaining)
+                self.local.set(key, value, ttl)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """同時寫入兩級緩存"""
+        self.local.set(key, value, ttl)
+        if self.shared is not None:
+            self.shared.set(key, value, ttl)
+
+    def delete(self, key: Hashable) -> bool:
+        """從兩級緩存中刪除"""
+        deleted = self.local.delete(key)
+        if self.shared is not None:
+            deleted = self.shared.delete(key) or deleted
+        return deleted
+
+    def clear(self):
+        """清空兩級緩存"""
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """獲取兩級緩存統計信息"""
+        stats = self.local.stats()
+        if self.shared is not None:
+            stats['shared'] = self.shared.stats()
+        return stats
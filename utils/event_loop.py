@@ -0,0 +1,101 @@
+"""
+後台事件循環 - 在專用線程中長期運行一個 asyncio 循環，供同步代碼及其他循環提交協程
+"""
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class EventLoopThread:
+    """
+    長期運行的事件循環線程
+
+    綁定事件循環的資源（httpx 連接池、信號量、Future）只在這個循環中創建及
+    使用；Flask 異步視圖每個請求各自的臨時循環通過 arun() 把協程交給它，
+    因此所有請求共用同一組資源。循環在第一次提交時啟動，close() 時先執行
+    登記的清理協程再停止。
+    """
+
+    def __init__(self, name: str = 'event-loop'):
+        """
+        Args:
+            name: 線程名稱
+        """
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self._cleanups: List[Callable[[], Awaitable[Any]]] = []
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        """啟動循環線程（只啟動一次）"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"事件循環 {self.name} 已關閉")
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def on_close(self, cleanup: Callable[[], Awaitable[Any]]):
+        """
+        登記關閉時在循環中執行的清理協程（例如關閉客戶端）
+
+        Args:
+            cleanup: 返回協程的函數
+        """
+        with self._lock:
+            self._cleanups.append(cleanup)
+
+    def submit(self, coro: Awaitable[Any]) -> concurrent.futures.Future:
+        """在循環中執行協程，返回線程安全的 Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_started())
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """在同步代碼中執行協程並等待結果"""
+        return self.submit(coro).result(timeout)
+
+    async def arun(self, coro: Awaitable[Any]) -> Any:
+        """在其他事件循環中等待協程在本循環的結果（取消時同時取消本循環中的任務）"""
+        return await asyncio.wrap_future(self.submit(coro))
+
+    def close(self, timeout: float = 5.0):
+        """執行清理協程並停止循環"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            loop, thread, cleanups = self._loop, self._thread, list(self._cleanups)
+        if loop is None:
+            return
+
+        async def shutdown():
+            for cleanup in cleanups:
+                try:
+                    await cleanup()
+                except Exception as e:
+                    logger.warning(f"事件循環 {self.name} 清理失敗: {e}")
+
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"事件循環 {self.name} 清理超時或失敗: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
+            loop.close()
@@ -0,0 +1,101 @@
+"""
+增量 JSON 解析工具 - 在模型串流輸出時逐個提取數組元素
+"""
+import json
+from typing import Any, List, Optional
+
+
+class IncrementalArrayParser:
+    """
+    增量解析頂層 JSON 對象中指定鍵的數組
+
+    每收到一段文字就繼續掃描，數組中的對象元素一閉合便解析並返回，
+    無需等待整個 JSON 完成。對象前後的非 JSON 文字（如 ```json）會被忽略。
+    """
+
+    def __init__(self, key: str = 'items'):
+        """
+        初始化解析器
+
+        Args:
+            key: 要提取的頂層數組鍵名
+        """
+        self.key = key
+        self._text = ''
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._element_start: Optional[int] = None
+        self.done = False
+
+    @property
+    def text(self) -> str:
+        """目前為止收到的完整文字"""
+        return self._text
+
+    def feed(self, chunk: str) -> List[Any]:
+        """
+        輸入一段文字
+
+        Args:
+            chunk: 新收到的文字
+
+        Returns:
+            List[Any]: 本段文字中閉合的數組元素
+        """
+        if not chunk:
+            return []
+        self._text += chunk
+        completed = []
+        text = self._text
+
+        for index in range(self._pos, len(text)):
+            char = text[index]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._element_start is None:
+                        self._last_string = text[self._string_start:index]
+                continue
+
+            if self._depth == 0 and char != '{':
+                continue  # 跳過對象之前的文字
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = index + 1
+            elif char == ':' and self._depth == 1:
+                self._current_key = self._last_string
+            elif char == ',' and self._depth == 1:
+                self._current_key = None
+            elif char in '{[':
+                if char == '[' and self._depth == 1 and self._current_key == self.key and not self.done:
+                    self._array_depth = self._depth + 1
+                elif char == '{' and self._array_depth is not None and self._depth == self._array_depth:
+                    self._element_start = index
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._array_depth is not None:
+                    if char == '}' and self._depth == self._array_depth and self._element_start is not None:
+                        try:
+                            completed.append(json.loads(text[self._element_start:index + 1]))
+                        except ValueError:
+                            pass
+                        self._element_start = None
+                    elif char == ']' and self._depth == self._array_depth - 1:
+                        self._array_depth = None
+                        self.done = True
+
+        self._pos = len(text)
+        return completed
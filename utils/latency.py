@@ -0,0 +1,53 @@
+"""
+耗時統計工具 - 按階段累計次數、平均及最大耗時
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+
+class LatencyRecorder:
+    """線程安全的分階段耗時統計"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, list] = {}  # 階段 → [次數, 總耗時, 最大耗時]
+
+    def record(self, stage: str, elapsed_ms: float):
+        """
+        記錄一次耗時
+
+        Args:
+            stage: 階段名稱
+            elapsed_ms: 耗時（毫秒）
+        """
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                self._stages[stage] = [1, elapsed_ms, elapsed_ms]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed_ms
+                entry[2] = max(entry[2], elapsed_ms)
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        """計時上下文，退出時記錄耗時（包括拋出異常的情況）"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - started) * 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        """獲取各階段統計"""
+        with self._lock:
+            return {
+                stage: {
+                    'count': count,
+                    'avg_ms': round(total / count, 3),
+                    'max_ms': round(peak, 3)
+                }
+                for stage, (count, total, peak) in self._stages.items()
+            }
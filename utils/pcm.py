@@ -0,0 +1,189 @@
+"""
+進程內 PCM 處理 - 解析 RIFF/WAVE、混音、多相重採樣及 16-bit 量化（NumPy 向量化）
+
+用於瀏覽器產生的 44.1/48kHz 立體聲 WAV，無需啟動 ffmpeg 子進程。
+"""
+import struct
+from dataclasses import dataclass
+from math import gcd
+from typing import Union
+
+import numpy as np
+
+TARGET_SAMPLE_RATE = 16000
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+_WAV_HEADER = struct.Struct('<4sI4s4sIHHIIHH4sI')
+_CHUNK_HEADER = struct.Struct('<4sI')
+_FILTER_HALF_LENGTH = 10   # 每側的零交叉數（與 scipy.signal.resample_poly 相同）
+_KAISER_BETA = 5.0
+_OUTPUT_BLOCK = 4096       # 每批計算的輸出樣本數，限制臨時矩陣大小
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+@dataclass(frozen=True)
+class WavInfo:
+    """WAV 文件參數及樣本數據（樣本為原數據的 memoryview，不複製）"""
+    audio_format: int
+    channels: int
+    sample_rate: int
+    bits_per_sample: int
+    samples: memoryview
+
+
+def parse_wav(data: BytesLike) -> WavInfo:
+    """
+    解析 RIFF/WAVE 數據
+
+    Args:
+        data: WAV 文件數據
+
+    Returns:
+        WavInfo: 格式參數及 data 塊的 memoryview
+
+    Raises:
+        ValueError: 不是 WAV 文件或缺少 fmt/data 塊
+    """
+    view = memoryview(data).cast('B')
+    if len(view) < 12 or view[0:4] != b'RIFF' or view[8:12] != b'WAVE':
+        raise ValueError("不是 RIFF/WAVE 數據")
+
+    fmt = None
+    offset = 12
+    while offset + _CHUNK_HEADER.size <= len(view):
+        chunk_id, chunk_size = _CHUNK_HEADER.unpack_from(view, offset)
+        body = offset + _CHUNK_HEADER.size
+        if chunk_id == b'fmt ':
+            if chunk_size < 16:
+                raise ValueError("fmt 塊長度不足")
+            audio_format, channels, sample_rate, _, _, bits = struct.unpack_from('<HHIIHH', view, body)
+            if audio_format == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40:
+                audio_format = struct.unpack_from('<H', view, body + 24)[0]
+            fmt = (audio_format, channels, sample_rate, bits)
+        elif chunk_id == b'data':
+            if fmt is None:
+                raise ValueError("data 塊位於 fmt 塊之前")
+            # 串流錄音的 data 長度可能為 0 或 0xFFFFFFFF，以實際長度為準
+            end = len(view) if chunk_size in (0, 0xFFFFFFFF) else min(body + chunk_size, len(view))
+            return WavInfo(*fmt, samples=view[body:end])
+        offset = body + chunk_size + (chunk_size & 1)
+
+    raise ValueError("缺少 fmt 或 data 塊")
+
+
+def _to_float(info: WavInfo) -> np.ndarray:
+    """把樣本轉換為 16-bit 幅度範圍的浮點數組，形狀為 (幀數, 聲道數)"""
+    width = info.bits_per_sample // 8
+    frame_bytes = width * info.channels
+    if frame_bytes == 0:
+        raise ValueError("無效的聲道數或位深")
+    usable = len(info.samples) - len(info.samples) % frame_bytes
+    samples = info.samples[:usable]
+
+    if info.audio_format == WAVE_FORMAT_IEEE_FLOAT and width in (4, 8):
+        values = np.frombuffer(samples, dtype=f'<f{width}') * 32767.0
+    elif info.audio_format != WAVE_FORMAT_PCM:
+        raise ValueError(f"不支持的 WAV 編碼: {info.audio_format}")
+    elif width == 1:
+        values = (np.frombuffer(samples, dtype=np.uint8).astype(np.float32) - 128.0) * 256.0
+    elif width == 2:
+        values = np.frombuffer(samples, dtype='<i2').astype(np.float32)
+    elif width == 3:
+        raw = np.frombuffer(samples, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        values = ((raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)) << 8 >> 8) / 256.0
+    elif width == 4:
+        values = np.frombuffer(samples, dtype='<i4') / 65536.0
+    else:
+        raise ValueError(f"不支持的位深: {info.bits_per_sample}")
+    return values.reshape(-1, info.channels)
+
+
+def _design_filter(up: int, down: int) -> np.ndarray:
+    """Kaiser 窗 sinc 低通濾波器（截止頻率為較低的奈奎斯特頻率，增益為 up）"""
+    max_rate = max(up, down)
+    length = 2 * _FILTER_HALF_LENGTH * max_rate + 1
+    t = np.arange(length) - (length - 1) / 2
+    taps = np.sinc(t / max_rate) * np.kaiser(length, _KAISER_BETA)
+    return taps * (up / taps.sum())
+
+
+def resample_poly(signal: np.ndarray, up: int, down: int) -> np.ndarray:
+    """
+    多相 FIR 重採樣（只計算需要輸出的樣本）
+
+    Args:
+        signal: 一維浮點信號
+        up: 上採樣倍數
+        down: 下採樣倍數
+
+    Returns:
+        np.ndarray: 長度為 ceil(len(signal) * up / down) 的信號
+    """
+    taps = _design_filter(up, down)
+    taps_per_phase = -(-len(taps) // up)
+    # phases[p, k] = taps[p + k * up]
+    phases = np.zeros(taps_per_phase * up)
+    phases[:len(taps)] = taps
+    phases = phases.reshape(taps_per_phase, up).T
+
+    output_length = -(-len(signal) * up // down)
+    delay = (len(taps) - 1) // 2
+    padded = np.concatenate((np.zeros(taps_per_phase), signal, np.zeros(taps_per_phase + 1)))
+    offsets = np.arange(taps_per_phase)
+
+    output = np.empty(output_length)
+    for start in range(0, output_length, _OUTPUT_BLOCK):
+        positions = np.arange(start, min(start + _OUTPUT_BLOCK, output_length)) * down + delay
+        base = positions // up
+        phase = positions % up
+        # 上採樣序列位置 t 對應輸入 base，濾波器第 k 個多相係數對應輸入 base - k
+        window = padded[(base + taps_per_phase)[:, None] - offsets[None, :]]
+        output[start:start + len(base)] = np.einsum('ij,ij->i', window, phases[phase])
+    return output
+
+
+def wav_header(data_size: int, sample_rate: int = TARGET_SAMPLE_RATE, channels: int = 1,
+               bits_per_sample: int = 16) -> bytes:
+    """生成 44 字節的 PCM WAV 頭部"""
+    block_align = channels * bits_per_sample // 8
+    return _WAV_HEADER.pack(
+        b'RIFF', 36 + data_size, b'WAVE', b'fmt ', 16, WAVE_FORMAT_PCM, channels,
+        sample_rate, sample_rate * block_align, block_align, bits_per_sample, b'data', data_size
+    )
+
+
+def convert_wav(data: BytesLike, sample_rate: int = TARGET_SAMPLE_RATE) -> bytes:
+    """
+    把任意 PCM/浮點 WAV 轉換為單聲道 16-bit 指定採樣率的 WAV
+
+    Args:
+        data: 原始 WAV 數據
+        sample_rate: 目標採樣率
+
+    Returns:
+        bytes: 轉換後的 WAV 數據
+
+    Raises:
+        ValueError: 無法解析或不支持的編碼
+    """
+    info = parse_wav(data)
+    if info.channels < 1 or info.sample_rate < 1:
+        raise ValueError("無效的聲道數或採樣率")
+
+    frames = _to_float(info)
+    mono = frames[:, 0] if info.channels == 1 else frames.mean(axis=1)
+
+    if info.sample_rate != sample_rate:
+        divisor = gcd(sample_rate, info.sample_rate)
+        mono = resample_poly(mono, sample_rate // divisor, info.sample_rate // divisor)
+
+    # 量化直接寫入輸出緩衝區（頭部之後）
+    output = bytearray(44 + len(mono) * 2)
+    output[:44] = wav_header(len(mono) * 2, sample_rate)
+    pcm = np.frombuffer(output, dtype='<i2', offset=44)
+    pcm[:] = np.clip(np.rint(mono), -32768, 32767)
+    return bytes(output)
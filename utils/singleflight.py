@@ -0,0 +1,191 @@
+"""
+請求合併工具 - 相同鍵的並發調用只執行一次，其餘調用共享結果
+"""
+import asyncio
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+# 執行者被取消時交給等待者的結果：等待者自己沒有被取消，應重新執行而不是收到 CancelledError
+_LEADER_CANCELLED = object()
+
+
+class _FlightCounters:
+    """合併調用計數（線程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    def _count(self, leader: bool):
+        """記錄一次調用（leader 表示實際執行）"""
+        with self._lock:
+            self.calls += 1
+            if leader:
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+    def _promote(self):
+        """記錄等待者改為實際執行（原執行者被取消）"""
+        with self._lock:
+            self.executions += 1
+            self.coalesced -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """獲取合併統計信息"""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'executions': self.executions,
+                'coalesced': self.coalesced,
+                'coalesce_rate': round(self.coalesced / self.calls, 4) if self.calls else 0.0
+            }
+
+
+class _Call:
+    """進行中的調用"""
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight(_FlightCounters):
+    """多線程版本：同一鍵同時只有一個線程執行，其他線程等待並共享結果或異常"""
+
+    def __init__(self):
+        super().__init__()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        執行或加入相同鍵的調用
+
+        Args:
+            key: 合併鍵
+            fn: 實際執行的函數
+
+        Returns:
+            Tuple[Any, bool]: (結果, 是否為共享結果)
+
+        Raises:
+            執行函數拋出的異常會傳給所有等待者
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+        self._count(leader)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self) -> int:
+        """進行中的調用數"""
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, Any]:
+        """獲取合併統計信息（含進行中的調用數）"""
+        stats = super().stats()
+        stats['in_flight'] = self.in_flight()
+        return stats
+
+
+class AsyncSingleFlight(_FlightCounters):
+    """
+    異步版本：同一事件循環內相同鍵的協程共享一個執行
+
+    Future 綁定事件循環，因此進行中的調用按循環分開保存。執行的協程被取消時，
+    等待者不會收到 CancelledError，而是由其中一個重新執行。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._calls = weakref.WeakKeyDictionary()
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        執行或加入相同鍵的調用
+
+        Args:
+            key: 合併鍵
+            factory: 返回協程的函數（只有實際執行時才調用）
+
+        Returns:
+            Tuple[Any, bool]: (結果, 是否為共享結果)
+
+        Raises:
+            執行協程拋出的異常（取消除外）會傳給所有等待者
+        """
+        loop = asyncio.get_running_loop()
+        retry = False
+        while True:
+            with self._lock:
+                calls = self._calls.get(loop)
+                if calls is None:
+                    calls = self._calls[loop] = {}
+                future = calls.get(key)
+                leader = future is None
+                if leader:
+                    future = calls[key] = loop.create_future()
+            if not retry:
+                self._count(leader)
+            elif leader:
+                self._promote()
+
+            if leader:
+                break
+            # shield：某個等待者被取消不影響其他等待者
+            result = await asyncio.shield(future)
+            if result is not _LEADER_CANCELLED:
+                return result, True
+            retry = True
+
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            future.set_result(_LEADER_CANCELLED)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # 標記為已讀取，沒有等待者時不產生警告
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                calls.pop(key, None)
+        return result, False
+
+    def in_flight(self) -> int:
+        """進行中的調用數（所有事件循環）"""
+        with self._lock:
+            return sum(len(calls) for calls in self._calls.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """獲取合併統計信息（含進行中的調用數）"""
+        stats = super().stats()
+        stats['in_flight'] = self.in_flight()
+        return stats
@@ -0,0 +1,109 @@
+"""
+臨時音頻文件 - 寫入內存文件系統，並在後台線程刪除
+"""
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Linux 上的內存文件系統（tmpfs）
+_SHM_DIR = '/dev/shm'
+
+
+def default_temp_dir() -> str:
+    """優先使用 /dev/shm，不可用時使用系統臨時目錄"""
+    if os.path.isdir(_SHM_DIR) and os.access(_SHM_DIR, os.W_OK):
+        return _SHM_DIR
+    return tempfile.gettempdir()
+
+
+def write_temp_audio(data: bytes, directory: Optional[str] = None, suffix: str = '.wav') -> str:
+    """
+    把音頻數據寫入臨時文件（返回前文件句柄已關閉）
+
+    Args:
+        data: 音頻數據
+        directory: 目錄，None 時使用 default_temp_dir()
+        suffix: 文件後綴
+
+    Returns:
+        str: 文件路徑，用完後交給 TempFileReaper.discard
+    """
+    fd, path = tempfile.mkstemp(suffix=suffix, prefix='speech_', dir=directory or default_temp_dir())
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+    except Exception:
+        os.close(fd)
+        os.unlink(path)
+        raise
+    os.close(fd)
+    return path
+
+
+class TempFileReaper:
+    """
+    後台刪除臨時文件
+
+    POSIX 系統上即使文件仍被打開也可以直接刪除；Windows 上文件可能仍被 SDK
+    佔用，刪除失敗時在後台線程按遞增間隔重試，不阻塞請求線程。
+    """
+
+    def __init__(self, max_attempts: int = 5, retry_delay: float = 0.3):
+        """
+        Args:
+            max_attempts: 每個文件最多嘗試刪除的次數
+            retry_delay: 重試基礎間隔（秒），第 n 次重試等待 n 倍
+        """
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._queue: 'queue.Queue[Tuple[str, int, float]]' = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.removed = 0
+        self.failed = 0
+
+    def discard(self, path: str):
+        """安排刪除文件（立即返回）"""
+        self._ensure_thread()
+        self._queue.put((path, 0, 0.0))
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='temp-file-reaper', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            path, attempt, not_before = self._queue.get()
+            wait = not_before - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                if attempt + 1 < self.max_attempts:
+                    delay = self.retry_delay * (attempt + 1)
+                    self._queue.put((path, attempt + 1, time.monotonic() + delay))
+                else:
+                    with self._lock:
+                        self.failed += 1
+                    logger.debug(f"臨時文件將由系統稍後清理: {path} ({e})")
+                continue
+            with self._lock:
+                self.removed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """獲取刪除統計"""
+        with self._lock:
+            return {'pending': self._queue.qsize(), 'removed': self.removed, 'failed': self.failed}
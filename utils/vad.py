@@ -0,0 +1,127 @@
+"""
+語音活動檢測 - 按幀計算能量及過零率（NumPy 向量化），裁剪首尾靜音
+"""
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+
+from utils.pcm import WAVE_FORMAT_PCM, BytesLike, parse_wav, wav_header
+
+FRAME_MS = 20
+# 能量閾值：噪聲底（第 10 百分位幀能量）的倍數，且不低於絕對下限（16-bit 幅度，約 -44 dBFS）。
+# 連續說話沒有停頓時第 10 百分位也是語音，因此閾值同時不高於響亮幀（第 90 百分位）的一定比例：
+# 幀能量差距小而整體響亮的片段全部視為語音
+_NOISE_PERCENTILE = 10
+_LOUD_PERCENTILE = 90
+_ENERGY_RATIO = 4.0
+_LOUD_RATIO = 0.25
+_MIN_RMS = 200.0
+# 清音（擦音、送氣音）能量低但過零率高
+_UNVOICED_ENERGY_RATIO = 0.5
+_UNVOICED_ZCR = 0.25
+
+
+@dataclass(frozen=True)
+class VadResult:
+    """檢測結果（位置以樣本為單位）"""
+    sample_rate: int
+    total_samples: int
+    start: int
+    end: int
+    speech_frames: int
+    total_frames: int
+    uncertain: bool = False
+
+    @property
+    def is_empty(self) -> bool:
+        """是否確定沒有語音（所有幀都低於閾值）"""
+        return self.speech_frames == 0
+
+    @property
+    def speech_ratio(self) -> float:
+        """語音幀佔比"""
+        return self.speech_frames / self.total_frames if self.total_frames else 0.0
+
+    @property
+    def input_seconds(self) -> float:
+        return self.total_samples / self.sample_rate
+
+    @property
+    def speech_seconds(self) -> float:
+        return self.speech_frames * FRAME_MS / 1000
+
+    @property
+    def kept_seconds(self) -> float:
+        return (self.end - self.start) / self.sample_rate
+
+
+def detect_speech(samples: np.ndarray, sample_rate: int, padding_ms: int = 200,
+                  min_speech_ms: int = 100) -> VadResult:
+    """
+    檢測語音範圍
+
+    Args:
+        samples: 單聲道 16-bit 樣本
+        sample_rate: 採樣率
+        padding_ms: 在首尾語音幀外保留的長度（毫秒），避免切掉弱起音及尾音
+        min_speech_ms: 語音幀總長度低於此值時無法判斷（例如只有敲擊聲或極短的回答），
+            保留整段並標記 uncertain，交由識別服務判斷
+
+    Returns:
+        VadResult: 保留範圍 [start, end) 及語音幀統計；只有所有幀都低於閾值時才為空
+    """
+    frame = sample_rate * FRAME_MS // 1000
+    count = len(samples) // frame if frame else 0
+    if count == 0:
+        return VadResult(sample_rate, len(samples), 0, 0, 0, 0)
+
+    frames = samples[:count * frame].astype(np.float32).reshape(count, frame)
+    rms = np.sqrt(np.einsum('ij,ij->i', frames, frames) / frame)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame - 1)
+
+    noise, loud = np.percentile(rms, (_NOISE_PERCENTILE, _LOUD_PERCENTILE))
+    threshold = max(_MIN_RMS, min(float(noise) * _ENERGY_RATIO, float(loud) * _LOUD_RATIO))
+    speech = (rms > threshold) | ((rms > threshold * _UNVOICED_ENERGY_RATIO) & (zcr > _UNVOICED_ZCR))
+    indices = np.flatnonzero(speech)
+    if len(indices) == 0:
+        return VadResult(sample_rate, len(samples), 0, 0, 0, count)
+    if len(indices) * FRAME_MS < min_speech_ms:
+        return VadResult(sample_rate, len(samples), 0, len(samples), len(indices), count, uncertain=True)
+
+    pad = padding_ms // FRAME_MS
+    start = max(0, int(indices[0]) - pad) * frame
+    last = int(indices[-1]) + 1 + pad
+    end = last * frame if last < count else len(samples)
+    return VadResult(sample_rate, len(samples), start, end, len(indices), count)
+
+
+def trim_wav(data: BytesLike, padding_ms: int = 200) -> Tuple[bytes, VadResult]:
+    """
+    裁剪 16-bit 單聲道 WAV 的首尾靜音
+
+    Args:
+        data: WAV 數據（_convert_audio_to_wav 的輸出）
+        padding_ms: 保留的首尾長度（毫秒）
+
+    Returns:
+        Tuple[bytes, VadResult]: (裁剪後的 WAV，沒有語音時為空，無法判斷時為原數據, 檢測結果)
+
+    Raises:
+        ValueError: 不是 16-bit 單聲道 PCM WAV
+    """
+    info = parse_wav(data)
+    if info.audio_format != WAVE_FORMAT_PCM or info.channels != 1 or info.bits_per_sample != 16:
+        raise ValueError("只支持 16-bit 單聲道 PCM WAV")
+
+    raw = info.samples[:len(info.samples) & ~1]
+    samples = np.frombuffer(raw, dtype='<i2')
+    result = detect_speech(samples, info.sample_rate, padding_ms)
+    if result.is_empty:
+        return b'', result
+    if result.start == 0 and result.end == len(samples):
+        return bytes(data), result
+
+    kept = raw[result.start * 2:result.end * 2]
+    return wav_header(len(kept), info.sample_rate) + kept.tobytes(), result
@@ -0,0 +1,6 @@
+"""
+生產環境 WSGI 入口 - 供 gunicorn 使用（gunicorn wsgi:app，配置見 gunicorn.conf.py）
+"""
+from app import create_app
+
+app = create_app()